@@ -11,7 +11,9 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Отдельный модуль настроек: async-представления каталога (config.asgi_urls)
+# и соединения с БД без переиспользования, см. config/asgi_settings.py.
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.asgi_settings')
 
 application = get_asgi_application()
 
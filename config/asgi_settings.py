@@ -0,0 +1,23 @@
+"""
+Настройки ASGI-процесса (config/asgi.py).
+
+Те же, что config.settings, но каталог обслуживают async-представления
+(config.asgi_urls), а постоянные соединения с БД по умолчанию выключены:
+под ASGI запросы к БД идут из потоков sync_to_async каждого запроса, и
+соединения копились бы вместо переиспользования. Явно заданный
+DATABASE_CONN_MAX_AGE имеет приоритет.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+ROOT_URLCONF = 'config.asgi_urls'
+
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 0)),
+    },
+}
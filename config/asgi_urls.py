@@ -0,0 +1,12 @@
+"""
+URL configuration for the ASGI entry point (config/asgi.py).
+
+Same as config.urls, but catalog pages are served by async views.
+"""
+from django.contrib import admin
+from django.urls import path, include
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', include('store.async_urls')),
+]
@@ -34,6 +34,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'store.instrumentation.QueryInstrumentationMiddleware',
+    'store.routing.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -41,8 +43,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'store.middleware.NewProductBatchMiddleware',
 ]
 
+# Под ASGI — config.asgi_urls с async-представлениями каталога (config/asgi_settings.py).
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -56,6 +60,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'store.context_processors.category_navigation',
             ],
         },
     },
@@ -74,6 +79,94 @@ DATABASES = {
     }
 }
 
+# Профиль БД: development (настройки SQLite по умолчанию) или production —
+# WAL, постоянные соединения и ожидание блокировок вместо ошибок
+# «database is locked» при одновременной записи веба и Celery (store.sqlite).
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'development')
+
+# PRAGMA для каждого нового соединения SQLite (сигнал connection_created).
+STORE_SQLITE_PRAGMAS = {}
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        # config/asgi_settings.py выставляет 0: под ASGI соединения не переиспользуются.
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Блокировка записи берется в начале транзакции: повышение
+            # чтения до записи в WAL не ждет busy_timeout и сразу падает.
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+    STORE_SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20_000,  # мс
+        'cache_size': -64_000,  # КиБ, т.е. 64 МиБ
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+elif DATABASE_PROFILE != 'development':
+    raise ValueError(f'Неизвестный DATABASE_PROFILE: {DATABASE_PROFILE}')
+
+# Реплики только для чтения (store.routing): DATABASE_REPLICAS — пути к
+# копиям БД через запятую. В тестах реплики зеркалируют default.
+for _index, _name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{_index}'] = {
+        **DATABASES['default'],
+        'NAME': _name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['store.routing.ReplicaRouter']
+
+# Страницы каталога читают с реплик; round_robin или least_latency.
+STORE_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+STORE_REPLICA_SELECTION = os.environ.get('DATABASE_REPLICA_SELECTION', 'round_robin')
+# Сколько секунд после записи клиент читает с основной БД.
+STORE_PRIMARY_PIN_SECONDS = 5
+
+
+# Cache
+# Локальный кеш процесса по умолчанию; CACHE_BACKEND=redis включает общий
+# кеш для всех процессов (веб и Celery), чтобы инвалидация была видна везде.
+
+if os.environ.get('CACHE_BACKEND') == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://{}:{}/1'.format(
+                os.environ.get('REDIS_HOST', 'localhost'),
+                os.environ.get('REDIS_PORT', '6379'),
+            ),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            # По умолчанию 300 ключей — меньше, чем карточек на странице категории.
+            'OPTIONS': {'MAX_ENTRIES': 50_000},
+        }
+    }
+
+STORE_CACHE_ALIAS = 'default'
+
+# Кеш страниц каталога для анонимных пользователей (store.conditional).
+# Условные GET с ETag/Last-Modified работают независимо от этого флага.
+STORE_PAGE_CACHE = False
+STORE_PAGE_CACHE_TIMEOUT = 300
+
+# Список товаров в админке: начиная с этого количества вместо COUNT(*)
+# используется оценка по счетчикам категорий и сводке (None — всегда COUNT(*)).
+STORE_ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+# Учет запросов к БД (store.instrumentation)
+# Заголовки X-DB-* в ответах; предупреждение в логе при превышении бюджета.
+STORE_QUERY_HEADERS = DEBUG
+STORE_QUERY_BUDGET_WARNING = 50
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -130,6 +223,34 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 минут
 CELERY_TASK_SOFT_TIME_LIMIT = 60  # 1 минута
+# Периодические задачи (celery -A config beat)
+CELERY_BEAT_SCHEDULE = {
+    'relay-outbox': {
+        'task': 'store.tasks.relay_outbox',
+        'schedule': 5.0,
+    },
+    'compact-outbox': {
+        'task': 'store.tasks.compact_outbox',
+        'schedule': 60 * 60,
+    },
+    'compact-price-history': {
+        'task': 'store.tasks.compact_price_history',
+        'schedule': 24 * 60 * 60,
+    },
+    'refresh-catalog-stats': {
+        'task': 'store.tasks.refresh_catalog_stats',
+        'schedule': 60.0,
+    },
+}
+
+# Outbox (store.outbox): на PostgreSQL relay пропускает события моложе
+# этого числа секунд, чтобы параллельные транзакции успели зафиксироваться.
+STORE_OUTBOX_SETTLE_SECONDS = 2
+
+# История цен (store.prices): полная детализация за последние 90 дней,
+# дальше — одна цена товара за день, старше двух лет — только последняя.
+STORE_PRICE_HISTORY_FULL_RESOLUTION_DAYS = 90
+STORE_PRICE_HISTORY_RETENTION_DAYS = 730
 
 # Создание папки для логов
 LOGS_DIR = BASE_DIR / 'logs'
@@ -148,16 +269,25 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'store.logs.JsonFormatter',
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        # Запись в файл в отдельном потоке, одна строка JSON на событие,
+        # пачками по 100 записей или раз в секунду, ротация по 10 МиБ.
         'file': {
-            'class': 'logging.FileHandler',
+            'class': 'store.logs.QueueFileHandler',
             'filename': LOGS_DIR / 'celery.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'capacity': 100,
+            'flush_interval': 1.0,
         },
     },
     'root': {
@@ -1,8 +1,106 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.db.models import Sum
 from django.utils.html import format_html
 from django.contrib.admin import SimpleListFilter
-from decimal import Decimal
-from .models import Category, Product
+from django.contrib.admin.utils import get_last_value_from_parameters
+from django.contrib.admin.views.main import ERROR_FLAG, IGNORED_PARAMS, PAGE_VAR, SEARCH_VAR
+from django.contrib.admin.widgets import AutocompleteSelect
+from . import rollups
+from .facets import PRICE_BUCKETS, get_facets, price_bucket_q
+from .models import Category, CategoryDailyStats, Product
+from .navigation import get_category_navigation
+from .pagination import EstimatedCountPaginator
+from .repricing import Repricer, RepricingRule
+
+CATEGORY_PARAM = 'category__id__exact'
+DATE_PARAMS = {'created_at__year': 'day__year', 'created_at__month': 'day__month', 'created_at__day': 'day__day'}
+# Параметры списка товаров, при которых количество и даты берутся из
+# счетчиков категорий и сводки store.rollups, а не из таблицы товаров.
+ESTIMATED_PARAMS = {CATEGORY_PARAM, *DATE_PARAMS, *IGNORED_PARAMS}
+
+
+def _estimable(params, search):
+    category_id = params.get(CATEGORY_PARAM)
+    if category_id is not None and not str(category_id).isdigit():
+        return False
+    return not search and not set(params) - ESTIMATED_PARAMS
+
+
+def product_rollup_stats(params, search=''):
+    """
+    Строки сводки CategoryDailyStats для списка товаров с параметрами params
+    или None, если сводка к нему неприменима (поиск, другие фильтры, сводка
+    еще не построена).
+    """
+    if not _estimable(params, search) or not rollups.is_built():
+        return None
+    stats = CategoryDailyStats.objects.all()
+    if CATEGORY_PARAM in params:
+        stats = stats.filter(category_id=params[CATEGORY_PARAM])
+    for param, lookup in DATE_PARAMS.items():
+        if param in params:
+            stats = stats.filter(**{lookup: params[param]})
+    return stats
+
+
+def estimate_product_count(params, search=''):
+    """
+    Оценка количества товаров в списке без COUNT(*) или None.
+
+    Без фильтров и с фильтром по категории — из счетчиков Category.product_count
+    (кешированная навигация), с фильтром по дате — из сводки store.rollups.
+    """
+    if not _estimable(params, search):
+        return None
+    if DATE_PARAMS.keys() & params.keys():
+        stats = product_rollup_stats(params, search)
+        return None if stats is None else stats.aggregate(total=Sum('product_count'))['total'] or 0
+    counts = {str(item['id']): item['product_count'] for item in get_category_navigation()}
+    if CATEGORY_PARAM in params:
+        return counts.get(params[CATEGORY_PARAM], 0)
+    return sum(counts.values())
+
+
+class CachedAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение категории: подпись выбранной — из кешированной навигации, без запроса."""
+
+    def optgroups(self, name, value, attr=None):
+        names = {str(item['id']): item['name'] for item in get_category_navigation()}
+        options = [] if self.is_required else [self.create_option(name, '', '', False, 0)]
+        selected = next((str(v) for v in value if str(v) in names), None)
+        if selected is not None:
+            options.append(self.create_option(name, selected, names[selected], True, len(options)))
+        return [(None, options, 0)]
+
+
+class CategoryAutocompleteFilter(admin.FieldListFilter):
+    """
+    Фильтр по категории с автодополнением: боковая панель не загружает
+    список всех категорий, варианты ищутся через autocomplete админки.
+    """
+    template = 'admin/store/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.attname}__exact'
+        self.lookup_val = get_last_value_from_parameters(params, self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.widget = CachedAutocompleteSelect(field, model_admin.admin_site, attrs={'style': 'width: 100%'})
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': 'Все',
+            'widget': self.widget.render(self.lookup_kwarg, self.lookup_val),
+        }
 
 
 class PriceRangeFilter(SimpleListFilter):
@@ -11,22 +109,33 @@ class PriceRangeFilter(SimpleListFilter):
     parameter_name = 'price_range'
 
     def lookups(self, request, model_admin):
-        return (
-            ('0-1000', 'До 1 000 ₽'),
-            ('1000-5000', '1 000 - 5 000 ₽'),
-            ('5000-20000', '5 000 - 20 000 ₽'),
-            ('20000+', 'Свыше 20 000 ₽'),
+        """
+        Диапазоны с количеством товаров (один закешированный агрегат).
+
+        Количество считается по всему каталогу или категории, поэтому при
+        поиске, фильтре по дате и других фильтрах оно не показывается.
+        """
+        params = request.GET
+        category_id = params.get(CATEGORY_PARAM)
+        counted = {CATEGORY_PARAM, self.parameter_name, *IGNORED_PARAMS}
+        if (params.get(SEARCH_VAR) or set(params) - counted
+                or (category_id and not category_id.isdigit())):
+            return tuple((key, label) for key, label, _, _ in PRICE_BUCKETS)
+        queryset = model_admin.get_queryset(request)
+        filters = {'scope': 'admin'}
+        if category_id:
+            queryset = queryset.filter(category_id=category_id)
+            filters['category'] = category_id
+        counts = get_facets(queryset, filters)['price']
+        return tuple(
+            (key, f'{label} ({counts[key]})')
+            for key, label, _, _ in PRICE_BUCKETS
         )
 
     def queryset(self, request, queryset):
-        if self.value() == '0-1000':
-            return queryset.filter(price__lt=Decimal('1000.00'))
-        if self.value() == '1000-5000':
-            return queryset.filter(price__gte=Decimal('1000.00'), price__lt=Decimal('5000.00'))
-        if self.value() == '5000-20000':
-            return queryset.filter(price__gte=Decimal('5000.00'), price__lt=Decimal('20000.00'))
-        if self.value() == '20000+':
-            return queryset.filter(price__gte=Decimal('20000.00'))
+        price_q = price_bucket_q(self.value())
+        if price_q is not None:
+            return queryset.filter(price_q)
         return queryset
 
 
@@ -42,32 +151,38 @@ class ProductInline(admin.TabularInline):
 class CategoryAdmin(admin.ModelAdmin):
     """Продвинутая настройка админки для категорий."""
     list_display = ('name', 'description', 'products_count')
+    readonly_fields = ('product_count',)
     search_fields = ('name', 'description')
     list_per_page = 20
     inlines = [ProductInline]
     
     def products_count(self, obj):
-        """Количество товаров в категории."""
-        count = obj.products.count()
+        """Количество товаров в категории (денормализованный счетчик, без запроса)."""
+        count = obj.product_count
         return format_html(
             '<span style="color: {};">{}</span>',
             'green' if count > 0 else 'gray',
             count
         )
     products_count.short_description = 'Количество товаров'
+    products_count.admin_order_field = 'product_count'
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     """Продвинутая настройка админки для товаров."""
     list_display = ('name', 'price', 'formatted_price', 'category', 'created_at', 'is_recent')
-    list_filter = ('category', 'created_at', PriceRangeFilter)
+    list_filter = (('category', CategoryAutocompleteFilter), 'created_at', PriceRangeFilter)
     search_fields = ('name', 'description', 'category__name')
+    # Даты строятся по сводке store.rollups (шаблон admin/store/product/change_list.html)
     date_hierarchy = 'created_at'
     list_editable = ('price', 'category')
     list_per_page = 25
     list_select_related = ('category',)
     readonly_fields = ('created_at',)
+    autocomplete_fields = ('category',)
+    # Без второго COUNT(*) по всей таблице на каждой загрузке списка
+    show_full_result_count = False
     
     fieldsets = (
         ('Основная информация', {
@@ -85,11 +200,33 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
     
+    @property
+    def media(self):
+        category = CachedAutocompleteSelect(Product._meta.get_field('category'), self.admin_site)
+        return super().media + category.media + forms.Media(js=['store/admin/autocomplete_filter.js'])
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'category':
+            kwargs.setdefault('widget', CachedAutocompleteSelect(db_field, self.admin_site))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        """Количество товаров — оценка (estimate_product_count) для больших списков."""
+        params = dict(request.GET.items())
+        search = params.pop(SEARCH_VAR, '')
+        for name in (PAGE_VAR, ERROR_FLAG):
+            params.pop(name, None)
+        return EstimatedCountPaginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            estimate=lambda: estimate_product_count(params, search),
+            threshold=settings.STORE_ADMIN_ESTIMATED_COUNT_THRESHOLD,
+        )
+    
     def formatted_price(self, obj):
         """Форматированная цена с символом рубля."""
         return format_html(
-            '<strong>{:,.0f} ₽</strong>',
-            float(obj.price)
+            '<strong>{} ₽</strong>',
+            f'{obj.price:,.0f}'
         )
     formatted_price.short_description = 'Цена'
     
@@ -99,38 +236,68 @@ class ProductAdmin(admin.ModelAdmin):
         from datetime import timedelta
         recent = timezone.now() - timedelta(days=7)
         if obj.created_at >= recent:
-            return format_html('<span style="color: green;">Новый</span>')
-        return format_html('<span style="color: gray;">-</span>')
+            return format_html('<span style="color: {};">{}</span>', 'green', 'Новый')
+        return format_html('<span style="color: {};">{}</span>', 'gray', '-')
     is_recent.short_description = 'Статус'
-    is_recent.boolean = True
+    
+    def reprice(self, request, queryset, rule, message):
+        """Переоценка выбранных товаров порциями с точным округлением Decimal."""
+        # Подзапрос вместо исходного QuerySet: у changelist бывают DISTINCT и JOIN,
+        # несовместимые с SELECT ... FOR UPDATE.
+        selected = Product.objects.filter(pk__in=queryset.values('pk'))
+        stats = Repricer([rule], queryset=selected).run()
+        self.message_user(request, f'{message} для {stats.updated} товаров.')
     
     @admin.action(description='Увеличить цену на 10%%')
     def make_expensive(self, request, queryset):
         """Действие: увеличить цену на 10%."""
-        from django.db.models import F
-        updated = queryset.update(price=F('price') * 1.1)
-        self.message_user(request, f'Цена увеличена на 10% для {updated} товаров.')
+        self.reprice(request, queryset, RepricingRule(percent=10), 'Цена увеличена на 10%')
     
     @admin.action(description='Уменьшить цену на 10%%')
     def make_cheap(self, request, queryset):
         """Действие: уменьшить цену на 10%."""
-        from django.db.models import F
-        updated = queryset.update(price=F('price') * 0.9)
-        self.message_user(request, f'Цена уменьшена на 10% для {updated} товаров.')
+        self.reprice(request, queryset, RepricingRule(percent=-10), 'Цена уменьшена на 10%')
     
     @admin.action(description='Увеличить цену на 20%%')
     def make_very_expensive(self, request, queryset):
         """Действие: увеличить цену на 20%."""
-        from django.db.models import F
-        updated = queryset.update(price=F('price') * 1.2)
-        self.message_user(request, f'Цена увеличена на 20% для {updated} товаров.')
+        self.reprice(request, queryset, RepricingRule(percent=20), 'Цена увеличена на 20%')
     
     @admin.action(description='Сбросить цену до 1000 ₽')
     def reset_price(self, request, queryset):
         """Действие: установить цену 1000 ₽."""
-        from decimal import Decimal
-        updated = queryset.update(price=Decimal('1000.00'))
-        self.message_user(request, f'Цена установлена в 1000 ₽ для {updated} товаров.')
+        self.reprice(request, queryset, RepricingRule(price='1000.00'), 'Цена установлена в 1000 ₽')
     
     actions = [make_expensive, make_cheap, make_very_expensive, reset_price]
 
+
+@admin.register(CategoryDailyStats)
+class CategoryDailyStatsAdmin(admin.ModelAdmin):
+    """Дашборд статистики каталога: сводка по категориям и дням (store.rollups)."""
+    list_display = ('day', 'category', 'product_count', 'price_min', 'price_max', 'average_price')
+    list_filter = ('category',)
+    date_hierarchy = 'day'
+    list_per_page = 50
+    list_select_related = ('category',)
+
+    def average_price(self, obj):
+        """Средняя цена товаров категории за день."""
+        return obj.price_avg
+    average_price.short_description = 'Средняя цена'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        """Список строк сводки и итоги по категориям за выбранный период."""
+        response = super().changelist_view(request, extra_context)
+        cl = getattr(response, 'context_data', {}).get('cl')
+        if cl is not None:
+            response.context_data['category_summary'] = rollups.category_summary(cl.queryset)
+        return response
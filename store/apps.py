@@ -6,3 +6,8 @@ class StoreConfig(AppConfig):
     name = 'store'
     verbose_name = 'Магазин'
 
+    def ready(self):
+        from . import receivers  # noqa: F401
+        from .instrumentation import connect_celery_signals
+
+        connect_celery_signals()
@@ -0,0 +1,22 @@
+"""
+URL приложения store для ASGI.
+
+Те же маршруты, что и в store/urls.py, но страницы каталога обслуживаются
+async-представлениями из store/async_views.py.
+"""
+from django.urls import path
+
+from . import async_views
+from .urls import app_name, urlpatterns as sync_urlpatterns  # noqa: F401
+
+ASYNC_VIEWS = {
+    'index': async_views.product_list,
+    'category_detail': async_views.category_detail,
+    'product_detail': async_views.product_detail,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
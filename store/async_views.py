@@ -0,0 +1,157 @@
+"""
+Async-варианты страниц каталога для ASGI.
+
+Данные загружаются через async ORM (aget, async for, aiterator), синхронные
+помощники (кеш фрагментов, фасеты, навигация) вызываются через sync_to_async.
+Независимые части страницы — навигация по категориям, товары и фасеты —
+собираются через asyncio.gather, но запросы к БД при этом выполняются
+последовательно: async ORM и sync_to_async(thread_sensitive=True) работают в
+одном потоке запроса, у которого одно соединение с БД. Выигрыш ASGI не в
+параллельных запросах внутри страницы, а в том, что event loop не занят, пока
+запросы ждут БД, и обслуживает другие соединения. Шаблон отдается как
+TemplateResponse: Django рендерит его в потоке запроса, так что контекстные
+процессоры могут обращаться к БД.
+
+Маршруты с этими представлениями подключает store/async_urls.py.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.template.response import TemplateResponse
+
+from .conditional import conditional_page
+from .filters import filter_products
+from .fragments import render_cards, render_detail
+from .models import Category, Product
+from .navigation import get_category_navigation
+from .pagination import pagination_links, paginate_by_cursor, use_cursor_pagination
+from .views import (
+    CATEGORY_PAGE_SIZE, STREAM_CHUNK_SIZE, STREAM_FIELDS, ProductListView,
+    catalog_scope, category_scope, price_facets, product_scope, stream_frame,
+)
+
+
+async def category_navigation():
+    """Категории боковой панели (вместо ленивого контекстного процессора)."""
+    return await sync_to_async(get_category_navigation)()
+
+
+async def paginate(request, queryset, per_page, strict=False):
+    """
+    Страница товаров (обычная или курсорная) с загруженным object_list.
+
+    Args:
+        strict: неверный номер страницы — 404, как у ListView; иначе
+            ближайшая допустимая страница, как у Paginator.get_page()
+    """
+    if use_cursor_pagination(request):
+        return await sync_to_async(paginate_by_cursor)(request, queryset, per_page)
+    paginator = Paginator(queryset, per_page)
+    number = request.GET.get('page')
+    if strict:
+        try:
+            page = await sync_to_async(paginator.page)(number or 1)
+        except InvalidPage:
+            raise Http404('Неверная страница.')
+    else:
+        page = await sync_to_async(paginator.get_page)(number)
+    page.object_list = [product async for product in page.object_list]
+    return page
+
+
+@conditional_page(catalog_scope)
+async def product_list(request):
+    """Каталог товаров: async-вариант ProductListView."""
+    # Поиск выбирает бэкенд запросом к БД (store.search.get_backend) — не в event loop.
+    queryset = await sync_to_async(filter_products)(
+        Product.objects.select_related('category'), request.GET,
+    )
+    page, facets, categories = await asyncio.gather(
+        paginate(request, queryset, ProductListView.paginate_by, strict=True),
+        sync_to_async(price_facets)(request),
+        category_navigation(),
+    )
+    cards = await sync_to_async(render_cards)(page.object_list, show_category=True)
+    category_id = request.GET.get('category')
+    return TemplateResponse(request, 'store/index.html', {
+        'products': page.object_list,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'page_links': pagination_links(request, page),
+        'product_cards': cards,
+        'price_facets': facets,
+        'search_query': request.GET.get('search', ''),
+        'selected_category': int(category_id) if category_id else None,
+        'categories': categories,
+    })
+
+
+@conditional_page(product_scope)
+async def product_detail(request, product_id):
+    """Страница товара: async-вариант ProductDetailView."""
+    try:
+        product, categories = await asyncio.gather(
+            Product.objects.select_related('category').aget(pk=product_id),
+            category_navigation(),
+        )
+    except Product.DoesNotExist:
+        raise Http404('Товар не найден.')
+    body = await sync_to_async(render_detail)(product)
+    return TemplateResponse(request, 'store/product_detail.html', {
+        'object': product,
+        'product': product,
+        'product_body': body,
+        'categories': categories,
+    })
+
+
+@conditional_page(category_scope)
+async def category_detail(request, category_id):
+    """Страница категории: async-вариант views.category_detail."""
+    products = Product.objects.filter(category_id=category_id)
+    if request.GET.get('stream'):
+        category, categories = await asyncio.gather(
+            aget_object_or_404(Category, id=category_id),
+            category_navigation(),
+        )
+        context = {'category': category, 'categories': categories}
+        return await stream_category_products(request, context, products)
+
+    category, categories, page = await asyncio.gather(
+        aget_object_or_404(Category, id=category_id),
+        category_navigation(),
+        paginate(request, products.select_related('category'), CATEGORY_PAGE_SIZE),
+    )
+    cards = await sync_to_async(render_cards)(page.object_list)
+    return TemplateResponse(request, 'store/category_detail.html', {
+        'category': category,
+        'categories': categories,
+        'products': page.object_list,
+        'product_cards': cards,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'page_links': pagination_links(request, page),
+    })
+
+
+async def stream_category_products(request, context, products):
+    """Потоковая отдача всех товаров категории через aiterator()."""
+    head, tail = await sync_to_async(stream_frame)(request, context)
+    rows = products.only(*STREAM_FIELDS)
+
+    async def chunks():
+        yield head
+        buffer = []
+        async for product in rows.aiterator(chunk_size=STREAM_CHUNK_SIZE):
+            buffer.append(product)
+            if len(buffer) >= STREAM_CHUNK_SIZE:
+                yield ''.join(await sync_to_async(render_cards)(buffer))
+                buffer = []
+        if buffer:
+            yield ''.join(await sync_to_async(render_cards)(buffer))
+        yield tail
+
+    return StreamingHttpResponse(chunks(), content_type='text/html; charset=utf-8')
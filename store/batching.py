@@ -0,0 +1,148 @@
+"""
+Пакетная отправка событий о новых товарах в Celery.
+
+Вместо log_new_product.delay() на каждый товар ID накапливаются в буфере
+текущего потока и отправляются одной задачей log_new_products:
+
+* при выходе из контекстного менеджера batch_new_products() — сразу;
+* при достижении MAX_BATCH_SIZE — сразу;
+* в конце HTTP-запроса (NewProductBatchMiddleware) — через окно процесса.
+
+Запрос веба обычно создает один товар, поэтому порции запросов собираются в
+общем для процесса окне (после фиксации транзакции запроса) и отправляются
+одной задачей через FLUSH_INTERVAL секунд после первого ID окна или при
+достижении MAX_BATCH_SIZE. Окно локально для процесса: каждый воркер
+веб-сервера отправляет свои задачи. При завершении процесса окно
+отправляется (atexit); ID, накопленные в окне процесса, убитого сигналом,
+теряются — события о новых товарах нужны только для логирования.
+
+Сама отправка идет через store.dispatch.enqueue, то есть после фиксации
+транзакции.
+"""
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .dispatch import enqueue
+from .metrics import counters
+
+MAX_BATCH_SIZE = 500
+FLUSH_INTERVAL = 2.0  # секунды
+
+_state = threading.local()
+
+
+def _buffer():
+    if not hasattr(_state, 'ids'):
+        _state.ids = []
+    return _state
+
+
+def _dispatch(ids):
+    from .tasks import log_new_products
+
+    enqueue(log_new_products, ids)
+    counters.incr('product_events.batches')
+    counters.incr('product_events.dispatched', len(ids))
+
+
+class FlushWindow:
+    """Общее для потоков процесса окно ID, отправляемое одной задачей по таймеру."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = []
+        self._timer = None
+
+    def add(self, ids):
+        with self._lock:
+            self._ids.extend(ids)
+            if len(self._ids) < MAX_BATCH_SIZE and FLUSH_INTERVAL > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            ids = self._take()
+        _dispatch(ids)
+
+    def flush(self):
+        """Отправка окна; возвращает количество отправленных ID."""
+        with self._lock:
+            ids = self._take()
+        if ids:
+            _dispatch(ids)
+        return len(ids)
+
+    def _take(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        ids, self._ids, self._timer = self._ids, [], None
+        return ids
+
+    def __len__(self):
+        return len(self._ids)
+
+
+window = FlushWindow()
+atexit.register(window.flush)
+
+
+def queue_new_product(product_id):
+    """Добавление товара в текущую порцию."""
+    state = _buffer()
+    state.ids.append(product_id)
+    counters.incr('product_events.queued')
+    if len(state.ids) >= MAX_BATCH_SIZE:
+        flush_new_products()
+
+
+def flush_new_products():
+    """Отправка накопленной порции; возвращает количество отправленных ID."""
+    state = _buffer()
+    ids, state.ids = state.ids, []
+    if not ids:
+        return 0
+    _dispatch(ids)
+    return len(ids)
+
+
+def defer_new_products(using=DEFAULT_DB_ALIAS):
+    """
+    Перенос накопленной порции в окно процесса после фиксации транзакции.
+
+    Returns:
+        количество перенесенных ID (при откате транзакции они отбрасываются)
+    """
+    state = _buffer()
+    ids, state.ids = state.ids, []
+    if ids:
+        transaction.on_commit(partial(window.add, ids), using=using)
+    return len(ids)
+
+
+def flush_window():
+    """Немедленная отправка окна процесса (завершение процесса, тесты)."""
+    return window.flush()
+
+
+def discard_new_products():
+    """Сброс порции без отправки (например, после отката транзакции)."""
+    _buffer().ids = []
+
+
+@contextmanager
+def batch_new_products():
+    """Накопление событий внутри блока и одна отправка при выходе."""
+    try:
+        yield
+    finally:
+        flush_new_products()
+
+
+def get_metrics():
+    """Счетчики событий: поставлено в очередь, отправлено, количество задач."""
+    return counters.snapshot('product_events.')
@@ -0,0 +1,131 @@
+"""
+Сохранение результатов бенчмарков и сравнение с базовой линией.
+
+Результаты пишутся в JSON: метаданные окружения и строки каждого
+сценария. Для сравнения строки разворачиваются в плоский словарь
+``сценарий[параметры].путь.метрика -> значение``; параметры — нечисловые
+метрики строки (size, query, format, ...). Сравниваются только метрики,
+устойчивые к выбросам (медиана, p99, пропускная способность, память).
+"""
+import json
+import platform
+import sys
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+# Суффикс метрики -> True, если большее значение лучше.
+REGRESSION_METRICS = {
+    'median_ms': False,
+    'p99_ms': False,
+    'peak_kib': False,
+    'per_sec': True,
+    'rps': True,
+}
+# Суффиксы значений, которые являются замерами, а не параметрами строки.
+MEASUREMENT_SUFFIXES = ('_ms', '_sec', '_kib', '_mib', 'rps', 'speedup', 'queries', 'errors')
+# Изменения времени меньше этого порога (мс) считаются шумом.
+MIN_DELTA_MS = 0.5
+
+
+def environment():
+    return {
+        'created': timezone.now().isoformat(),
+        'python': sys.version.split()[0],
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'database': connection.vendor,
+        'database_profile': getattr(settings, 'DATABASE_PROFILE', 'development'),
+    }
+
+
+def save_results(path, scenarios, **meta):
+    """Запись результатов {сценарий: строки} в JSON-файл."""
+    document = {'meta': {**environment(), **meta}, 'scenarios': scenarios}
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(document, fh, ensure_ascii=False, indent=2, default=str)
+    return document
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def _is_measurement(key, value):
+    return isinstance(value, dict) or key.endswith(MEASUREMENT_SUFFIXES)
+
+
+def _flatten_value(prefix, value, metrics):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten_value(f'{prefix}.{key}', item, metrics)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        metrics[prefix] = value
+
+
+def flatten(scenarios):
+    """{сценарий: строки} -> {'сценарий[параметры].путь.метрика': число}."""
+    metrics = {}
+    for name, rows in scenarios.items():
+        for row in rows:
+            params = ','.join(
+                f'{key}={value}' for key, value in row.items()
+                if not _is_measurement(key, value)
+            )
+            for key, value in row.items():
+                if _is_measurement(key, value):
+                    _flatten_value(f'{name}[{params}].{key}', value, metrics)
+    return metrics
+
+
+def _direction(key):
+    for suffix, higher_is_better in REGRESSION_METRICS.items():
+        if key.endswith(suffix):
+            return higher_is_better
+    return None
+
+
+class Regression:
+    """Ухудшение одной метрики относительно базовой линии."""
+
+    def __init__(self, key, baseline, current):
+        self.key = key
+        self.baseline = baseline
+        self.current = current
+
+    @property
+    def change(self):
+        """Относительное изменение (0.3 — на 30% больше базового значения)."""
+        return (self.current - self.baseline) / self.baseline
+
+    def __str__(self):
+        return f'{self.key}: {self.baseline} -> {self.current} ({self.change:+.1%})'
+
+
+def compare(current, baseline, max_regression=0.2):
+    """
+    Метрики current, ухудшившиеся относительно baseline больше чем на max_regression.
+
+    Args:
+        current, baseline: {сценарий: строки} или документы save_results()
+
+    Returns:
+        список Regression, отсортированный по величине ухудшения
+    """
+    current = flatten(current.get('scenarios', current))
+    baseline = flatten(baseline.get('scenarios', baseline))
+    regressions = []
+    for key, value in current.items():
+        higher_is_better = _direction(key)
+        base = baseline.get(key)
+        if higher_is_better is None or not base:
+            continue
+        if key.endswith('_ms') and abs(value - base) < MIN_DELTA_MS:
+            continue
+        change = (value - base) / base
+        if (-change if higher_is_better else change) > max_regression:
+            regressions.append(Regression(key, base, value))
+    return sorted(regressions, key=lambda r: abs(r.change), reverse=True)
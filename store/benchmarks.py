@@ -0,0 +1,764 @@
+"""
+Бенчмарки производительности приложения store.
+
+Сценарии регистрируются декоратором ``@scenario`` и запускаются командой
+``python manage.py benchmark <сценарий>``. Данные создает генератор
+каталога (store.generator) внутри транзакции, которая откатывается по
+завершении, поэтому рабочая база не засоряется.
+"""
+import csv
+import logging
+import math
+import os
+import resource
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import OperationalError, connection, transaction
+from django.db.models import Count, F, Max
+from django.shortcuts import render
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from . import rollups, search, tasks
+from .admin import PriceRangeFilter, ProductAdmin
+from .counters import recount_categories
+from .export import export_queryset, iter_export
+from .fragments import invalidate_fragments, render_cards
+from .generator import CatalogGenerator
+from .importing import import_file
+from .loadtest import run_asgi, run_wsgi
+from .logs import JsonFormatter, QueueFileHandler
+from .models import Category, CategoryDailyStats, Product
+from .pagination import CURSOR_ORDERING, CursorPaginator, encode_cursor
+from .repricing import Repricer, RepricingRule
+from .sqlite import is_locked_error, pragma_values
+from .tasks import log_new_product, log_new_products
+from .views import CATEGORY_PAGE_SIZE, ProductListView, category_detail
+
+SCENARIOS = {}
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def scenario(name):
+    """Регистрация функции-сценария под именем name."""
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+class Rollback(Exception):
+    """Служебное исключение для отката транзакции бенчмарка."""
+
+
+@contextmanager
+def isolated():
+    """Выполнение бенчмарка в транзакции, которая всегда откатывается."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def measure(func, repeat=5):
+    """Время выполнения func в миллисекундах: min/median/max по repeat запускам."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+def measure_memory(func):
+    """Пиковое потребление памяти Python при выполнении func, КиБ."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def seed_products(total, categories=20, seed=0, batch_size=5000):
+    """
+    Догенерация синтетического каталога до total товаров (store.generator).
+
+    Возвращает список категорий генератора; самые большие — первые.
+    """
+    generator = CatalogGenerator(
+        categories=categories, seed=seed, batch_size=batch_size, prefix='bench',
+    )
+    existing = Product.objects.count()
+    if existing < total:
+        generator.generate(total - existing, offset=existing)
+    return generator.ensure_categories()
+
+
+@scenario('search')
+def bench_search(sizes=DEFAULT_SIZES, repeat=5, **options):
+    """Полнотекстовый поиск против icontains на первой странице выдачи."""
+    results = []
+    fallback = search.IcontainsBackend()
+    with isolated():
+        for size in sizes:
+            seed_products(size)
+            base = Product.objects.select_related('category')
+            for query in ('смартфон', 'ноут', 'python django'):
+                results.append({
+                    'size': size,
+                    'query': query,
+                    'index': measure(
+                        lambda: list(search.search_products(base, query)[:12]), repeat
+                    ),
+                    'icontains': measure(
+                        lambda: list(fallback.search(base, query)[:12]), repeat
+                    ),
+                })
+    return results
+
+
+@scenario('pagination')
+def bench_pagination(sizes=DEFAULT_SIZES, repeat=5, **options):
+    """Страница 1 против страницы 5000: OFFSET-пагинация и курсорная."""
+    per_page = 12
+    deep_page = 5000
+    results = []
+    with isolated():
+        for size in sizes:
+            seed_products(size)
+            queryset = Product.objects.select_related('category')
+            page = min(deep_page, max(1, size // per_page))
+            anchor = queryset.order_by(*CURSOR_ORDERING)[(page - 1) * per_page - 1] if page > 1 else None
+            cursor = encode_cursor(anchor) if anchor else None
+
+            def offset_page(number):
+                paginator = Paginator(queryset, per_page)
+                return list(paginator.page(number).object_list)
+
+            results.append({
+                'size': size,
+                'page': page,
+                'offset_first': measure(lambda: offset_page(1), repeat),
+                'offset_deep': measure(lambda: offset_page(page), repeat),
+                'cursor_first': measure(
+                    lambda: list(CursorPaginator(queryset, per_page).page()), repeat
+                ),
+                'cursor_deep': measure(
+                    lambda: list(CursorPaginator(queryset, per_page).page(cursor)), repeat
+                ),
+            })
+    return results
+
+
+@scenario('category_page')
+def bench_category_page(sizes=DEFAULT_SIZES, repeat=5, **options):
+    """Страница самой большой категории: без ограничений, постранично и потоком."""
+    factory = RequestFactory()
+    results = []
+    with isolated():
+        for size in sizes:
+            seed_products(size)
+            category = Category.objects.annotate(total=Count('products')).order_by('-total')[0]
+            url = f'/category/{category.pk}/'
+
+            def unbounded():
+                # Прежнее поведение: все товары категории в одном ответе, карточки
+                # рендерятся так же, как на странице и в потоке (render_cards).
+                products = list(Product.objects.filter(category=category).select_related('category'))
+                render(factory.get(url), 'store/category_detail.html',
+                       {'category': category, 'products': products,
+                        'product_cards': render_cards(products)})
+
+            def paginated():
+                category_detail(factory.get(url, {'page': 2}), category.pk)
+
+            def streamed():
+                response = category_detail(factory.get(url, {'stream': 1}), category.pk)
+                for _ in response.streaming_content:
+                    pass
+
+            row = {'size': size, 'category_size': category.total}
+            for name, func in (('unbounded', unbounded), ('paginated', paginated),
+                               ('streamed', streamed)):
+                row[name] = measure(func, repeat)
+                row[name]['peak_kib'] = measure_memory(func)
+            results.append(row)
+    return results
+
+
+def write_import_file(path, rows, seed=0):
+    """CSV-файл для импорта с rows синтетическими товарами (store.generator)."""
+    generator = CatalogGenerator(categories=50, seed=seed, prefix='import')
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(['name', 'description', 'price', 'category', 'created_at'])
+        for row in generator.rows(rows):
+            writer.writerow([
+                row['name'], row['description'], row['price'], row['category'],
+                row['created_at'].isoformat(),
+            ])
+
+
+def import_row_by_row(path):
+    """Прежний подход create_data: get_or_create категории и товара на каждую строку."""
+    with open(path, encoding='utf-8', newline='') as fh:
+        for row in csv.DictReader(fh):
+            category, _ = Category.objects.get_or_create(name=row['category'])
+            Product.objects.get_or_create(
+                name=row['name'],
+                defaults={'description': row['description'], 'price': Decimal(row['price']),
+                          'category': category},
+            )
+
+
+@scenario('import')
+def bench_import(sizes=DEFAULT_SIZES, repeat=1, row_by_row_limit=20_000, **options):
+    """Скорость импорта (строк/с): bulk_create порциями против построчного get_or_create."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f'products-{size}.csv')
+            write_import_file(path, size)
+            row = {'size': size}
+
+            with isolated():
+                started = time.perf_counter()
+                import_file(path)
+                row['bulk_rows_per_sec'] = round(size / (time.perf_counter() - started))
+
+            # Построчный импорт слишком медленный для больших файлов — замер на префиксе.
+            sample = min(size, row_by_row_limit)
+            sample_path = os.path.join(tmp, f'sample-{sample}.csv')
+            write_import_file(sample_path, sample)
+            with isolated():
+                started = time.perf_counter()
+                import_row_by_row(sample_path)
+                row['row_by_row_rows_per_sec'] = round(sample / (time.perf_counter() - started))
+            row['speedup'] = round(row['bulk_rows_per_sec'] / row['row_by_row_rows_per_sec'], 1)
+            results.append(row)
+    return results
+
+
+def peak_rss_mib():
+    """Пиковый RSS процесса (МиБ; на Linux ru_maxrss в КиБ)."""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+@scenario('export')
+def bench_export(sizes=DEFAULT_SIZES, repeat=1, **options):
+    """Пропускная способность потокового экспорта и пиковая память."""
+    results = []
+    with isolated():
+        for size in sizes:
+            seed_products(size)
+            for fmt, compress in (('csv', False), ('jsonl', False), ('csv', True)):
+                state = {}
+
+                def run():
+                    state['bytes'] = sum(
+                        len(chunk) for chunk in iter_export(export_queryset(), fmt, compress)
+                    )
+
+                # Время без tracemalloc, память — отдельным прогоном.
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                results.append({
+                    'size': size,
+                    'format': fmt + ('.gz' if compress else ''),
+                    'rows_per_sec': round(size / elapsed),
+                    'mib_per_sec': round(state['bytes'] / elapsed / 2 ** 20, 2),
+                    'python_peak_kib': measure_memory(run),
+                    'process_peak_rss_mib': peak_rss_mib(),
+                })
+    return results
+
+
+@contextmanager
+def quiet_loggers(*names):
+    """Отключение логгеров на время замера (иначе замеряется вывод в консоль)."""
+    loggers = [logging.getLogger(name) for name in names]
+    previous = [logger.disabled for logger in loggers]
+    for logger in loggers:
+        logger.disabled = True
+    try:
+        yield
+    finally:
+        for logger, disabled in zip(loggers, previous):
+            logger.disabled = disabled
+
+
+@scenario('task_ingest')
+def bench_task_ingest(sizes=(1000, 10_000), repeat=1, batch_size=500, **options):
+    """Логирование новых товаров: задача на товар против пакетных задач (eager)."""
+    results = []
+    with isolated(), quiet_loggers('store.tasks', 'celery.app.trace'):
+        for size in sizes:
+            seed_products(size)
+            ids = list(Product.objects.order_by('-id').values_list('id', flat=True)[:size])
+            row = {'size': size, 'batch_size': batch_size}
+            for mode in ('per_item', 'batched'):
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    if mode == 'per_item':
+                        for product_id in ids:
+                            log_new_product.apply(args=[product_id])
+                        tasks = len(ids)
+                    else:
+                        tasks = 0
+                        for start in range(0, len(ids), batch_size):
+                            log_new_products.apply(args=[ids[start:start + batch_size]])
+                            tasks += 1
+                    elapsed = time.perf_counter() - started
+                row[mode] = {
+                    'tasks': tasks,
+                    'queries': len(ctx.captured_queries),
+                    'products_per_sec': round(len(ids) / elapsed),
+                }
+            results.append(row)
+    return results
+
+
+def _banner_log(product):
+    """Прежний формат лога задачи: десять строк-«баннер» на товар."""
+    logger = tasks.logger
+    logger.info("=" * 70)
+    logger.info("НОВЫЙ ТОВАР ДОБАВЛЕН В МАГАЗИН")
+    logger.info("=" * 70)
+    logger.info(f"ID товара: {product.id}")
+    logger.info(f"Название: {product.name}")
+    logger.info(f"Категория: {product.category.name}")
+    logger.info(f"Цена: {product.price} руб.")
+    logger.info(f"Дата создания: {product.created_at}")
+    logger.info("=" * 70)
+    logger.info(f"Задача выполнена успешно для товара '{product.name}'")
+
+
+@contextmanager
+def logging_to(handler, logger_name='store.tasks'):
+    """Временная замена обработчиков логгера на handler."""
+    logger = logging.getLogger(logger_name)
+    previous = logger.handlers[:]
+    logger.handlers = [handler]
+    try:
+        yield handler
+    finally:
+        logger.handlers = previous
+        handler.close()
+
+
+@scenario('task_logging')
+def bench_task_logging(sizes=(5000,), repeat=1, **options):
+    """
+    log_new_product (eager) с разными обработчиками лога store.tasks:
+    прежние десять строк через FileHandler, одна JSON-запись через
+    FileHandler и через очередь (QueueFileHandler). drain_ms — ожидание
+    записи остатка очереди на диск после последней задачи.
+    """
+    verbose = logging.Formatter('{levelname} {asctime} {module} {message}', style='{')
+    variants = {
+        'banner_file': (lambda path: logging.FileHandler(path, encoding='utf-8'), verbose, True),
+        'json_file': (lambda path: logging.FileHandler(path, encoding='utf-8'), JsonFormatter(), False),
+        'json_queue': (QueueFileHandler, JsonFormatter(), False),
+    }
+    results = []
+    with isolated(), tempfile.TemporaryDirectory() as tmp, \
+            quiet_loggers('store.queries', 'celery.app.trace'):
+        for size in sizes:
+            seed_products(size)
+            ids = list(Product.objects.order_by('-id').values_list('id', flat=True)[:size])
+            row = {'size': size}
+            for name, (factory, formatter, banner) in variants.items():
+                path = os.path.join(tmp, f'{name}-{size}.log')
+                handler = factory(path)
+                handler.setFormatter(formatter)
+                patch = mock.patch.object(tasks, '_log_product', _banner_log) if banner \
+                    else nullcontext()
+                with logging_to(handler), patch:
+                    started = time.perf_counter()
+                    for product_id in ids:
+                        log_new_product.apply(args=[product_id])
+                    elapsed = time.perf_counter() - started
+                    handler.flush()
+                    drained = time.perf_counter() - started - elapsed
+                with open(path, encoding='utf-8') as fh:
+                    lines = sum(1 for _ in fh)
+                row[name] = {
+                    'tasks_per_sec': round(len(ids) / elapsed),
+                    'drain_ms': round(drained * 1000, 1),
+                    'lines': lines,
+                }
+            results.append(row)
+    return results
+
+
+@scenario('fragments')
+def bench_fragments(sizes=(10_000,), repeat=5, **options):
+    """
+    Рендер страниц из кеша фрагментов: 12 карточек главной и вся категория.
+
+    Все товары генерируются в одной категории, поэтому потоковая страница
+    категории содержит size карточек. cold — кеш фрагментов сброшен перед
+    каждым запуском, warm — все карточки уже в кеше.
+    """
+    factory = RequestFactory()
+    index = ProductListView.as_view()
+    results = []
+    with isolated():
+        for size in sizes:
+            category = seed_products(size, categories=1)[0]
+            card_count = Product.objects.filter(category=category).count()
+
+            def index_page():
+                index(factory.get('/')).render()
+
+            def category_page():
+                response = category_detail(factory.get('/', {'stream': 1}), category.pk)
+                for _ in response.streaming_content:
+                    pass
+
+            row = {'size': size}
+            for name, cards, func in (('index', 12, index_page),
+                                      ('category_stream', card_count, category_page)):
+                def cold():
+                    invalidate_fragments()
+                    func()
+
+                func()
+                row[name] = {
+                    'cards': cards,
+                    'cold': measure(cold, repeat),
+                    'warm': measure(func, repeat),
+                }
+            results.append(row)
+    return results
+
+
+@contextmanager
+def committed_catalog(total):
+    """
+    Каталог из total товаров, зафиксированный в БД.
+
+    Нужен, когда запросы выполняются в других потоках со своими соединениями
+    и не видят данные из транзакции isolated(). Созданные товары и категории
+    удаляются по завершении.
+    """
+    last_id = Product.objects.aggregate(last=Max('pk'))['last'] or 0
+    existing = set(Category.objects.values_list('pk', flat=True))
+    seed_products(total)
+    recount_categories()
+    try:
+        yield
+    finally:
+        Product.objects.filter(pk__gt=last_id).delete()
+        Category.objects.exclude(pk__in=existing).delete()
+
+
+@scenario('asgi')
+def bench_asgi(sizes=(10_000,), repeat=1, concurrency=(10, 100), requests=1000, **options):
+    """
+    Страницы каталога под WSGI (синхронные представления в пуле потоков)
+    и ASGI (async-представления в event loop): запросы в секунду и p99.
+    """
+    results = []
+    with quiet_loggers('store.queries', 'django.request'):
+        for size in sizes:
+            with committed_catalog(size):
+                category = Category.objects.order_by('-product_count').first()
+                products = Product.objects.values_list('pk', flat=True)[:20]
+                paths = ['/', '/?page=5', '/?search=смартфон', f'/category/{category.pk}/'] + [
+                    f'/product/{pk}/' for pk in products
+                ]
+                for workers in concurrency:
+                    row = {'size': size, 'concurrency': workers}
+                    for name, run in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+                        run(paths, len(paths), 1)  # прогрев кешей
+                        row[name] = run(paths, requests, workers)
+                    results.append(row)
+    return results
+
+
+def _page(total, per_page, page):
+    """Номер страницы page, но не дальше последней (для маленьких каталогов)."""
+    return max(1, min(page, math.ceil(total / per_page)))
+
+
+def _measure_cases(cases, repeat):
+    """measure() для словаря {имя: функция} с прогревом кешей перед замером."""
+    row = {}
+    for name, func in cases.items():
+        func()
+        row[name] = measure(func, repeat)
+    return row
+
+
+@scenario('views')
+def bench_views(sizes=DEFAULT_SIZES, repeat=5, **options):
+    """
+    Страницы каталога через представления (RequestFactory, без middleware):
+    список, глубокая страница, поиск, фильтры, страница самой большой
+    категории. Кеши фрагментов, фасетов и навигации прогреты.
+    """
+    factory = RequestFactory()
+    index = ProductListView.as_view()
+    results = []
+    with isolated():
+        for size in sizes:
+            category = seed_products(size)[0]
+            category_size = category.products.count()
+
+            def list_page(**params):
+                return lambda: index(factory.get('/', params)).render()
+
+            row = {'size': size}
+            row.update(_measure_cases({
+                'list': list_page(),
+                'list_page_20': list_page(page=_page(size, ProductListView.paginate_by, 20)),
+                'search': list_page(search='смартфон'),
+                'filter': list_page(category=category.pk, price='1000-5000'),
+                'search_filter': list_page(search='ноут', price='5000-20000'),
+                'category_detail': lambda: category_detail(factory.get('/'), category.pk),
+                'category_detail_page_10': lambda: category_detail(
+                    factory.get('/', {'page': _page(category_size, CATEGORY_PAGE_SIZE, 10)}),
+                    category.pk,
+                ),
+            }, repeat))
+            results.append(row)
+    return results
+
+
+def _changelist(model_admin, user, **params):
+    """Функция, рендерящая список model_admin с параметрами params."""
+    factory = RequestFactory()
+
+    def run():
+        request = factory.get('/', params)
+        request.user = user
+        model_admin.changelist_view(request).render()
+    return run
+
+
+@scenario('admin')
+def bench_admin(sizes=DEFAULT_SIZES, repeat=5, **options):
+    """
+    Списки ProductAdmin, CategoryAdmin и дашборд статистики каталога: без
+    параметров, поиск, фильтры. Сводка статистики обновлена перед замером.
+    """
+    product_admin = admin.site._registry[Product]
+    category_admin = admin.site._registry[Category]
+    stats_admin = admin.site._registry[CategoryDailyStats]
+    results = []
+    with isolated():
+        user = get_user_model().objects.create_superuser('bench-admin', password=None)
+        for size in sizes:
+            category = seed_products(size)[0]
+            rollups.refresh()
+            year = Product.objects.order_by('-created_at').values_list('created_at__year', flat=True)[0]
+
+            def changelist(model_admin, **params):
+                return _changelist(model_admin, user, **params)
+
+            row = {'size': size}
+            row.update(_measure_cases({
+                'products': changelist(product_admin),
+                'products_search': changelist(product_admin, q='смартфон'),
+                'products_filter': changelist(
+                    product_admin, category__id__exact=category.pk, price_range='1000-5000',
+                ),
+                'products_year': changelist(product_admin, created_at__year=year),
+                'products_page_50': changelist(
+                    product_admin, p=_page(size, product_admin.list_per_page, 50),
+                ),
+                'categories': changelist(category_admin),
+                'categories_search': changelist(category_admin, q='смартфон'),
+                'catalog_stats': changelist(stats_admin),
+                'catalog_stats_year': changelist(stats_admin, day__year=year),
+            }, repeat))
+            results.append(row)
+    return results
+
+
+class DefaultProductAdmin(ProductAdmin):
+    """
+    ProductAdmin с поведением Django по умолчанию: точный COUNT(*) дважды,
+    все категории в фильтре и в каждой строке list_editable, date_hierarchy
+    по таблице товаров.
+    """
+    list_filter = ('category', 'created_at', PriceRangeFilter)
+    autocomplete_fields = ()
+    show_full_result_count = True
+    change_list_template = 'admin/change_list.html'
+
+    @property
+    def media(self):
+        return admin.ModelAdmin.media.fget(self)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        return admin.ModelAdmin.formfield_for_foreignkey(self, db_field, request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return Paginator(queryset, per_page, orphans, allow_empty_first_page)
+
+
+@scenario('changelist')
+def bench_changelist(sizes=(1_000_000,), repeat=5, **options):
+    """
+    Загрузка списка товаров в админке: настройки Django по умолчанию
+    (DefaultProductAdmin) против режима производительности ProductAdmin —
+    оценка количества, автодополнение категорий, date_hierarchy по сводке.
+    Для каждого режима — время и число запросов к БД.
+    """
+    modes = {
+        'default': DefaultProductAdmin(Product, admin.site),
+        'performance': admin.site._registry[Product],
+    }
+    results = []
+    with isolated():
+        user = get_user_model().objects.create_superuser('bench-admin', password=None)
+        for size in sizes:
+            category = seed_products(size)[0]
+            rollups.refresh()
+            year = Product.objects.order_by('-created_at').values_list('created_at__year', flat=True)[0]
+            for mode, model_admin in modes.items():
+                def changelist(**params):
+                    return _changelist(model_admin, user, **params)
+
+                with CaptureQueriesContext(connection) as queries:
+                    changelist()()
+                row = {'size': size, 'mode': mode, 'queries': len(queries)}
+                row.update(_measure_cases({
+                    'products': changelist(),
+                    'products_category': changelist(category__id__exact=category.pk),
+                    'products_year': changelist(created_at__year=year),
+                    'products_page_50': changelist(p=_page(size, model_admin.list_per_page, 50)),
+                }, repeat))
+                results.append(row)
+    return results
+
+
+@scenario('bulk')
+def bench_bulk(sizes=DEFAULT_SIZES, repeat=5, batch=1000, **options):
+    """
+    Массовые операции: вставка порции, update() и переоценка самой большой
+    категории, пересчет счетчиков и переиндексация категории.
+    """
+    results = []
+    with isolated():
+        for size in sizes:
+            categories = seed_products(size)
+            category = categories[0]
+            generator = CatalogGenerator(categories=len(categories), prefix='bench')
+            category_ids = [c.pk for c in categories]
+            offsets = iter(range(size, size + batch * (repeat + 1) * 10, batch))
+            products = Product.objects.filter(category=category)
+
+            row = {'size': size, 'batch': batch, 'category_size': products.count()}
+            row.update(_measure_cases({
+                'bulk_create': lambda: generator.insert_batch(next(offsets), batch, category_ids),
+                'update_category': lambda: products.update(price=F('price')),
+                'reprice_category': lambda: Repricer(
+                    [RepricingRule(category_id=category.pk, amount='0.01')]
+                ).run(),
+                'recount_categories': recount_categories,
+                'reindex_category': lambda: search.index_category(category.pk),
+                'rebuild_catalog_stats': rollups.rebuild,
+            }, repeat))
+            results.append(row)
+    return results
+
+
+def _run_writer(work, stop, report):
+    """Повтор work() до stop; work возвращает число записанных строк."""
+    operations = rows = locked = 0
+    started = time.perf_counter()
+    try:
+        while not stop.is_set():
+            try:
+                rows += work()
+                operations += 1
+            except OperationalError as e:
+                if not is_locked_error(e):
+                    raise
+                locked += 1
+    finally:
+        connection.close()
+    elapsed = time.perf_counter() - started
+    report.update(
+        operations=operations, rows_per_sec=round(rows / elapsed, 1), locked_errors=locked,
+    )
+
+
+@scenario('sqlite_concurrency')
+def bench_sqlite_concurrency(sizes=(10_000,), repeat=1, concurrency=(4,), requests=500,
+                             import_rows=500, **options):
+    """
+    Одновременная запись и чтение: импорт порциями и переоценка в отдельных
+    потоках, пока concurrency потоков читают страницы каталога через
+    WSGIHandler. Пропускная способность и ошибки «database is locked» для
+    текущего профиля БД (DATABASE_PROFILE); запускается на файле БД.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, quiet_loggers('store.queries', 'django.request'):
+        path = os.path.join(tmp, 'concurrent-import.csv')
+        write_import_file(path, import_rows)
+        signs = iter(range(10 ** 9))
+
+        def import_batch():
+            return import_file(path, batch_size=100).created
+
+        def reprice():
+            amount = 1 if next(signs) % 2 == 0 else -1
+            return Repricer([RepricingRule(amount=amount)], chunk_size=500).run().updated
+
+        for size in sizes:
+            with committed_catalog(size):
+                category = Category.objects.order_by('-product_count').first()
+                products = Product.objects.values_list('pk', flat=True)[:20]
+                paths = ['/', '/?page=5', '/?search=смартфон', f'/category/{category.pk}/'] + [
+                    f'/product/{pk}/' for pk in products
+                ]
+                run_wsgi(paths, len(paths), 1)  # прогрев кешей
+                for workers in concurrency:
+                    stop = threading.Event()
+                    writers = {'import': {}, 'reprice': {}}
+                    threads = [
+                        threading.Thread(target=_run_writer, args=(work, stop, writers[name]))
+                        for name, work in (('import', import_batch), ('reprice', reprice))
+                    ]
+                    for thread in threads:
+                        thread.start()
+                    try:
+                        readers = run_wsgi(paths, requests, workers)
+                    finally:
+                        stop.set()
+                        for thread in threads:
+                            thread.join()
+                    results.append({
+                        'size': size,
+                        'concurrency': workers,
+                        'profile': getattr(settings, 'DATABASE_PROFILE', 'development'),
+                        **pragma_values(names=('journal_mode', 'synchronous')),
+                        'readers': readers,
+                        **writers,
+                    })
+    return results
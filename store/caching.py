@@ -0,0 +1,54 @@
+"""
+Версионированные ключи кеша приложения store.
+
+Вместо удаления закешированных данных при изменениях увеличивается номер
+версии пространства имен; ключи со старой версией просто перестают
+использоваться и вытесняются кешем сами.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_cache():
+    """Кеш-бэкенд приложения (settings.STORE_CACHE_ALIAS, по умолчанию default)."""
+    return caches[getattr(settings, 'STORE_CACHE_ALIAS', 'default')]
+
+
+def _version_key(namespace):
+    return f'store:version:{namespace}'
+
+
+def _initial_version():
+    # После вытеснения ключа версии новая версия не должна совпасть со старой.
+    return time.time_ns()
+
+
+def get_version(namespace):
+    """Текущая версия пространства имен."""
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Инвалидация всех ключей пространства имен."""
+    cache = get_cache()
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def versioned_key(namespace, *parts):
+    """Ключ кеша с текущей версией пространства имен."""
+    suffix = ':'.join(str(part) for part in parts)
+    return f'store:{namespace}:{get_version(namespace)}:{suffix}'
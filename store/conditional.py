@@ -0,0 +1,199 @@
+"""
+Условные GET (ETag/Last-Modified) и кеш страниц каталога.
+
+Перед вызовом представления одним запросом считается «водяной знак»
+каталога: последняя дата изменения товаров, от которых зависит страница,
+последняя дата изменения категорий (она меняется вместе со счетчиком
+товаров, см. store.counters) и общее количество категорий и товаров.
+Если клиент прислал тот же ETag или дату не старше Last-Modified, сразу
+возвращается 304 без рендера шаблона.
+
+При settings.STORE_PAGE_CACHE страницы для анонимных пользователей
+кешируются целиком. Водяной знак входит в ключ, поэтому любое изменение
+товаров или категорий делает закешированную страницу недоступной.
+
+Счетчики (store.metrics, префикс ``pages.``): not_modified, hit, miss.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db.models import Count, Max, Subquery, Sum
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .caching import bump_version, get_cache, versioned_key
+from .metrics import counters
+from .models import Category
+
+NAMESPACE = 'pages'
+
+
+def _watermark_aggregates(products):
+    latest = products.order_by('-updated_at').values('updated_at')[:1]
+    return {
+        'categories_changed': Max('updated_at'),
+        'categories': Count('pk'),
+        'products': Sum('product_count'),
+        'products_changed': Max(Subquery(latest)),
+    }
+
+
+def _watermark(row):
+    dates = [row['categories_changed'], row['products_changed']]
+    dates = [date for date in dates if date is not None]
+    token = ':'.join(str(row[key]) for key in sorted(row))
+    return (max(dates) if dates else None), token
+
+
+def catalog_watermark(products):
+    """
+    Водяной знак страницы, зависящей от товаров products.
+
+    Returns:
+        (last_modified, token): datetime последнего изменения (None для
+        пустого каталога) и строка, меняющаяся при любых изменениях
+    """
+    row = Category.objects.order_by().aggregate(**_watermark_aggregates(products))
+    return _watermark(row)
+
+
+async def acatalog_watermark(products):
+    """Async-вариант catalog_watermark()."""
+    row = await Category.objects.order_by().aaggregate(**_watermark_aggregates(products))
+    return _watermark(row)
+
+
+def _has_pending_messages(request):
+    # Сообщения django.contrib.messages показываются один раз — такие
+    # страницы нельзя ни отдавать из кеша, ни подтверждать через 304.
+    return CookieStorage.cookie_name in request.COOKIES
+
+
+def _is_anonymous(request):
+    user = getattr(request, 'user', None)
+    return user is None or not user.is_authenticated
+
+
+def _is_conditional(request):
+    return request.method in ('GET', 'HEAD') and not _has_pending_messages(request)
+
+
+class _ConditionalPage:
+    """Проверки условного GET и кеш одной страницы по её водяному знаку."""
+
+    def __init__(self, request, last_modified, token):
+        self.request = request
+        self.digest = hashlib.sha1(f'{token}:{request.get_full_path()}'.encode()).hexdigest()
+        self.etag = quote_etag(self.digest)
+        self.timestamp = int(last_modified.timestamp())
+        self.cache_key = None
+        if getattr(settings, 'STORE_PAGE_CACHE', False) and _is_anonymous(request):
+            self.cache_key = versioned_key(NAMESPACE, self.digest)
+
+    def not_modified(self):
+        """Ответ 304 (или 412), если у клиента актуальная страница."""
+        response = get_conditional_response(
+            self.request, etag=self.etag, last_modified=self.timestamp
+        )
+        if response is not None:
+            counters.incr('pages.not_modified')
+        return response
+
+    def cached(self):
+        """Страница из кеша или None."""
+        if self.cache_key is None:
+            return None
+        cached = get_cache().get(self.cache_key)
+        if cached is None:
+            counters.incr('pages.miss')
+            return None
+        counters.incr('pages.hit')
+        content, content_type = cached
+        return self.finish(HttpResponse(content, content_type=content_type))
+
+    def is_cacheable(self, response):
+        return response.status_code == 200 and not response.streaming
+
+    def store(self, response):
+        """Сохранение отрендеренного ответа в кеш и заголовки валидаторов."""
+        if self.cache_key is not None:
+            get_cache().set(
+                self.cache_key,
+                (response.content, response['Content-Type']),
+                getattr(settings, 'STORE_PAGE_CACHE_TIMEOUT', 300),
+            )
+        return self.finish(response)
+
+    def finish(self, response):
+        response['ETag'] = self.etag
+        response['Last-Modified'] = http_date(self.timestamp)
+        # Браузер хранит страницу, но перепроверяет её условным GET.
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+def conditional_page(scope):
+    """
+    Декоратор представления каталога: 304 по ETag/Last-Modified и кеш страниц.
+
+    Поддерживает и синхронные, и async-представления.
+
+    Args:
+        scope: функция (request, *args, **kwargs) -> QuerySet товаров,
+            изменения которых меняют страницу
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapped(request, *args, **kwargs):
+                if not _is_conditional(request):
+                    return await view(request, *args, **kwargs)
+                last_modified, token = await acatalog_watermark(scope(request, *args, **kwargs))
+                if last_modified is None:
+                    return await view(request, *args, **kwargs)
+                # request.user и версия кеша могут обращаться к БД и кешу — в потоке.
+                page = await sync_to_async(_ConditionalPage)(request, last_modified, token)
+                response = page.not_modified() or await sync_to_async(page.cached)()
+                if response is not None:
+                    return response
+                response = await view(request, *args, **kwargs)
+                if not page.is_cacheable(response):
+                    return response
+                if hasattr(response, 'render'):
+                    await sync_to_async(response.render)()
+                return await sync_to_async(page.store)(response)
+            return async_wrapped
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not _is_conditional(request):
+                return view(request, *args, **kwargs)
+            last_modified, token = catalog_watermark(scope(request, *args, **kwargs))
+            if last_modified is None:
+                return view(request, *args, **kwargs)
+            page = _ConditionalPage(request, last_modified, token)
+            response = page.not_modified() or page.cached()
+            if response is not None:
+                return response
+            response = view(request, *args, **kwargs)
+            if not page.is_cacheable(response):
+                return response
+            if hasattr(response, 'render'):
+                response.render()
+            return page.store(response)
+        return wrapped
+    return decorator
+
+
+def invalidate_pages():
+    """Сброс всего кеша страниц (например, после изменения шаблонов)."""
+    bump_version(NAMESPACE)
+
+
+def get_metrics():
+    """Счетчики условных GET и кеша страниц."""
+    return counters.snapshot('pages.')
@@ -0,0 +1,11 @@
+"""
+Контекстные процессоры приложения store.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .navigation import get_category_navigation
+
+
+def category_navigation(request):
+    """Категории для боковой панели; вычисляются, только если шаблон их использует."""
+    return {'categories': SimpleLazyObject(get_category_navigation)}
@@ -0,0 +1,79 @@
+"""
+Денормализованный счетчик товаров Category.product_count.
+
+Счетчик поддерживается обработчиками сигналов атомарными UPDATE с F(),
+для QuerySet.update — adjust_moved_products() по исходным категориям
+порции, а для bulk_create и сверки используется recount_categories(),
+пересчитывающий значения одним GROUP BY запросом.
+"""
+from collections import Counter
+
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Category, Product
+from .navigation import invalidate_category_navigation
+
+
+def adjust_product_count(category_id, delta, using='default'):
+    """Атомарное изменение счетчика категории на delta (и её даты изменения)."""
+    if category_id is None or not delta:
+        return
+    Category.objects.using(using).filter(pk=category_id).update(
+        product_count=F('product_count') + delta, updated_at=timezone.now()
+    )
+
+
+def adjust_moved_products(product_ids, previous, using='default'):
+    """
+    Счетчики после переноса товаров product_ids массовым UPDATE.
+
+    Args:
+        previous: {category_id: количество этих товаров} до UPDATE
+
+    Сравниваются распределения товаров порции до и после, поэтому запрос
+    затрагивает только product_ids, а не всю таблицу товаров.
+    """
+    current = Counter(dict(
+        Product.objects.using(using).filter(pk__in=list(product_ids)).order_by()
+        .values('category_id').annotate(total=Count('id'))
+        .values_list('category_id', 'total')
+    ))
+    current.subtract(previous)
+    for category_id, delta in current.items():
+        adjust_product_count(category_id, delta, using=using)
+    return sum(1 for delta in current.values() if delta)
+
+
+def recount_categories(category_ids=None, using='default'):
+    """
+    Пересчет счетчиков по фактическим данным.
+
+    Возвращает количество исправленных категорий.
+    """
+    products = Product.objects.using(using).order_by()
+    categories = Category.objects.using(using).only('id', 'product_count', 'updated_at')
+    if category_ids is not None:
+        category_ids = list(category_ids)
+        products = products.filter(category_id__in=category_ids)
+        categories = categories.filter(pk__in=category_ids)
+
+    actual = dict(
+        products.values('category_id')
+        .annotate(total=Count('id'))
+        .values_list('category_id', 'total')
+    )
+    changed = []
+    now = timezone.now()
+    for category in categories:
+        total = actual.get(category.pk, 0)
+        if category.product_count != total:
+            category.product_count = total
+            category.updated_at = now
+            changed.append(category)
+    if changed:
+        Category.objects.using(using).bulk_update(
+            changed, ['product_count', 'updated_at'], batch_size=500
+        )
+        invalidate_category_navigation()
+    return len(changed)
@@ -0,0 +1,110 @@
+"""
+Отправка задач Celery после фиксации транзакции.
+
+enqueue() откладывает apply_async до transaction.on_commit, чтобы воркер не
+получил ID строки, которая еще не видна (или будет откачена), и схлопывает
+повторные пары (задача, аргументы) в пределах одной транзакции.
+
+Счетчики (store.metrics, префикс ``dispatch.``):
+
+* requested — вызовы enqueue();
+* enqueued — задачи, фактически отправленные в брокер;
+* coalesced — дубликаты, поглощенные уже ожидающей задачей;
+* dropped — задачи, отброшенные из-за отката транзакции или ошибки брокера.
+"""
+import json
+import logging
+import threading
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .metrics import counters
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def _pending(using):
+    """Ожидающие фиксации задачи текущего потока: ключ -> callback."""
+    if not hasattr(_local, 'pending'):
+        _local.pending = {}
+    return _local.pending.setdefault(using, {})
+
+
+def _task_key(task, args, kwargs):
+    return (task.name, json.dumps([args, kwargs], sort_keys=True, default=str))
+
+
+def _publish(task, args, kwargs):
+    try:
+        task.apply_async(args=args, kwargs=kwargs)
+    except Exception:
+        counters.incr('dispatch.dropped')
+        logger.exception(f'Не удалось отправить задачу {task.name}')
+    else:
+        counters.incr('dispatch.enqueued')
+
+
+def _forget_stale(connection, pending):
+    """
+    Удаление ключей, чьи callbacks уже выполнены или отброшены откатом.
+
+    Отброшенные откатом задачи учитываются как dropped.
+    """
+    if not pending:
+        return
+    registered = {id(entry[1]) for entry in connection.run_on_commit}
+    for key, callback in list(pending.items()):
+        if id(callback) not in registered:
+            del pending[key]
+            if not callback.sent:
+                counters.incr('dispatch.dropped')
+
+
+class _Callback:
+    def __init__(self, pending, key, task, args, kwargs):
+        self.pending = pending
+        self.key = key
+        self.publish = partial(_publish, task, args, kwargs)
+        self.sent = False
+
+    def __call__(self):
+        self.sent = True
+        self.pending.pop(self.key, None)
+        self.publish()
+
+
+def enqueue(task, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Отправка задачи после фиксации текущей транзакции.
+
+    Вне транзакции задача отправляется сразу. Повторный вызов с той же задачей
+    и аргументами внутри той же транзакции не создает вторую задачу.
+
+    Returns:
+        True, если задача поставлена (или отправлена), False — если схлопнута
+    """
+    counters.incr('dispatch.requested')
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        _publish(task, args, kwargs)
+        return True
+
+    pending = _pending(using)
+    _forget_stale(connection, pending)
+    key = _task_key(task, args, kwargs)
+    if key in pending:
+        counters.incr('dispatch.coalesced')
+        return False
+
+    callback = _Callback(pending, key, task, args, kwargs)
+    pending[key] = callback
+    transaction.on_commit(callback, using=using)
+    return True
+
+
+def get_metrics():
+    """Счетчики отправки задач."""
+    return counters.snapshot('dispatch.')
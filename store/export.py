@@ -0,0 +1,100 @@
+"""
+Потоковый экспорт каталога в CSV и JSONL (опционально gzip).
+
+Строки читаются через values_list(...).iterator(), поэтому модели не
+создаются, а в памяти находится не больше одной порции из БД и одного
+выходного буфера.
+"""
+import csv
+import json
+import zlib
+
+from .filters import filter_products
+from .models import Product
+
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+COLUMNS = ('id', 'name', 'description', 'price', 'category', 'created_at')
+FIELDS = ('id', 'name', 'description', 'price', 'category__name', 'created_at')
+
+# Размер порции чтения из БД и выходного буфера.
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: write() возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(params=None):
+    """QuerySet кортежей для экспорта с фильтрами как у ProductListView."""
+    queryset = filter_products(Product.objects.all(), params or {})
+    return queryset.values_list(*FIELDS)
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _jsonl_lines(rows):
+    for row in rows:
+        record = dict(zip(COLUMNS, row))
+        record['price'] = str(record['price'])
+        record['created_at'] = record['created_at'].isoformat()
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _buffered(lines, size=BUFFER_SIZE):
+    """Склейка строк в куски примерно по size байт."""
+    buffer = []
+    length = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31 — формат gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_export(queryset, fmt='csv', compress=False, chunk_size=CHUNK_SIZE):
+    """
+    Генератор байтовых кусков экспорта.
+
+    Args:
+        queryset: результат export_queryset()
+        fmt: 'csv' или 'jsonl'
+        compress: сжимать ли поток gzip
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Неизвестный формат: {fmt}')
+    rows = queryset.iterator(chunk_size=chunk_size)
+    lines = _csv_lines(rows) if fmt == 'csv' else _jsonl_lines(rows)
+    chunks = _buffered(lines)
+    return _gzipped(chunks) if compress else chunks
+
+
+def export_filename(fmt, compress=False):
+    return f'products.{fmt}' + ('.gz' if compress else '')
@@ -0,0 +1,99 @@
+"""
+Фасеты каталога: количество товаров по ценовым диапазонам и категориям.
+
+Все счетчики считаются одним агрегирующим запросом с условными
+Count(filter=...) и кешируются по набору активных фильтров. Кеш
+инвалидируется сменой версии ``facets`` при любых изменениях товаров.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.db.models import Count, Q
+
+from .caching import bump_version, get_cache, versioned_key
+from .navigation import get_category_navigation
+
+NAMESPACE = 'facets'
+
+# (ключ, подпись, нижняя граница включительно, верхняя граница не включительно)
+PRICE_BUCKETS = (
+    ('0-1000', 'До 1 000 ₽', None, Decimal('1000.00')),
+    ('1000-5000', '1 000 - 5 000 ₽', Decimal('1000.00'), Decimal('5000.00')),
+    ('5000-20000', '5 000 - 20 000 ₽', Decimal('5000.00'), Decimal('20000.00')),
+    ('20000+', 'Свыше 20 000 ₽', Decimal('20000.00'), None),
+)
+
+# При большем количестве категорий их счетчики считаются GROUP BY запросом,
+# чтобы не строить агрегат с тысячами колонок.
+MAX_CATEGORY_COLUMNS = 100
+
+
+def price_bucket_q(key):
+    """Условие Q для ценового диапазона; None для неизвестного ключа."""
+    for bucket_key, _, low, high in PRICE_BUCKETS:
+        if bucket_key == key:
+            q = Q()
+            if low is not None:
+                q &= Q(price__gte=low)
+            if high is not None:
+                q &= Q(price__lt=high)
+            return q
+    return None
+
+
+def compute_facets(queryset):
+    """
+    Подсчет фасетов для QuerySet без кеша.
+
+    Returns:
+        {'total': int, 'price': {ключ: int}, 'category': {id: int}}
+    """
+    queryset = queryset.order_by()
+    categories = [item['id'] for item in get_category_navigation()]
+    aggregates = {'total': Count('pk')}
+    for index, (key, _, _, _) in enumerate(PRICE_BUCKETS):
+        aggregates[f'price_{index}'] = Count('pk', filter=price_bucket_q(key))
+    per_column = len(categories) <= MAX_CATEGORY_COLUMNS
+    if per_column:
+        for category_id in categories:
+            aggregates[f'category_{category_id}'] = Count('pk', filter=Q(category_id=category_id))
+
+    row = queryset.aggregate(**aggregates)
+    facets = {
+        'total': row['total'],
+        'price': {key: row[f'price_{i}'] for i, (key, _, _, _) in enumerate(PRICE_BUCKETS)},
+    }
+    if per_column:
+        facets['category'] = {cid: row[f'category_{cid}'] for cid in categories}
+    else:
+        facets['category'] = dict(
+            queryset.values('category_id').annotate(total=Count('pk'))
+            .values_list('category_id', 'total')
+        )
+    return facets
+
+
+def get_facets(queryset, filters):
+    """
+    Фасеты с кешированием по набору фильтров.
+
+    Args:
+        queryset: отфильтрованный QuerySet товаров
+        filters: словарь активных фильтров, однозначно определяющий queryset
+    """
+    digest = hashlib.sha1(
+        json.dumps(filters, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    key = versioned_key(NAMESPACE, digest)
+    cache = get_cache()
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets)
+    return facets
+
+
+def invalidate_facets():
+    """Сброс всех закешированных фасетов."""
+    bump_version(NAMESPACE)
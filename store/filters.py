@@ -0,0 +1,40 @@
+"""
+Фильтры каталога, общие для списка товаров и экспорта.
+"""
+from .facets import price_bucket_q
+from .search import search_products
+
+# Параметры запроса, влияющие на состав каталога.
+FILTER_PARAMS = ('search', 'category', 'price')
+
+
+def filter_products(queryset, params):
+    """
+    Применение параметров ?search=, ?category= и ?price= к QuerySet товаров.
+
+    Args:
+        queryset: исходный QuerySet товаров
+        params: словарь параметров (request.GET или опции команды)
+    """
+    search_query = params.get('search', '')
+    if search_query:
+        queryset = search_products(queryset, search_query)
+
+    category_id = params.get('category')
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+
+    price_q = price_bucket_q(params.get('price'))
+    if price_q is not None:
+        queryset = queryset.filter(price_q)
+
+    return queryset
+
+
+def active_filters(params, exclude=()):
+    """Непустые параметры фильтрации (ключ кеша фасетов, ссылки)."""
+    return {
+        name: params.get(name)
+        for name in FILTER_PARAMS
+        if name not in exclude and params.get(name)
+    }
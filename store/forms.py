@@ -1,5 +1,6 @@
 from django import forms
 from .models import Product, Category
+from .validators import clean_product_name, validate_price
 
 
 class ProductForm(forms.ModelForm):
@@ -37,18 +38,10 @@ class ProductForm(forms.ModelForm):
     
     def clean_price(self):
         """Валидация цены."""
-        price = self.cleaned_data.get('price')
-        if price is not None and price < 0:
-            raise forms.ValidationError('Цена не может быть отрицательной.')
-        if price is not None and price == 0:
-            raise forms.ValidationError('Цена должна быть больше нуля.')
-        return price
+        return validate_price(self.cleaned_data.get('price'))
     
     def clean_name(self):
         """Валидация названия."""
-        name = self.cleaned_data.get('name')
-        if name and len(name.strip()) < 3:
-            raise forms.ValidationError('Название должно содержать минимум 3 символа.')
-        return name.strip()
+        return clean_product_name(self.cleaned_data.get('name'))
 
 
@@ -0,0 +1,79 @@
+"""
+Кеш отрендеренных фрагментов: карточек товаров и блока страницы товара.
+
+Ключ фрагмента содержит id товара и его ревизию (Product.revision), которая
+растет при save(), при QuerySet.update() (в том числе в действиях админки)
+и при переименовании категории. Поэтому устаревшие фрагменты не удаляются,
+а просто перестают запрашиваться. Страница списка получает все карточки
+одним get_many() и рендерит только отсутствующие.
+
+Счетчики (store.metrics, префикс ``fragments.``): hit и miss.
+"""
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .caching import bump_version, get_cache, get_version
+from .metrics import counters
+
+NAMESPACE = 'fragments'
+CARD_TEMPLATE = 'store/includes/product_card.html'
+DETAIL_TEMPLATE = 'store/includes/product_detail_body.html'
+# Срок жизни фрагмента: ключи с ревизией не требуют инвалидации, TTL лишь
+# ограничивает время жизни фрагментов удаленных товаров.
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+def fragment_key(kind, product, version):
+    return f'store:{NAMESPACE}:{version}:{kind}:{product.pk}:{product.revision}'
+
+
+def _render_many(kind, template_name, products, context=None):
+    """Фрагменты для products в исходном порядке: из кеша или рендер."""
+    products = list(products)
+    if not products:
+        return []
+    cache = get_cache()
+    version = get_version(NAMESPACE)
+    keys = [fragment_key(kind, product, version) for product in products]
+    cached = cache.get_many(keys)
+    missing = {}
+    template = None
+    fragments = []
+    for key, product in zip(keys, products):
+        html = cached.get(key)
+        if html is None:
+            if template is None:
+                template = get_template(template_name)
+            html = template.render({**(context or {}), 'product': product})
+            missing[key] = html
+        fragments.append(mark_safe(html))
+    if missing:
+        cache.set_many(missing, FRAGMENT_TIMEOUT)
+    counters.incr('fragments.hit', len(products) - len(missing))
+    counters.incr('fragments.miss', len(missing))
+    return fragments
+
+
+def render_cards(products, show_category=False):
+    """
+    HTML карточек товаров (список безопасных строк).
+
+    При show_category товары должны быть загружены с select_related('category').
+    """
+    kind = 'card-category' if show_category else 'card'
+    return _render_many(kind, CARD_TEMPLATE, products, {'show_category': show_category})
+
+
+def render_detail(product):
+    """HTML основного блока страницы товара."""
+    return _render_many('detail', DETAIL_TEMPLATE, [product])[0]
+
+
+def invalidate_fragments():
+    """Сброс всех фрагментов (например, после изменения шаблонов)."""
+    bump_version(NAMESPACE)
+
+
+def get_metrics():
+    """Счетчики попаданий и промахов кеша фрагментов."""
+    return counters.snapshot('fragments.')
@@ -0,0 +1,273 @@
+"""
+Генератор синтетического каталога для нагрузочного тестирования.
+
+Распределения приближены к реальному магазину:
+
+* размеры категорий — по закону Ципфа (вес категории i — 1 / (i + 1) ** skew),
+  поэтому несколько категорий содержат большую часть товаров;
+* цены — логнормальные вокруг медианы категории, округленные до рубля,
+  половина — «психологические» (…,99);
+* created_at — экспоненциальный возраст: новых товаров больше, чем старых,
+  самые старые — не старше days дней.
+
+Каждая порция генерируется собственным Random с сидом из (seed, номер
+первого товара порции), поэтому результат не зависит от размера пула
+процессов. Генератор — единственный источник данных для бенчмарков
+(store.benchmarks.seed_products).
+"""
+import math
+import multiprocessing
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import connections
+from django.utils import timezone
+
+from . import rollups, search
+from .counters import recount_categories
+from .facets import invalidate_facets
+from .models import Category, Product
+from .navigation import invalidate_category_navigation
+
+NOUNS = (
+    'смартфон', 'ноутбук', 'планшет', 'наушники', 'футболка', 'джинсы',
+    'куртка', 'кроссовки', 'роман', 'учебник', 'чайник', 'лампа', 'кресло',
+    'стол', 'рюкзак', 'часы', 'камера', 'колонка', 'монитор', 'клавиатура',
+)
+ADJECTIVES = (
+    'новый', 'легкий', 'мощный', 'компактный', 'классический', 'удобный',
+    'прочный', 'тихий', 'яркий', 'складной', 'беспроводной', 'детский',
+)
+BRANDS = ('python', 'django', 'nord', 'alfa', 'vektor', 'orbita', 'zenit', 'polus')
+# Доля товаров категории с её «профильным» существительным в названии.
+CATEGORY_NOUN_SHARE = 0.7
+
+
+class GenerationStats:
+    """Счетчики и время этапов генерации."""
+
+    def __init__(self):
+        self.categories = 0
+        self.products = 0
+        self.phases = {}
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.phases.get('products') or self.elapsed
+        return self.products / elapsed if elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'categories': self.categories,
+            'products': self.products,
+            'rows_per_sec': round(self.rows_per_second),
+            'elapsed': round(self.elapsed, 3),
+            **{f'{name}_sec': round(value, 3) for name, value in self.phases.items()},
+        }
+
+
+class CatalogGenerator:
+    """
+    Генерация категорий и товаров через bulk_create порциями.
+
+    Args:
+        categories: количество категорий
+        seed: сид генератора; одинаковые параметры дают одинаковый каталог
+        batch_size: товаров в одной порции (и одном INSERT)
+        skew: показатель распределения Ципфа для размеров категорий
+        days: максимальный возраст товара в днях
+        prefix: префикс названий категорий
+        now: момент отсчета created_at (по умолчанию — текущее время)
+    """
+
+    def __init__(self, categories=50, seed=0, batch_size=5000, skew=1.1, days=730,
+                 prefix='gen', now=None, using='default'):
+        if categories < 1:
+            raise ValueError('Нужна хотя бы одна категория.')
+        self.categories = categories
+        self.seed = seed
+        self.batch_size = batch_size
+        self.skew = skew
+        self.days = days
+        self.prefix = prefix
+        self.now = now or timezone.now()
+        self.using = using
+        self.cum_weights = list(accumulate(1 / (i + 1) ** skew for i in range(categories)))
+        self.specs = self.category_specs()
+
+    def category_specs(self):
+        """Параметры категорий: [{'name', 'description', 'noun', 'median_price'}, ...]."""
+        rng = random.Random(f'{self.seed}:categories')
+        specs = []
+        for i in range(self.categories):
+            noun = NOUNS[i % len(NOUNS)]
+            specs.append({
+                'name': f'{self.prefix}-{i} {noun}',
+                'description': f'{rng.choice(ADJECTIVES).capitalize()} {noun} и аксессуары',
+                'noun': noun,
+                # Медиана цены категории — лог-равномерно от 300 до 30 000 ₽.
+                'median_price': math.exp(rng.uniform(math.log(300), math.log(30_000))),
+            })
+        return specs
+
+    def ensure_categories(self):
+        """Категории генератора (недостающие создаются) в порядке specs."""
+        names = [spec['name'] for spec in self.specs]
+        existing = {
+            category.name: category
+            for category in Category.objects.using(self.using).filter(name__in=names)
+        }
+        missing = [
+            Category(name=spec['name'], description=spec['description'])
+            for spec in self.specs if spec['name'] not in existing
+        ]
+        for category in Category.objects.using(self.using).bulk_create(missing):
+            existing[category.name] = category
+        return [existing[name] for name in names]
+
+    def _price(self, rng, spec):
+        value = max(1, round(spec['median_price'] * rng.lognormvariate(0, 0.5)))
+        price = Decimal(value)
+        if value > 1 and rng.random() < 0.5:
+            price -= Decimal('0.01')
+        return price
+
+    def _age(self, rng):
+        limit = self.days * 86_400
+        return timedelta(seconds=min(rng.expovariate(4 / limit), limit))
+
+    def _rows(self, start, count):
+        """count словарей полей товаров, начиная с номера start."""
+        rng = random.Random(f'{self.seed}:{start}')
+        indexes = rng.choices(range(self.categories), cum_weights=self.cum_weights, k=count)
+        for number, index in enumerate(indexes, start=start):
+            spec = self.specs[index]
+            noun = spec['noun'] if rng.random() < CATEGORY_NOUN_SHARE else rng.choice(NOUNS)
+            adjective, brand = rng.choice(ADJECTIVES), rng.choice(BRANDS)
+            yield {
+                'name': f'{adjective.capitalize()} {noun} {brand} {number}',
+                'description': (
+                    f'{noun.capitalize()} {brand}, совместим с {rng.choice(BRANDS)}: '
+                    f'{", ".join(rng.sample(ADJECTIVES, 3))}'
+                ),
+                'price': self._price(rng, spec),
+                'created_at': self.now - self._age(rng),
+                'category': index,
+            }
+
+    def rows(self, total, offset=0):
+        """Строки товаров для файлов импорта; category — название категории."""
+        for start, count in self.batches(total, offset):
+            for row in self._rows(start, count):
+                row['category'] = self.specs[row['category']]['name']
+                yield row
+
+    def batches(self, total, offset=0):
+        """Границы порций: [(start, count), ...]."""
+        return [
+            (start, min(self.batch_size, offset + total - start))
+            for start in range(offset, offset + total, self.batch_size)
+        ]
+
+    def product_batch(self, start, count, category_ids):
+        """Несохраненные товары порции; category_ids — id категорий в порядке specs."""
+        products = []
+        for row in self._rows(start, count):
+            row['category_id'] = category_ids[row.pop('category')]
+            products.append(Product(**row))
+        return products
+
+    def insert_batch(self, start, count, category_ids):
+        Product.objects.using(self.using).bulk_create(
+            self.product_batch(start, count, category_ids)
+        )
+        return count
+
+    def generate(self, total, offset=0, workers=1, progress=None):
+        """
+        Генерация total товаров (номера offset…offset + total - 1).
+
+        Args:
+            workers: число процессов для вставки порций (fork); каждый
+                процесс открывает собственное соединение с БД
+            progress: функция (done, total), вызываемая после каждой порции
+
+        Returns:
+            GenerationStats
+        """
+        stats = GenerationStats()
+        phase = time.perf_counter()
+        categories = self.ensure_categories()
+        category_ids = [category.pk for category in categories]
+        stats.categories = len(categories)
+        stats.phases['categories'] = time.perf_counter() - phase
+
+        last_id = Product.objects.using(self.using).order_by('-pk').values_list('pk', flat=True).first()
+        phase = time.perf_counter()
+        batches = self.batches(total, offset)
+        if workers > 1:
+            done = self._insert_parallel(batches, category_ids, workers, progress, total)
+        else:
+            done = 0
+            for start, count in batches:
+                done += self.insert_batch(start, count, category_ids)
+                if progress is not None:
+                    progress(done, total)
+        stats.products = done
+        stats.phases['products'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        if last_id is None:
+            # Пустой каталог — индекс строится одним запросом по всей таблице.
+            search.index_products(using=self.using)
+        else:
+            search.index_products(
+                Product.objects.using(self.using).filter(pk__gt=last_id).values_list('pk', flat=True),
+                using=self.using,
+            )
+        stats.phases['search_index'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        recount_categories(category_ids, using=self.using)
+        invalidate_category_navigation()
+        invalidate_facets()
+        stats.phases['counters'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        # История цен не пишется — сводка категорий пересчитывается целиком.
+        rollups.rebuild(category_ids, using=self.using)
+        stats.phases['rollups'] = time.perf_counter() - phase
+        return stats
+
+    def _insert_parallel(self, batches, category_ids, workers, progress, total):
+        # Дочерние процессы не должны унаследовать открытые соединения.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        jobs = [(self._config(), start, count, category_ids) for start, count in batches]
+        done = 0
+        with context.Pool(workers) as pool:
+            for count in pool.imap_unordered(_insert_batch_job, jobs):
+                done += count
+                if progress is not None:
+                    progress(done, total)
+        return done
+
+    def _config(self):
+        return {
+            'categories': self.categories, 'seed': self.seed, 'batch_size': self.batch_size,
+            'skew': self.skew, 'days': self.days, 'prefix': self.prefix, 'now': self.now,
+            'using': self.using,
+        }
+
+
+def _insert_batch_job(job):
+    config, start, count, category_ids = job
+    return CatalogGenerator(**config).insert_batch(start, count, category_ids)
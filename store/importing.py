@@ -0,0 +1,242 @@
+"""
+Пакетный импорт товаров из CSV и JSONL.
+
+Файл читается потоково (построчно, в том числе .gz), категории
+сопоставляются по названию через словарь в памяти и создаются при первой
+встрече, строки проверяются теми же правилами, что и ProductForm, и
+записываются bulk_create порциями, каждая в своей транзакции.
+
+После каждой порции смещение сохраняется в файл контрольной точки, так что
+прерванный импорт можно продолжить с того же места.
+"""
+import csv
+import gzip
+import io
+import json
+import time
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import outbox, prices, search
+from .counters import adjust_product_count
+from .facets import invalidate_facets
+from .models import Category, ChangeEvent, Product
+from .navigation import invalidate_category_navigation
+from .validators import clean_product_name, validate_price
+
+FORMATS = ('csv', 'jsonl')
+
+
+def open_text(path):
+    """Открытие файла как текста UTF-8 с прозрачной распаковкой .gz."""
+    if str(path).endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def detect_format(path):
+    """Формат по расширению файла (.csv, .jsonl, в том числе .gz)."""
+    name = str(path)
+    if name.endswith('.gz'):
+        name = name[:-3]
+    for fmt in FORMATS:
+        if name.endswith(f'.{fmt}'):
+            return fmt
+    raise ValueError(f'Не удалось определить формат файла: {path}')
+
+
+def read_rows(stream, fmt):
+    """
+    Генератор строк из потока: словари для CSV, непустые строки текста для JSONL.
+
+    Строка JSONL разбирается в ProductImporter.build_product (parse_row), чтобы
+    испорченная строка была пропущена с ошибкой, а не прерывала весь импорт.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield line
+    else:
+        raise ValueError(f'Неизвестный формат: {fmt}')
+
+
+def parse_row(row):
+    """Словарь-строка импорта; строка JSONL разбирается как объект JSON."""
+    if isinstance(row, str):
+        try:
+            row = json.loads(row)
+        except json.JSONDecodeError as e:
+            raise ValidationError(f'Некорректный JSON: {e.msg}.')
+    if not isinstance(row, dict):
+        raise ValidationError('Строка не является объектом JSON.')
+    return row
+
+
+class ImportStats:
+    """Счетчики импорта."""
+
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.categories_created = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        processed = self.created + self.skipped
+        return processed / self.elapsed if self.elapsed else 0.0
+
+
+class ProductImporter:
+    """
+    Импорт товаров порциями через bulk_create.
+
+    Args:
+        batch_size: размер порции (и транзакции)
+        checkpoint_path: файл, куда записывается смещение обработанных строк
+        max_errors: сколько ошибок валидации сохранять для отчета
+    """
+
+    def __init__(self, batch_size=5000, checkpoint_path=None, max_errors=20, using='default'):
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.max_errors = max_errors
+        self.using = using
+        self.stats = ImportStats()
+        self.category_ids = dict(
+            Category.objects.using(using).values_list('name', 'id')
+        )
+        self._price_field = Product._meta.get_field('price')
+        self._name_max_length = Product._meta.get_field('name').max_length
+        self._created_at_field = Product._meta.get_field('created_at')
+
+    def read_checkpoint(self):
+        """Смещение из файла контрольной точки (0, если его нет)."""
+        if not self.checkpoint_path:
+            return 0
+        try:
+            with open(self.checkpoint_path) as fh:
+                return int(fh.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, offset):
+        if self.checkpoint_path:
+            with open(self.checkpoint_path, 'w') as fh:
+                fh.write(str(offset))
+
+    def category_id(self, name):
+        """ID категории по названию; новая категория создается один раз."""
+        if name not in self.category_ids:
+            category = Category.objects.using(self.using).create(name=name)
+            self.category_ids[name] = category.pk
+            self.stats.categories_created += 1
+        return self.category_ids[name]
+
+    @staticmethod
+    def text(row, field):
+        """Строковое поле строки (пустая строка, если его нет); JSON может дать число или список."""
+        value = row.get(field)
+        if value is None:
+            return ''
+        if not isinstance(value, str):
+            raise ValidationError(f'Поле {field} должно быть строкой.')
+        return value
+
+    def build_product(self, row):
+        """Проверка строки и создание несохраненного Product."""
+        row = parse_row(row)
+        name = clean_product_name(self.text(row, 'name'))
+        if not name:
+            raise ValidationError('Не указано название.')
+        if len(name) > self._name_max_length:
+            raise ValidationError('Слишком длинное название.')
+        price = validate_price(self._price_field.to_python(row.get('price')))
+        if price is None:
+            raise ValidationError('Не указана цена.')
+        # max_digits и decimal_places — как в ProductForm.
+        self._price_field.run_validators(price)
+        category_name = self.text(row, 'category').strip()
+        if not category_name:
+            raise ValidationError('Не указана категория.')
+        created_at = row.get('created_at')
+        created_at = (
+            self._created_at_field.to_python(created_at) if created_at else timezone.now()
+        )
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+        return Product(
+            name=name,
+            description=self.text(row, 'description'),
+            price=price,
+            created_at=created_at,
+            category_id=self.category_id(category_name),
+        )
+
+    def flush(self, batch, offset):
+        """
+        Запись порции, обновление индекса и счетчиков в одной транзакции.
+
+        Контрольная точка пишется после фиксации: если COMMIT не удался
+        (например, «database is locked»), продолжение повторит эту порцию.
+        """
+        created = []
+        with transaction.atomic(using=self.using):
+            if batch:
+                created = Product.objects.using(self.using).bulk_create(batch)
+                search.index_products([p.pk for p in created], using=self.using)
+                outbox.record_many(created, ChangeEvent.INSERT, using=self.using)
+                prices.record_prices([p.pk for p in created], using=self.using)
+                for category_id, delta in Counter(p.category_id for p in created).items():
+                    adjust_product_count(category_id, delta, using=self.using)
+        self.stats.created += len(created)
+        self.write_checkpoint(offset)
+
+    def run(self, rows, offset=None):
+        """
+        Импорт строк начиная с offset (по умолчанию — из контрольной точки).
+
+        Returns:
+            ImportStats
+        """
+        if offset is None:
+            offset = self.read_checkpoint()
+        batch = []
+        position = 0
+        for position, row in enumerate(rows, start=1):
+            if position <= offset:
+                continue
+            try:
+                batch.append(self.build_product(row))
+            except (ValidationError, ValueError, TypeError) as e:
+                self.stats.skipped += 1
+                if len(self.stats.errors) < self.max_errors:
+                    messages = e.messages if isinstance(e, ValidationError) else [str(e)]
+                    self.stats.errors.append((position, '; '.join(messages)))
+            if len(batch) >= self.batch_size:
+                self.flush(batch, position)
+                batch = []
+        self.flush(batch, max(position, offset))
+        invalidate_category_navigation()
+        invalidate_facets()
+        return self.stats
+
+
+def import_file(path, fmt=None, **options):
+    """Импорт файла целиком; см. ProductImporter."""
+    fmt = fmt or detect_format(path)
+    offset = options.pop('offset', None)
+    importer = ProductImporter(**options)
+    with open_text(path) as stream:
+        return importer.run(read_rows(stream, fmt), offset=offset)
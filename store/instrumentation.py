@@ -0,0 +1,163 @@
+"""
+Учет работы с БД на запрос и на задачу Celery.
+
+QueryRecorder подключается через connection.execute_wrapper и собирает
+количество запросов, суммарное время и «отпечатки» SQL (текст запроса без
+литералов). Отпечаток, встретившийся несколько раз, — признак N+1.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('store.queries')
+
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL без литералов и с одинаковыми IN (...) независимо от длины списка."""
+    sql = _STRING_RE.sub('%s', sql)
+    sql = _NUMBER_RE.sub('%s', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """Счетчики запросов для connection.execute_wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 3)
+
+    def duplicates(self):
+        """Отпечатки, выполненные больше одного раза: {отпечаток: количество}."""
+        return {sql: n for sql, n in self.fingerprints.items() if n > 1}
+
+    def as_log_fields(self):
+        duplicates = self.duplicates()
+        return {
+            'db_query_count': self.count,
+            'db_time_ms': self.duration_ms,
+            'db_duplicate_queries': sum(duplicates.values()) - len(duplicates),
+            'db_duplicate_fingerprints': sorted(duplicates, key=duplicates.get, reverse=True)[:5],
+        }
+
+
+@contextmanager
+def record_queries(using=None):
+    """Запись запросов ко всем (или указанным) подключениям внутри блока."""
+    recorder = QueryRecorder()
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+def _log(kind, name, recorder, **fields):
+    data = {'kind': kind, 'target': name, **fields, **recorder.as_log_fields()}
+    budget = getattr(settings, 'STORE_QUERY_BUDGET_WARNING', 50)
+    level = logging.WARNING if recorder.count > budget or data['db_duplicate_queries'] else logging.INFO
+    logger.log(
+        level,
+        f"{kind} {name}: {recorder.count} запросов, {recorder.duration_ms} мс, "
+        f"повторов {data['db_duplicate_queries']}",
+        extra=data,
+    )
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Учет запросов к БД на HTTP-запрос.
+
+    Пишет структурированную запись в логгер ``store.queries`` и, если
+    включен settings.STORE_QUERY_HEADERS, добавляет заголовки X-DB-*.
+    Запросы, выполняемые при чтении StreamingHttpResponse, не учитываются.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.headers = getattr(settings, 'STORE_QUERY_HEADERS', settings.DEBUG)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        # Async ORM выполняет запросы в потоке запроса (sync_to_async с
+        # thread_sensitive=True) — обертка подключается к его соединениям.
+        stack = ExitStack()
+        recorder = await sync_to_async(stack.enter_context)(record_queries())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder)
+
+    def finish(self, request, response, recorder):
+        _log('request', request.path, recorder, method=request.method,
+             status=response.status_code)
+        if self.headers:
+            response['X-DB-Query-Count'] = str(recorder.count)
+            response['X-DB-Time-Ms'] = str(recorder.duration_ms)
+            response['X-DB-Duplicate-Queries'] = str(
+                recorder.as_log_fields()['db_duplicate_queries']
+            )
+        return response
+
+
+# Учет запросов задач Celery: task_id -> (ExitStack, QueryRecorder)
+_task_recorders = {}
+
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    stack = ExitStack()
+    recorder = stack.enter_context(record_queries())
+    _task_recorders[task_id] = (stack, recorder)
+
+
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    entry = _task_recorders.pop(task_id, None)
+    if entry is None:
+        return
+    stack, recorder = entry
+    stack.close()
+    _log('task', task.name, recorder, task_id=task_id, state=state)
+
+
+def connect_celery_signals():
+    """Подключение учета запросов к сигналам task_prerun/task_postrun."""
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(_task_prerun, weak=False, dispatch_uid='store.instrumentation.prerun')
+    task_postrun.connect(_task_postrun, weak=False, dispatch_uid='store.instrumentation.postrun')
@@ -0,0 +1,164 @@
+"""
+Нагрузочное сравнение WSGI и ASGI в одном процессе.
+
+* WSGI — пул из concurrency потоков вызывает WSGIHandler, как потоковый
+  воркер gunicorn;
+* ASGI — concurrency корутин в одном event loop вызывают ASGIHandler, как
+  uvicorn. Страницы каталога обслуживаются async-представлениями
+  (config.asgi_urls).
+
+Оба обработчика проходят полный стек middleware. Сеть не участвует, поэтому
+результаты показывают накладные расходы Django и БД, а не HTTP-сервера.
+Запросы выполняются в других потоках и соединениях, поэтому данные должны
+быть зафиксированы в БД.
+"""
+import asyncio
+import io
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test.utils import override_settings
+
+ASGI_URLCONF = 'config.asgi_urls'
+
+
+def _host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '')]
+    return hosts[0].lstrip('.') if hosts else 'localhost'
+
+
+def _split(path):
+    path, _, query = path.partition('?')
+    return path, query
+
+
+def summarize(latencies, elapsed, errors):
+    """Пропускная способность и перцентили задержки (мс)."""
+    latencies = sorted(latencies)
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentiles[49] * 1000, 2),
+        'p99_ms': round(percentiles[98] * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2),
+    }
+
+
+def run_wsgi(paths, requests, concurrency):
+    """requests GET-запросов по кругу из paths через WSGIHandler в concurrency потоках."""
+    handler = WSGIHandler()
+    host = _host()
+    lock = threading.Lock()
+    latencies = []
+    errors = []
+
+    def call(index):
+        path, query = _split(paths[index % len(paths)])
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': host,
+            'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.url_scheme': 'http',
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+            'wsgi.version': (1, 0),
+        }
+        status = []
+        started = time.perf_counter()
+        response = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not status[0].startswith('200'):
+                errors.append(status[0])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    return summarize(latencies, time.perf_counter() - started, len(errors))
+
+
+async def _asgi_call(application, host, path):
+    path, query = _split(path)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', host.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': (host, 80),
+    }
+    done = asyncio.Event()
+    received = []
+    status = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Django слушает отключение клиента до конца ответа.
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            done.set()
+
+    await application(scope, receive, send)
+    done.set()
+    return status[0]
+
+
+def run_asgi(paths, requests, concurrency):
+    """requests GET-запросов по кругу из paths через ASGIHandler, concurrency одновременно."""
+    host = _host()
+
+    async def main():
+        application = ASGIHandler()
+        queue = iter(range(requests))
+        latencies = []
+        errors = []
+
+        async def worker():
+            for index in queue:
+                started = time.perf_counter()
+                status = await _asgi_call(application, host, paths[index % len(paths)])
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    errors.append(status)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return summarize(latencies, time.perf_counter() - started, len(errors))
+
+    with override_settings(ROOT_URLCONF=ASGI_URLCONF):
+        return asyncio.run(main())
@@ -0,0 +1,47 @@
+"""
+Блокировки фоновых задач в БД.
+
+Блокировка — аренда строки TaskLock: захват выполняется одним условным
+UPDATE («свободна или срок истек»), который атомарен на любой БД. Поэтому
+она работает между процессами и хостами и на SQLite, где
+select_for_update ничего не блокирует, а кеш LocMem виден только своему
+процессу. Срок аренды освобождает блокировку процесса, завершившегося,
+не сняв ее.
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+from uuid import uuid4
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TaskLock
+
+
+@contextmanager
+def hold(name, timeout, using=DEFAULT_DB_ALIAS):
+    """
+    Захват блокировки name на timeout секунд на время блока.
+
+    Блок выполняется и без захвата: значение — True, если блокировка
+    получена, False — если ее держит другой процесс.
+
+    Пример::
+
+        with hold('store:outbox:relay:default', 300) as acquired:
+            if acquired:
+                ...
+    """
+    locks = TaskLock.objects.using(using)
+    locks.get_or_create(name=name)
+    owner = uuid4().hex
+    now = timezone.now()
+    acquired = locks.filter(Q(expires_at__isnull=True) | Q(expires_at__lte=now), name=name).update(
+        owner=owner, expires_at=now + timedelta(seconds=timeout),
+    )
+    try:
+        yield bool(acquired)
+    finally:
+        if acquired:
+            locks.filter(name=name, owner=owner).update(owner='', expires_at=None)
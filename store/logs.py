@@ -0,0 +1,200 @@
+"""
+Неблокирующее структурированное логирование.
+
+Запись в файл выполняется в отдельном потоке: ``QueueFileHandler`` только
+кладет запись в очередь, поток ``BufferedQueueListener`` форматирует её в
+одну строку JSON и копит строки в ``BufferedRotatingFileHandler``, который
+пишет их на диск пачкой — по заполнении буфера, по таймеру или сразу для
+ошибок. Подключается через settings.LOGGING:
+
+    'file': {
+        'class': 'store.logs.QueueFileHandler',
+        'filename': LOGS_DIR / 'celery.log',
+        'formatter': 'json',
+    }
+
+Поля события передаются через ``extra`` и попадают в JSON на верхний
+уровень: ``logger.info('Новый товар', extra={'event': 'product_created', ...})``.
+"""
+import json
+import logging
+import os
+import queue
+import time
+import weakref
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Атрибуты LogRecord, которые не являются полями события.
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'taskName',
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога -> одна строка JSON с полями из extra."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(
+            (key, value) for key, value in vars(record).items()
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_')
+        )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+    def formatTime(self, record, datefmt=None):
+        created = datetime.fromtimestamp(record.created).astimezone()
+        return created.isoformat(timespec='milliseconds')
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler с буфером: строки пишутся на диск пачками.
+
+    Буфер сбрасывается, когда в нем capacity записей, когда с прошлого
+    сброса прошло flush_interval секунд, и сразу для записей уровня
+    flush_level и выше. Ротация проверяется после каждого сброса.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding='utf-8',
+                 capacity=100, flush_interval=1.0, flush_level=logging.ERROR):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount,
+                         encoding=encoding, delay=True)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.buffer = []
+        self.flushed_at = time.monotonic()
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if (len(self.buffer) >= self.capacity or record.levelno >= self.flush_level
+                or time.monotonic() - self.flushed_at >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.flushed_at = time.monotonic()
+            if not self.buffer:
+                return
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write('\n'.join(self.buffer) + '\n')
+            self.buffer.clear()
+            self.stream.flush()
+            if self.maxBytes and self.stream.tell() >= self.maxBytes:
+                self.doRollover()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class BufferedQueueListener(QueueListener):
+    """QueueListener, который сбрасывает буферы обработчиков, пока очередь пуста."""
+
+    def __init__(self, queue, *handlers, flush_interval=1.0):
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, self.flush_interval)
+            except queue.Empty:
+                self.flush()
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+
+
+# Живые обработчики: после fork (prefork-пул Celery) их потоки перезапускаются.
+_handlers = weakref.WeakSet()
+
+
+class QueueFileHandler(QueueHandler):
+    """
+    Обработчик для settings.LOGGING: очередь + поток записи в файл.
+
+    Сообщение и traceback вычисляются в потоке, где создана запись; JSON
+    и запись на диск — в потоке слушателя. Формат (formatter из LOGGING)
+    применяется к файловому обработчику.
+    """
+
+    def __init__(self, filename, maxBytes=10 * 1024 * 1024, backupCount=5,
+                 capacity=100, flush_interval=1.0, queue_size=10_000):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.target = BufferedRotatingFileHandler(
+            filename, maxBytes=maxBytes, backupCount=backupCount,
+            capacity=capacity, flush_interval=flush_interval,
+        )
+        self.listener = BufferedQueueListener(self.queue, self.target, flush_interval=flush_interval)
+        self.listener.start()
+        _handlers.add(self)
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Без форматирования: только то, что нельзя отложить (аргументы
+        # сообщения и исключение могут измениться после возврата).
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            formatter = self.target.formatter or logging.Formatter()
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Диск не успевает — пишем синхронно, но не теряем запись.
+            self.target.handle(record)
+
+    def flush(self):
+        """Ожидание записи очереди и сброс буфера на диск."""
+        if self.listener._thread is not None:
+            self.queue.join()
+        self.target.flush()
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.close()
+        super().close()
+
+    def _after_fork(self):
+        # Поток слушателя не переживает fork, очередь может быть заблокирована.
+        self.queue = self.listener.queue = queue.Queue(self.queue_size)
+        self.listener._thread = None
+        self.target.buffer.clear()
+        if self.target.stream is not None:
+            self.target.stream.close()
+            self.target.stream = None
+        self.listener.start()
+
+
+def _restart_after_fork():
+    for handler in list(_handlers):
+        handler._after_fork()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,80 @@
+"""
+Кастомная команда для запуска бенчмарков производительности.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.benchmark_results import compare, load_results, save_results
+from store.benchmarks import DEFAULT_SIZES, SCENARIOS
+
+
+class Command(BaseCommand):
+    help = 'Запускает бенчмарки производительности (данные генерируются и откатываются)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='*',
+            help=f'Сценарии для запуска (по умолчанию все): {", ".join(sorted(SCENARIOS))}',
+        )
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+            help='Размеры каталога (количество товаров)',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Количество повторов каждого замера',
+        )
+        parser.add_argument(
+            '--concurrency', nargs='+', type=int,
+            help='Количество одновременных запросов (сценарий asgi)',
+        )
+        parser.add_argument(
+            '--requests', type=int,
+            help='Количество запросов на замер (сценарий asgi)',
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help='Сохранить результаты в JSON-файл (его можно использовать как базовую линию)',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON-файл прошлого запуска; ухудшение метрик приводит к ошибке',
+        )
+        parser.add_argument(
+            '--max-regression', type=float, default=0.2,
+            help='Допустимое ухудшение относительно базовой линии (0.2 — 20%%)',
+        )
+
+    def handle(self, *args, **options):
+        names = options['scenarios'] or sorted(SCENARIOS)
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Неизвестные сценарии: {", ".join(unknown)}')
+
+        baseline = load_results(options['baseline']) if options['baseline'] else None
+        extra = {
+            key: options[key] for key in ('concurrency', 'requests') if options[key] is not None
+        }
+        scenarios = {}
+        for name in names:
+            self.stdout.write(self.style.SUCCESS(f'Сценарий: {name}'))
+            results = scenarios[name] = SCENARIOS[name](
+                sizes=options['sizes'], repeat=options['repeat'], **extra
+            )
+            for row in results:
+                self.stdout.write(json.dumps(row, ensure_ascii=False))
+
+        if options['output']:
+            save_results(options['output'], scenarios, sizes=options['sizes'], repeat=options['repeat'])
+            self.stdout.write(self.style.SUCCESS(f'Результаты сохранены: {options["output"]}'))
+        if baseline is None:
+            return
+        regressions = compare(scenarios, baseline, options['max_regression'])
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(str(regression))
+            raise CommandError(
+                f'Ухудшение больше {options["max_regression"]:.0%} по {len(regressions)} метрикам'
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий относительно базовой линии нет'))
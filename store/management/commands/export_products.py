@@ -0,0 +1,38 @@
+"""
+Кастомная команда для потокового экспорта каталога.
+"""
+import sys
+
+from django.core.management.base import BaseCommand
+
+from store.export import FORMATS, export_queryset, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Экспортирует товары в CSV или JSONL (опционально gzip) без загрузки всего каталога в память'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv', help='Формат выгрузки')
+        parser.add_argument('--gzip', action='store_true', help='Сжать вывод gzip')
+        parser.add_argument('--output', '-o', help='Файл для записи (по умолчанию stdout)')
+        parser.add_argument('--search', default='', help='Поисковый запрос, как на главной странице')
+        parser.add_argument('--category', help='ID категории')
+
+    def handle(self, *args, **options):
+        queryset = export_queryset({
+            'search': options['search'],
+            'category': options['category'],
+        })
+        chunks = iter_export(queryset, options['format'], options['gzip'])
+
+        if options['output']:
+            with open(options['output'], 'wb') as fh:
+                written = sum(fh.write(chunk) for chunk in chunks)
+            self.stderr.write(self.style.SUCCESS(
+                f'Записано {written} байт в {options["output"]}'
+            ))
+        else:
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
@@ -0,0 +1,65 @@
+"""
+Кастомная команда для генерации синтетического каталога любого размера.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.generator import CatalogGenerator
+
+
+class Command(BaseCommand):
+    help = 'Генерирует N категорий и M товаров с реалистичными распределениями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=50, help='Количество категорий')
+        parser.add_argument('--products', type=int, default=100_000, help='Количество товаров')
+        parser.add_argument('--seed', type=int, default=0, help='Сид генератора')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Товаров в одной порции bulk_create',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Количество процессов для вставки порций',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа для размеров категорий',
+        )
+        parser.add_argument('--days', type=int, default=730, help='Максимальный возраст товара в днях')
+        parser.add_argument('--prefix', default='gen', help='Префикс названий категорий')
+        parser.add_argument(
+            '--offset', type=int, default=0,
+            help='Номер первого товара (продолжение генерации тем же сидом)',
+        )
+        parser.add_argument('--json', action='store_true', help='Вывести статистику в JSON')
+
+    def handle(self, *args, **options):
+        if options['products'] < 0 or options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--products, --workers и --batch-size должны быть положительными')
+        try:
+            generator = CatalogGenerator(
+                categories=options['categories'], seed=options['seed'],
+                batch_size=options['batch_size'], skew=options['skew'],
+                days=options['days'], prefix=options['prefix'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        def progress(done, total):
+            self.stdout.write(f'{done}/{total} товаров')
+
+        stats = generator.generate(
+            options['products'], offset=options['offset'], workers=options['workers'],
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(stats.as_dict(), ensure_ascii=False))
+            return
+        for name, seconds in stats.phases.items():
+            self.stdout.write(f'{name}: {seconds:.2f} с')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано товаров: {stats.products} в {stats.categories} категориях '
+            f'за {stats.elapsed:.2f} с ({stats.rows_per_second:.0f} строк/с)'
+        ))
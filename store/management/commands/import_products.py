@@ -0,0 +1,51 @@
+"""
+Кастомная команда для пакетного импорта товаров из CSV/JSONL.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from store.importing import FORMATS, import_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует товары из CSV или JSONL (можно .gz) порциями через bulk_create. '
+        'Колонки: name, description, price, category, created_at (необязательно).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу')
+        parser.add_argument('--format', choices=FORMATS, help='Формат (по умолчанию по расширению)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер порции')
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки: смещение обновляется после каждой порции',
+        )
+        parser.add_argument(
+            '--offset', type=int,
+            help='Пропустить первые N строк (по умолчанию — значение из контрольной точки)',
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Алиас базы данных')
+
+    def handle(self, *args, **options):
+        try:
+            stats = import_file(
+                options['path'],
+                fmt=options['format'],
+                batch_size=options['batch_size'],
+                checkpoint_path=options['checkpoint'],
+                offset=options['offset'],
+                using=options['database'],
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for line, message in stats.errors:
+            self.stdout.write(self.style.WARNING(f'Строка {line}: {message}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано товаров: {stats.created}, пропущено: {stats.skipped}, '
+            f'новых категорий: {stats.categories_created}'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Время: {stats.elapsed:.2f} с, скорость: {stats.rows_per_second:.0f} строк/с'
+        ))
@@ -0,0 +1,35 @@
+"""
+Кастомная команда для пересоздания поискового индекса товаров.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from store.models import Product
+from store.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Пересоздает полнотекстовый индекс по названию, описанию и категории товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Алиас базы данных (по умолчанию default)',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        backend = get_backend(using)
+        self.stdout.write(f'Бэкенд поиска: {type(backend).__name__}')
+
+        started = time.perf_counter()
+        with transaction.atomic(using=using):
+            rebuild_index(using=using)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс пересоздан: {Product.objects.using(using).count()} товаров '
+            f'за {elapsed:.2f} с'
+        ))
@@ -0,0 +1,26 @@
+"""
+Кастомная команда для сверки счетчиков товаров в категориях.
+"""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from store.counters import recount_categories
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Category.product_count одним групповым запросом'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Алиас базы данных (по умолчанию default)',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        with transaction.atomic(using=using):
+            fixed = recount_categories(using=using)
+        if fixed:
+            self.stdout.write(self.style.WARNING(f'Исправлено счетчиков: {fixed}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Все счетчики актуальны'))
@@ -0,0 +1,67 @@
+"""
+Кастомная команда для массовой переоценки товаров по набору правил.
+"""
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.repricing import CHUNK_SIZE, Repricer, parse_rules
+from store.tasks import reprice_products
+
+
+class Command(BaseCommand):
+    help = 'Переоценивает товары по правилам порциями по диапазонам id'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'rules',
+            help='JSON-файл или строка со списком правил, например '
+                 '\'[{"category_id": 1, "min_price": "100", "percent": "5"}]\'',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, сколько товаров затронет каждое правило',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help=f'Ширина диапазона id одной порции (по умолчанию {CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--async', action='store_true', dest='use_celery',
+            help='Поставить переоценку в очередь Celery',
+        )
+
+    def handle(self, *args, **options):
+        source = options['rules']
+        path = Path(source)
+        try:
+            data = json.loads(path.read_text(encoding='utf-8') if path.is_file() else source)
+            rules = parse_rules(data)
+        except (ValueError, TypeError) as e:
+            raise CommandError(f'Некорректные правила: {e}')
+
+        if options['use_celery']:
+            result = reprice_products.delay(
+                [rule.as_dict() for rule in rules],
+                dry_run=options['dry_run'], chunk_size=options['chunk_size'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'Задача поставлена в очередь: {result.id}'))
+            return
+
+        repricer = Repricer(rules, chunk_size=options['chunk_size'])
+        if options['dry_run']:
+            preview = repricer.preview()
+            for row in preview['rules']:
+                self.stdout.write(f'{row["rule"]}: {row["count"]}')
+            self.stdout.write(self.style.SUCCESS(f'Будет затронуто товаров: {preview["total"]}'))
+            return
+
+        def progress(stats, done, total):
+            self.stdout.write(f'{done}/{total} id, изменено {stats.updated}')
+
+        stats = repricer.run(progress=progress if options['verbosity'] > 1 else None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Переоценено товаров: {stats.updated} из {stats.matched} '
+            f'({stats.chunks} порций, {stats.elapsed:.2f} с)'
+        ))
@@ -0,0 +1,34 @@
+"""
+Простые счетчики в памяти процесса для метрик приложения store.
+"""
+import threading
+from collections import defaultdict
+
+
+class Counters:
+    """Потокобезопасный набор именованных счетчиков."""
+
+    def __init__(self):
+        self._values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._values[name] += value
+
+    def get(self, name):
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self, prefix=''):
+        """Копия счетчиков, имена которых начинаются с prefix."""
+        with self._lock:
+            return {k: v for k, v in self._values.items() if k.startswith(prefix)}
+
+    def reset(self, prefix=''):
+        with self._lock:
+            for name in [k for k in self._values if k.startswith(prefix)]:
+                del self._values[name]
+
+
+counters = Counters()
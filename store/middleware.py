@@ -0,0 +1,32 @@
+"""
+Middleware приложения store.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .batching import defer_new_products
+
+
+class NewProductBatchMiddleware:
+    """Перенос накопленных за запрос событий о новых товарах в окно отправки процесса."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            return self.get_response(request)
+        finally:
+            defer_new_products()
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            # Буфер событий локален для потока, в котором работало представление.
+            await sync_to_async(defer_new_products)()
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from store.search import get_backend
+
+    backend = get_backend(schema_editor.connection.alias)
+    with schema_editor.connection.cursor() as cursor:
+        backend.create_index(cursor)
+        backend.index_products(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    from store.search import get_backend
+
+    backend = get_backend(schema_editor.connection.alias)
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop_index(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
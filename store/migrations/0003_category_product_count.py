@@ -0,0 +1,30 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_product_count(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    Product = apps.get_model('store', 'Product')
+    db = schema_editor.connection.alias
+    counts = (
+        Product.objects.using(db).order_by().values('category_id')
+        .annotate(total=Count('id')).values_list('category_id', 'total')
+    )
+    for category_id, total in counts:
+        Category.objects.using(db).filter(pk=category_id).update(product_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество товаров'),
+        ),
+        migrations.RunPython(fill_product_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_product_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Ревизия'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:53
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_product_updated_at(apps, schema_editor):
+    # Существующие товары не изменялись с момента создания.
+    Product = apps.get_model('store', 'Product')
+    Product.objects.using(schema_editor.connection.alias).update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_product_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(fill_product_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at'], name='store_prod_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'updated_at'], name='store_prod_cat_updated_idx'),
+        ),
+    ]
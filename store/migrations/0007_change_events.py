@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:24
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumerOffset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumer', models.CharField(max_length=100, unique=True, verbose_name='Потребитель')),
+                ('position', models.PositiveBigIntegerField(default=0, verbose_name='Позиция')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Позиция потребителя',
+                'verbose_name_plural': 'Позиции потребителей',
+                'ordering': ['consumer'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32, verbose_name='Модель')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID объекта')),
+                ('operation', models.CharField(choices=[('insert', 'Создание'), ('update', 'Изменение'), ('delete', 'Удаление')], max_length=6, verbose_name='Операция')),
+                ('fields', models.JSONField(blank=True, default=list, verbose_name='Измененные поля')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Данные')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата события')),
+            ],
+            options={
+                'verbose_name': 'Событие изменения',
+                'verbose_name_plural': 'События изменений',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['model', 'object_id'], name='store_event_object_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_price_history(apps, schema_editor):
+    # Прежняя история неизвестна: текущая цена считается действующей с момента создания.
+    Product = apps.get_model('store', 'Product')
+    PriceHistory = apps.get_model('store', 'PriceHistory')
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(PriceHistory._meta.db_table)} '
+            f'(product_id, category_id, price, valid_from) '
+            f'SELECT id, category_id, price, created_at FROM {quote(Product._meta.db_table)}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_change_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, null=True, verbose_name='Цена')),
+                ('valid_from', models.DateTimeField(verbose_name='Действует с')),
+                ('category', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='store.category', verbose_name='Категория')),
+                ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='price_history', to='store.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Цена в истории',
+                'verbose_name_plural': 'История цен',
+                'ordering': ['product_id', 'valid_from'],
+                'indexes': [models.Index(fields=['product', 'valid_from', 'id', 'price'], name='store_price_asof_idx'), models.Index(fields=['category', 'valid_from', 'product', 'price'], name='store_price_cat_asof_idx'), models.Index(fields=['valid_from'], name='store_price_valid_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_price_history, migrations.RunPython.noop),
+    ]
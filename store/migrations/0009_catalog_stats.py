@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Сводка')),
+                ('position', models.PositiveBigIntegerField(default=0, verbose_name='Позиция')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Водяной знак сводки',
+                'verbose_name_plural': 'Водяные знаки сводок',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('product_count', models.PositiveIntegerField(verbose_name='Количество товаров')),
+                ('price_min', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Минимальная цена')),
+                ('price_max', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Максимальная цена')),
+                ('price_sum', models.DecimalField(decimal_places=2, max_digits=16, verbose_name='Сумма цен')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='store.category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'Статистика категории за день',
+                'verbose_name_plural': 'Статистика каталога',
+                'ordering': ['-day', 'category_id'],
+                'indexes': [models.Index(fields=['day'], name='store_stats_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('category', 'day'), name='store_stats_category_day_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_catalog_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Блокировка')),
+                ('owner', models.CharField(blank=True, max_length=32, verbose_name='Держатель')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Истекает')),
+            ],
+            options={
+                'verbose_name': 'Блокировка задачи',
+                'verbose_name_plural': 'Блокировки задач',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -1,11 +1,27 @@
-from django.db import models
+from collections import Counter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.db.models import F
 from django.utils import timezone
 
+from .signals import products_updated
+
+# Порция ID товаров для одного UPDATE и одного сигнала products_updated.
+UPDATE_BATCH_SIZE = 1000
+
 
 class Category(models.Model):
     """Модель категории товаров."""
     name = models.CharField(max_length=255, verbose_name='Название')
     description = models.TextField(blank=True, verbose_name='Описание')
+    product_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество товаров'
+    )
+    # Меняется и при изменении счетчика товаров (store.counters).
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата изменения')
 
     class Meta:
         verbose_name = 'Категория'
@@ -15,6 +31,56 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Сохранение вместе с обработчиками post_save (события outbox) в одной транзакции."""
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+class ProductQuerySet(models.QuerySet):
+    """QuerySet товаров, сообщающий о массовых обновлениях."""
+
+    def update(self, **kwargs):
+        """
+        Массовое обновление с отправкой сигнала products_updated.
+
+        QuerySet.update() не вызывает post_save, поэтому поисковый индекс
+        и другие производные данные узнают об изменениях через этот сигнал.
+        Ревизия и дата изменения затронутых товаров обновляются, как и при save().
+
+        Товары обновляются порциями по UPDATE_BATCH_SIZE в порядке id (в одной
+        транзакции), и сигнал отправляется на каждую порцию, так что список
+        ID всего набора в памяти не собирается.
+        """
+        kwargs.setdefault('revision', F('revision') + 1)
+        kwargs.setdefault('updated_at', timezone.now())
+        # Чтение ID тоже идет в БД для записи, а не в реплику.
+        self._for_write = True
+        using = self.db
+        rows = self.using(using).order_by('pk')
+        fields = set(kwargs)
+        # При переносе между категориями обработчикам нужны исходные категории порции.
+        moves = bool(fields & {'category', 'category_id'})
+        updated = 0
+        with transaction.atomic(using=using):
+            last_pk = None
+            while True:
+                chunk = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+                chunk = chunk.values_list('pk', 'category_id') if moves else chunk.values_list('pk', flat=True)
+                chunk = list(chunk[:UPDATE_BATCH_SIZE])
+                if not chunk:
+                    break
+                pks = [row[0] for row in chunk] if moves else chunk
+                previous = Counter(row[1] for row in chunk) if moves else None
+                updated += super(ProductQuerySet, rows.filter(pk__in=pks)).update(**kwargs)
+                products_updated.send(
+                    sender=self.model, pks=pks, fields=fields, using=using,
+                    previous_categories=previous,
+                )
+                last_pk = pks[-1]
+        return updated
+
 
 class Product(models.Model):
     """Модель товара."""
@@ -22,18 +88,213 @@ class Product(models.Model):
     description = models.TextField(blank=True, verbose_name='Описание')
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Цена')
     created_at = models.DateTimeField(default=timezone.now, verbose_name='Дата создания')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата изменения')
     category = models.ForeignKey(
         Category,
         on_delete=models.CASCADE,
         related_name='products',
         verbose_name='Категория'
     )
+    # Версия содержимого для ключей кеша фрагментов; растет при каждом изменении.
+    revision = models.PositiveIntegerField(default=0, editable=False, verbose_name='Ревизия')
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Товар'
         verbose_name_plural = 'Товары'
         ordering = ['-created_at']
+        indexes = [
+            # Каталог и курсорная пагинация: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='store_prod_created_idx'),
+            # Страница категории и фильтр ?category= с той же сортировкой
+            models.Index(fields=['category', '-created_at', '-id'], name='store_prod_cat_created_idx'),
+            # Ценовые диапазоны (PriceRangeFilter, фасеты, ?price=)
+            models.Index(fields=['price'], name='store_prod_price_idx'),
+            # Водяной знак каталога для условных GET (store.conditional)
+            models.Index(fields=['updated_at'], name='store_prod_updated_idx'),
+            models.Index(fields=['category', 'updated_at'], name='store_prod_cat_updated_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        """Сохранение вместе с обработчиками post_save (счетчики категорий) в одной транзакции."""
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            if not self._state.adding:
+                self._bump_revision(using)
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'revision', 'updated_at'}
+            super().save(*args, **kwargs)
+
+    def _bump_revision(self, using):
+        """
+        Увеличение ревизии в БД (revision = revision + 1), как в ProductQuerySet.update.
+
+        Ревизия перечитывается до записи строки: UPDATE уже заблокировал ее до
+        конца транзакции, а обработчики post_save (снимок outbox, ключи
+        фрагментов) видят число, а не выражение F.
+        """
+        rows = type(self)._base_manager.using(using).filter(pk=self.pk)
+        if rows.update(revision=F('revision') + 1):
+            self.revision = rows.values_list('revision', flat=True).get()
+
+
+class ChangeEvent(models.Model):
+    """
+    Событие изменения каталога (transactional outbox, store.outbox).
+
+    Записывается в той же транзакции, что и изменение; data — снимок строки
+    после изменения (для удаления — только ключевые поля).
+    """
+    INSERT = 'insert'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    OPERATIONS = [
+        (INSERT, 'Создание'),
+        (UPDATE, 'Изменение'),
+        (DELETE, 'Удаление'),
+    ]
+
+    model = models.CharField(max_length=32, verbose_name='Модель')
+    object_id = models.PositiveBigIntegerField(verbose_name='ID объекта')
+    operation = models.CharField(max_length=6, choices=OPERATIONS, verbose_name='Операция')
+    fields = models.JSONField(default=list, blank=True, verbose_name='Измененные поля')
+    data = models.JSONField(null=True, encoder=DjangoJSONEncoder, verbose_name='Данные')
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='Дата события')
+
+    class Meta:
+        verbose_name = 'Событие изменения'
+        verbose_name_plural = 'События изменений'
+        ordering = ['id']
+        indexes = [
+            # Компакция: события одного объекта
+            models.Index(fields=['model', 'object_id'], name='store_event_object_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.operation} {self.model} #{self.object_id}'
+
+
+class ConsumerOffset(models.Model):
+    """Позиция потребителя в потоке ChangeEvent: ID последнего обработанного события."""
+    consumer = models.CharField(max_length=100, unique=True, verbose_name='Потребитель')
+    position = models.PositiveBigIntegerField(default=0, verbose_name='Позиция')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата изменения')
+
+    class Meta:
+        verbose_name = 'Позиция потребителя'
+        verbose_name_plural = 'Позиции потребителей'
+        ordering = ['consumer']
+
+    def __str__(self):
+        return f'{self.consumer}: {self.position}'
+
+
+class TaskLock(models.Model):
+    """Блокировка фоновой задачи (store.locks): держатель и срок аренды."""
+    name = models.CharField(max_length=100, unique=True, verbose_name='Блокировка')
+    owner = models.CharField(max_length=32, blank=True, verbose_name='Держатель')
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name='Истекает')
+
+    class Meta:
+        verbose_name = 'Блокировка задачи'
+        verbose_name_plural = 'Блокировки задач'
+        ordering = ['name']
 
     def __str__(self):
         return self.name
 
+
+class PriceHistory(models.Model):
+    """
+    История цен товара (store.prices).
+
+    Строка — цена и категория товара, действующие с valid_from до следующей
+    строки того же товара; price = NULL — товар удален. Строки только
+    добавляются, удаляет их лишь прореживание (store.prices.compact_history).
+    Связи без ограничений внешнего ключа: история переживает удаление товара.
+    """
+    product = models.ForeignKey(
+        Product, on_delete=models.DO_NOTHING, db_constraint=False,
+        related_name='price_history', verbose_name='Товар',
+    )
+    category = models.ForeignKey(
+        Category, on_delete=models.DO_NOTHING, db_constraint=False,
+        related_name='+', verbose_name='Категория',
+    )
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, verbose_name='Цена')
+    valid_from = models.DateTimeField(verbose_name='Действует с')
+
+    class Meta:
+        verbose_name = 'Цена в истории'
+        verbose_name_plural = 'История цен'
+        # product_id, а не product: сортировка по связи добавила бы JOIN с товарами.
+        ordering = ['product_id', 'valid_from']
+        indexes = [
+            # Цена товара на момент: покрывающий индекс, id — для порядка строк
+            # с одинаковым valid_from
+            models.Index(fields=['product', 'valid_from', 'id', 'price'], name='store_price_asof_idx'),
+            # Цены категории на момент
+            models.Index(
+                fields=['category', 'valid_from', 'product', 'price'], name='store_price_cat_asof_idx',
+            ),
+            # Прореживание и удаление старых строк по диапазону времени
+            models.Index(fields=['valid_from'], name='store_price_valid_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id}: {self.price} с {self.valid_from}'
+
+
+class CategoryDailyStats(models.Model):
+    """
+    Сводка по товарам категории, созданным за один день (store.rollups).
+
+    Поддерживается задачей refresh_catalog_stats; строк с нулевым
+    количеством нет. Средняя цена — price_sum / product_count.
+    """
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name='daily_stats', verbose_name='Категория',
+    )
+    day = models.DateField(verbose_name='День')
+    product_count = models.PositiveIntegerField(verbose_name='Количество товаров')
+    price_min = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Минимальная цена')
+    price_max = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Максимальная цена')
+    price_sum = models.DecimalField(max_digits=16, decimal_places=2, verbose_name='Сумма цен')
+
+    class Meta:
+        verbose_name = 'Статистика категории за день'
+        verbose_name_plural = 'Статистика каталога'
+        ordering = ['-day', 'category_id']
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'day'], name='store_stats_category_day_uniq'),
+        ]
+        indexes = [
+            # Дашборд и date_hierarchy товаров без фильтра по категории
+            models.Index(fields=['day'], name='store_stats_day_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.category_id}: {self.day}'
+
+    @property
+    def price_avg(self):
+        return round(self.price_sum / self.product_count, 2)
+
+
+class RollupWatermark(models.Model):
+    """Водяной знак сводки: ID последней обработанной строки PriceHistory."""
+    name = models.CharField(max_length=100, unique=True, verbose_name='Сводка')
+    position = models.PositiveBigIntegerField(default=0, verbose_name='Позиция')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата изменения')
+
+    class Meta:
+        verbose_name = 'Водяной знак сводки'
+        verbose_name_plural = 'Водяные знаки сводок'
+        ordering = ['name']
+
+    def __str__(self):
+        return f'{self.name}: {self.position}'
@@ -0,0 +1,60 @@
+"""
+Кешированная навигация по категориям для боковой панели.
+
+Данные (id, название, количество товаров) читаются одним запросом из
+денормализованного счетчика Category.product_count и хранятся в двух уровнях:
+
+* LRU в памяти процесса — без сетевых обращений;
+* общий кеш Django (settings.CACHES) — один расчет на все процессы.
+
+Оба уровня ключуются версией ``category_nav``, которую увеличивают
+обработчики сигналов при изменении категорий и товаров.
+"""
+import threading
+from collections import OrderedDict
+
+from .caching import bump_version, get_cache, get_version
+from .models import Category
+
+NAMESPACE = 'category_nav'
+LOCAL_CACHE_SIZE = 8
+
+_local_cache = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _compute():
+    return list(Category.objects.values('id', 'name', 'product_count'))
+
+
+def get_category_navigation():
+    """Список категорий с количеством товаров."""
+    version = get_version(NAMESPACE)
+    with _local_lock:
+        if version in _local_cache:
+            _local_cache.move_to_end(version)
+            return _local_cache[version]
+
+    cache = get_cache()
+    key = f'store:{NAMESPACE}:{version}'
+    items = cache.get(key)
+    if items is None:
+        items = _compute()
+        cache.set(key, items)
+
+    with _local_lock:
+        _local_cache[version] = items
+        while len(_local_cache) > LOCAL_CACHE_SIZE:
+            _local_cache.popitem(last=False)
+    return items
+
+
+def invalidate_category_navigation():
+    """Сброс навигации во всех процессах через смену версии."""
+    bump_version(NAMESPACE)
+
+
+def clear_local_cache():
+    """Очистка LRU текущего процесса (для тестов)."""
+    with _local_lock:
+        _local_cache.clear()
@@ -0,0 +1,288 @@
+"""
+Поток изменений каталога (transactional outbox).
+
+Каждое создание, изменение (в том числе массовое QuerySet.update() и
+bulk_update) и удаление товара или категории записывается в таблицу
+ChangeEvent в той же транзакции, что и само изменение (store.receivers).
+Товары, загруженные bulk_create импортом, записываются record_many().
+
+Задача relay_outbox доставляет события зарегистрированным потребителям
+порциями в порядке ID. Позиция потребителя (ConsumerOffset) сдвигается в
+той же транзакции после успешной обработки порции, поэтому доставка —
+at-least-once: после сбоя порция обрабатывается повторно, и потребитель
+должен быть идемпотентным (insert и update — это upsert по object_id).
+Параллельный запуск relay пропускается: блокировка берется в БД
+(store.locks), поэтому действует между воркерами и хостами.
+
+compact_outbox удаляет события, которые прошли все потребители, а в
+недоставленном хвосте оставляет только последнее событие каждого объекта:
+data содержит полный снимок строки, поля и операция более ранних событий
+объединяются в оставшееся.
+
+Ограничения:
+
+* Category.product_count меняется без событий — это производное значение;
+* generate_catalog событий не пишет (синтетические данные);
+* на SQLite транзакции записи выполняются по одной, и ID событий
+  фиксируются по возрастанию; на PostgreSQL relay пропускает события
+  моложе STORE_OUTBOX_SETTLE_SECONDS, чтобы параллельные транзакции
+  с меньшими ID успели зафиксироваться.
+
+Счетчики (store.metrics, префикс ``outbox.``): recorded, delivered.<потребитель>,
+failed.<потребитель>, deleted, compacted.
+"""
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import locks
+from .metrics import counters
+from .models import Category, ChangeEvent, ConsumerOffset, Product
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# Модели каталога -> имя в ChangeEvent.model.
+MODELS = {Product: 'product', Category: 'category'}
+# Поля, которые остаются в событии удаления.
+DELETE_FIELDS = {Product: ('category_id',), Category: ()}
+RELAY_LOCK_TIMEOUT = 300
+
+CONSUMERS = {}
+
+
+def consumer(name):
+    """
+    Регистрация потребителя событий под именем name.
+
+    Функция получает список ChangeEvent одной порции в порядке ID.
+    """
+    def decorator(func):
+        CONSUMERS[name] = func
+        return func
+    return decorator
+
+
+def snapshot(instance):
+    """Значения полей строки (attname -> значение) для ChangeEvent.data."""
+    return {field.attname: field.value_from_object(instance) for field in instance._meta.concrete_fields}
+
+
+def record(instance, operation, fields=None, using=DEFAULT_DB_ALIAS):
+    """Запись события об одном объекте; пустой fields — изменены все поля."""
+    model = type(instance)
+    if operation == ChangeEvent.DELETE:
+        data = {name: getattr(instance, name) for name in DELETE_FIELDS[model]}
+    else:
+        data = snapshot(instance)
+    ChangeEvent.objects.using(using).create(
+        model=MODELS[model], object_id=instance.pk, operation=operation,
+        fields=sorted(fields or ()), data=data,
+    )
+    counters.incr('outbox.recorded')
+
+
+def _insert_events(model, rows, operation, fields, using):
+    """
+    Вставка событий executemany без создания экземпляров ChangeEvent.
+
+    rows — словари снимков с ключом id; при массовых изменениях на сотни
+    тысяч строк bulk_create тратит на подготовку значений больше, чем сам INSERT.
+    """
+    table = ChangeEvent._meta.db_table
+    connection = connections[using]
+    columns = ', '.join(connection.ops.quote_name(name) for name in (
+        'model', 'object_id', 'operation', 'fields', 'data', 'created_at'
+    ))
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    fields = json.dumps(sorted(fields or ()))
+    params = [
+        (MODELS[model], row['id'], operation, fields,
+         json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False), created_at)
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {connection.ops.quote_name(table)} ({columns}) '
+            f'VALUES (%s, %s, %s, %s, %s, %s)', params,
+        )
+    counters.incr('outbox.recorded', len(params))
+    return len(params)
+
+
+def record_many(instances, operation, fields=None, using=DEFAULT_DB_ALIAS):
+    """Запись событий о сохраненных объектах одного класса (например, после bulk_create)."""
+    instances = list(instances)
+    if not instances:
+        return 0
+    return _insert_events(type(instances[0]), map(snapshot, instances), operation, fields, using)
+
+
+def record_bulk(model, pks, operation, fields=None, using=DEFAULT_DB_ALIAS):
+    """Запись событий о массовом изменении: снимки строк одним запросом на порцию."""
+    columns = [field.attname for field in model._meta.concrete_fields]
+    pks = sorted(pks)
+    recorded = 0
+    for start in range(0, len(pks), BATCH_SIZE):
+        rows = model._base_manager.using(using).filter(
+            pk__in=pks[start:start + BATCH_SIZE]
+        ).order_by('pk').values(*columns)
+        recorded += _insert_events(model, rows, operation, fields, using)
+    return recorded
+
+
+def _pending_events(using):
+    events = ChangeEvent.objects.using(using).order_by('pk')
+    settle = getattr(settings, 'STORE_OUTBOX_SETTLE_SECONDS', 0)
+    if settle and connections[using].vendor != 'sqlite':
+        events = events.filter(created_at__lt=timezone.now() - timedelta(seconds=settle))
+    return events
+
+
+def deliver(name, handler, batch_size=BATCH_SIZE, max_batches=None, using=DEFAULT_DB_ALIAS):
+    """
+    Доставка событий одному потребителю, начиная с его позиции.
+
+    Returns:
+        количество доставленных событий
+    """
+    delivered = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic(using=using):
+            offset, _ = ConsumerOffset.objects.using(using).select_for_update().get_or_create(
+                consumer=name
+            )
+            events = list(_pending_events(using).filter(pk__gt=offset.position)[:batch_size])
+            if not events:
+                break
+            handler(events)
+            offset.position = events[-1].pk
+            offset.save(update_fields=['position', 'updated_at'])
+        delivered += len(events)
+        batches += 1
+        counters.incr(f'outbox.delivered.{name}', len(events))
+        if len(events) < batch_size:
+            break
+    return delivered
+
+
+def relay(batch_size=BATCH_SIZE, max_batches=None, using=DEFAULT_DB_ALIAS):
+    """
+    Доставка новых событий всем потребителям.
+
+    Ошибка одного потребителя не останавливает остальных: его позиция не
+    сдвигается, и порция будет доставлена повторно при следующем запуске.
+
+    Returns:
+        {потребитель: доставлено событий или None при ошибке}
+    """
+    with locks.hold(f'store:outbox:relay:{using}', RELAY_LOCK_TIMEOUT, using=using) as acquired:
+        if not acquired:
+            return {}
+        results = {}
+        for name, handler in CONSUMERS.items():
+            try:
+                results[name] = deliver(name, handler, batch_size, max_batches, using)
+            except Exception:
+                counters.incr(f'outbox.failed.{name}')
+                logger.exception(f'Потребитель {name} не обработал порцию событий')
+                results[name] = None
+        return results
+
+
+def _merge(survivor, events):
+    """Поля и операция более ранних событий объекта в последнем событии."""
+    if survivor.operation == ChangeEvent.UPDATE and events[0].operation == ChangeEvent.INSERT:
+        # Создание «поглощает» последующие изменения.
+        survivor.operation = ChangeEvent.INSERT
+        survivor.fields = []
+    elif survivor.operation == ChangeEvent.UPDATE:
+        changed = [survivor.fields, *(event.fields for event in events)]
+        # Пустой список — изменены все поля (save() без update_fields).
+        survivor.fields = sorted(set().union(*changed)) if all(changed) else []
+
+
+def _compact_objects(events, model, object_ids):
+    """
+    Компакция недоставленных событий объектов object_ids одной модели.
+
+    Returns:
+        количество удаленных перекрытых событий
+    """
+    groups = {}
+    for event in events.filter(model=model, object_id__in=object_ids).order_by('pk'):
+        groups.setdefault(event.object_id, []).append(event)
+    obsolete = []
+    survivors = []
+    for group in groups.values():
+        *earlier, survivor = group
+        _merge(survivor, earlier)
+        survivors.append(survivor)
+        obsolete.extend(event.pk for event in earlier)
+    events.bulk_update(survivors, ['operation', 'fields'], batch_size=BATCH_SIZE)
+    compacted = 0
+    for start in range(0, len(obsolete), BATCH_SIZE):
+        compacted += events.filter(pk__in=obsolete[start:start + BATCH_SIZE]).delete()[0]
+    return compacted
+
+
+def compact(using=DEFAULT_DB_ALIAS):
+    """
+    Компакция outbox.
+
+    Недоставленный хвост обрабатывается порциями по BATCH_SIZE объектов в
+    порядке object_id: в памяти — только события объектов одной порции.
+
+    Returns:
+        {'deleted': удалено доставленных, 'compacted': удалено перекрытых}
+    """
+    offsets = ConsumerOffset.objects.using(using).filter(consumer__in=list(CONSUMERS))
+    positions = dict(offsets.values_list('consumer', 'position'))
+    delivered = min((positions.get(name, 0) for name in CONSUMERS), default=0)
+
+    compacted = 0
+    with transaction.atomic(using=using):
+        deleted, _ = ChangeEvent.objects.using(using).filter(pk__lte=delivered).delete()
+        events = ChangeEvent.objects.using(using).filter(pk__gt=delivered)
+        for model in MODELS.values():
+            last_id = -1
+            while True:
+                object_ids = list(
+                    events.filter(model=model, object_id__gt=last_id).order_by()
+                    .values('object_id').annotate(total=Count('pk')).filter(total__gt=1)
+                    .order_by('object_id').values_list('object_id', flat=True)[:BATCH_SIZE]
+                )
+                if not object_ids:
+                    break
+                compacted += _compact_objects(events, model, object_ids)
+                last_id = object_ids[-1]
+
+    counters.incr('outbox.deleted', deleted)
+    counters.incr('outbox.compacted', compacted)
+    return {'deleted': deleted, 'compacted': compacted}
+
+
+def get_metrics():
+    """Счетчики outbox."""
+    return counters.snapshot('outbox.')
+
+
+@consumer('log')
+def log_events(events):
+    """Структурированная запись каждого события в лог store.outbox."""
+    for event in events:
+        logger.info(
+            f'{event.operation} {event.model} #{event.object_id}',
+            extra={
+                'event': f'{event.model}_{event.operation}',
+                'event_id': event.pk,
+                'object_id': event.object_id,
+                'fields': event.fields,
+            },
+        )
@@ -0,0 +1,188 @@
+"""
+Keyset (курсорная) пагинация каталога.
+
+В отличие от django.core.paginator.Paginator не выполняет COUNT(*) и не
+использует OFFSET: следующая страница выбирается условием по ключу
+сортировки последней показанной записи, поэтому глубокие страницы
+открываются так же быстро, как первая.
+
+Курсор — непрозрачная строка (base64 от JSON), содержащая значения ключа
+(created_at, id) и направление перехода.
+
+Для списков с номерами страниц (админка) EstimatedCountPaginator заменяет
+COUNT(*) оценкой количества.
+"""
+import base64
+import binascii
+import json
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+# Порядок, совпадающий с Product.Meta.ordering, с id для однозначности.
+CURSOR_ORDERING = ('-created_at', '-id')
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    """Курсор не удалось разобрать."""
+
+
+def encode_cursor(obj, direction=NEXT):
+    """Курсор, указывающий на позицию после (или до) объекта obj."""
+    payload = json.dumps([obj.created_at.isoformat(), obj.pk, direction])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разбор курсора в кортеж (created_at, id, direction)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk, direction = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if created_at is None or direction not in (NEXT, PREVIOUS):
+        raise InvalidCursor(cursor)
+    return created_at, pk, direction
+
+
+class CursorPage:
+    """Страница курсорной пагинации."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинатор по ключу (created_at, id) в порядке убывания."""
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        """Страница после/до курсора; без курсора — первая страница."""
+        if not cursor:
+            rows = list(self.queryset.order_by(*CURSOR_ORDERING)[:self.per_page + 1])
+            return self._build(rows, has_more=len(rows) > self.per_page, first=True)
+
+        created_at, pk, direction = decode_cursor(cursor)
+        if direction == NEXT:
+            queryset = self.queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            ).order_by(*CURSOR_ORDERING)
+        else:
+            queryset = self.queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            ).order_by('created_at', 'id')
+
+        # Лишняя запись показывает, есть ли страницы дальше, без COUNT(*).
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        if direction == PREVIOUS:
+            rows = rows[:self.per_page][::-1]
+            page = CursorPage(rows)
+            if rows:
+                page.next_cursor = encode_cursor(rows[-1], NEXT)
+                if has_more:
+                    page.previous_cursor = encode_cursor(rows[0], PREVIOUS)
+            return page
+        return self._build(rows, has_more=has_more, first=False)
+
+    def _build(self, rows, has_more, first):
+        rows = rows[:self.per_page]
+        page = CursorPage(rows)
+        if rows and has_more:
+            page.next_cursor = encode_cursor(rows[-1], NEXT)
+        if rows and not first:
+            page.previous_cursor = encode_cursor(rows[0], PREVIOUS)
+        return page
+
+
+def use_cursor_pagination(request):
+    """Включен ли курсорный режим для запроса (?pagination=cursor или ?cursor=...)."""
+    return request.GET.get('pagination') == 'cursor' or 'cursor' in request.GET
+
+
+def paginate_by_cursor(request, queryset, per_page):
+    """Курсорная страница для запроса; битый курсор — 404, как у Paginator."""
+    try:
+        return CursorPaginator(queryset, per_page).page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404('Некорректный курсор пагинации.')
+
+
+def pagination_links(request, page):
+    """
+    Query-строки ссылок на соседние страницы с сохранением фильтров.
+
+    Работает и для обычной страницы Django, и для CursorPage.
+    """
+    params = request.GET.copy()
+    for key in ('page', 'cursor'):
+        params.pop(key, None)
+
+    links = {}
+    if isinstance(page, CursorPage):
+        params['pagination'] = 'cursor'
+        for name, cursor in (('previous', page.previous_cursor), ('next', page.next_cursor)):
+            if cursor is not None:
+                params['cursor'] = cursor
+                links[name] = params.urlencode()
+        return links
+
+    if page.has_previous():
+        params['page'] = page.previous_page_number()
+        links['previous'] = params.urlencode()
+    if page.has_next():
+        params['page'] = page.next_page_number()
+        links['next'] = params.urlencode()
+    return links
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, который берет количество из оценки вместо COUNT(*).
+
+    estimate — функция без аргументов, возвращающая оценку или None (оценки
+    нет). Оценка используется, только если она не меньше threshold: на
+    небольших выборках точный COUNT(*) дешев. threshold=None отключает оценку.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True,
+                 estimate=None, threshold=None):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.estimate = estimate
+        self.threshold = threshold
+
+    @cached_property
+    def count(self):
+        if self.estimate is not None and self.threshold is not None:
+            estimated = self.estimate()
+            if estimated is not None and estimated >= self.threshold:
+                return estimated
+        return super().count
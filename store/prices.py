@@ -0,0 +1,136 @@
+"""
+История цен товаров и запросы «цена на момент времени».
+
+Строка PriceHistory добавляется при каждом изменении цены или категории
+товара — через save() (форма редактирования, админка), QuerySet.update()
+и bulk_update (переоценка, действия админки), импорт — и при удалении
+товара (price = NULL). Запись — один INSERT ... SELECT из таблицы товаров
+в транзакции изменения, valid_from = Product.updated_at.
+
+Запросы на момент времени читают только покрывающие индексы
+(product, valid_from, id, price) и (category, valid_from, product, price).
+
+compact_history() прореживает историю: последние full_resolution_days
+хранятся полностью, более старые строки — одна на товар за день (и без
+повторов цены), а старше retention_days остается только последняя строка
+товара, нужная для ответа на запросы после границы хранения.
+"""
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import PriceHistory, Product
+
+BATCH_SIZE = 500
+# Поля товара, изменение которых записывается в историю.
+HISTORY_FIELDS = {'price', 'category', 'category_id'}
+
+
+def record_prices(product_ids, using=DEFAULT_DB_ALIAS):
+    """Текущие цены и категории товаров -> новые строки истории (INSERT ... SELECT)."""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    product_ids = list(product_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(product_ids), BATCH_SIZE):
+            chunk = product_ids[start:start + BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {quote(PriceHistory._meta.db_table)} '
+                f'(product_id, category_id, price, valid_from) '
+                f'SELECT id, category_id, price, updated_at FROM {quote(Product._meta.db_table)} '
+                f'WHERE id IN ({", ".join(["%s"] * len(chunk))})',
+                chunk,
+            )
+
+
+def record_removed(product, using=DEFAULT_DB_ALIAS):
+    """Строка-отметка об удалении товара."""
+    PriceHistory.objects.using(using).create(
+        product_id=product.pk, category_id=product.category_id, price=None,
+        valid_from=timezone.now(),
+    )
+
+
+def _latest(at):
+    """ID последней строки товара OuterRef('product_id') с valid_from <= at."""
+    return PriceHistory.objects.filter(
+        product_id=OuterRef('product_id'), valid_from__lte=at,
+    ).order_by('-valid_from', '-pk').values('pk')[:1]
+
+
+def price_at(product_id, at=None):
+    """Цена товара на момент at (по умолчанию — сейчас); None, если товара не было."""
+    return (
+        PriceHistory.objects.filter(product_id=product_id, valid_from__lte=at or timezone.now())
+        .order_by('-valid_from', '-pk')
+        .values_list('price', flat=True)
+        .first()
+    )
+
+
+def category_prices_queryset(category_id, at):
+    """(product_id, price) товаров, которые на момент at были в категории и не удалены."""
+    return PriceHistory.objects.filter(
+        category_id=category_id, valid_from__lte=at, price__isnull=False,
+        pk=Subquery(_latest(at)),
+    ).order_by().values_list('product_id', 'price')
+
+
+def category_prices_at(category_id, at=None):
+    """Цены товаров категории на момент at (по умолчанию — сейчас): {product_id: price}."""
+    return dict(category_prices_queryset(category_id, at or timezone.now()))
+
+
+def _downsample(start, end, using):
+    """ID лишних строк в [start, end): остается последняя строка товара за день без повторов."""
+    rows = (
+        PriceHistory.objects.using(using)
+        .filter(valid_from__gte=start, valid_from__lt=end)
+        .order_by('product_id', 'valid_from', 'pk')
+        .values_list('pk', 'product_id', 'category_id', 'price', 'valid_from')
+    )
+    obsolete = []
+    kept = None  # (pk, product_id, category_id, price, день) последней оставленной строки
+    for pk, product_id, category_id, price, valid_from in rows.iterator(chunk_size=2000):
+        day = timezone.localdate(valid_from)
+        if kept and kept[1] == product_id:
+            if kept[4] == day:
+                # Из строк одного дня остается последняя.
+                obsolete.append(kept[0])
+            elif (kept[2], kept[3]) == (category_id, price):
+                # Повтор цены: действует более ранняя строка.
+                obsolete.append(pk)
+                continue
+        kept = (pk, product_id, category_id, price, day)
+    return obsolete
+
+
+def compact_history(retention_days=730, full_resolution_days=90, now=None, using=DEFAULT_DB_ALIAS):
+    """
+    Прореживание истории цен.
+
+    Returns:
+        {'downsampled': удалено при прореживании, 'expired': удалено за границей хранения}
+    """
+    now = now or timezone.now()
+    retention = now - timedelta(days=retention_days)
+    full_resolution = now - timedelta(days=full_resolution_days)
+    history = PriceHistory.objects.using(using)
+
+    obsolete = _downsample(retention, full_resolution, using)
+    downsampled = 0
+    for start in range(0, len(obsolete), BATCH_SIZE):
+        downsampled += history.filter(pk__in=obsolete[start:start + BATCH_SIZE]).delete()[0]
+
+    # За границей хранения нужна только последняя строка товара; если это
+    # отметка об удалении — не нужна и она.
+    newer = history.filter(
+        Q(valid_from__gt=OuterRef('valid_from')) | Q(valid_from=OuterRef('valid_from'), pk__gt=OuterRef('pk')),
+        product_id=OuterRef('product_id'), valid_from__lt=retention,
+    )
+    expired = history.filter(valid_from__lt=retention).filter(
+        Exists(newer) | Q(price__isnull=True)
+    ).delete()[0]
+    return {'downsampled': downsampled, 'expired': expired}
@@ -0,0 +1,199 @@
+"""
+Обработчики сигналов приложения store.
+
+Подключаются в StoreConfig.ready().
+"""
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from . import outbox, prices, search
+from .counters import adjust_moved_products, adjust_product_count, recount_categories
+from .facets import invalidate_facets
+from .navigation import invalidate_category_navigation
+from .models import Category, ChangeEvent, Product
+from .routing import track_replica_latency
+from .sqlite import configure_connection
+from .signals import products_updated
+
+# Поля товара, от которых зависит поисковый индекс.
+SEARCH_FIELDS = {'name', 'description', 'category', 'category_id'}
+# Поля, от которых зависит количество товаров в категориях.
+CATEGORY_FIELDS = {'category', 'category_id'}
+# Исходное значение поля, не загруженного only()/defer(): читается перед сохранением.
+DEFERRED = object()
+
+
+@receiver(post_init, sender=Product)
+def remember_loaded_category(sender, instance, **kwargs):
+    """Запоминание исходной категории, чтобы заметить перенос товара без запроса к БД."""
+    instance._loaded_category_id = instance.__dict__.get('category_id', DEFERRED)
+
+
+@receiver(pre_save, sender=Product)
+def load_deferred_originals(sender, instance, using, **kwargs):
+    """Исходные категория и цена товара, загруженного без них (only(), defer()), — из БД."""
+    loaded_price, loaded_category_id = instance._loaded_price
+    if instance._state.adding or DEFERRED not in (
+        instance._loaded_category_id, loaded_price, loaded_category_id,
+    ):
+        return
+    category_id, price = (
+        Product._base_manager.using(using).filter(pk=instance.pk)
+        .values_list('category_id', 'price').first() or (None, None)
+    )
+    if instance._loaded_category_id is DEFERRED:
+        instance._loaded_category_id = category_id
+    instance._loaded_price = (
+        price if loaded_price is DEFERRED else loaded_price,
+        category_id if loaded_category_id is DEFERRED else loaded_category_id,
+    )
+
+
+def category_changed(instance, created):
+    """Новый товар или товар, перенесенный в другую категорию."""
+    return created or instance._loaded_category_id != instance.category_id
+
+
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, using, **kwargs):
+    """Обновление товара в поисковом индексе после сохранения."""
+    search.index_products([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Product)
+def update_category_counts_on_save(sender, instance, created, using, **kwargs):
+    """Счетчики и навигация меняются при создании и переносе товара."""
+    if category_changed(instance, created):
+        if not created:
+            adjust_product_count(instance._loaded_category_id, -1, using=using)
+        adjust_product_count(instance.category_id, 1, using=using)
+        invalidate_category_navigation()
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(products_updated, sender=Product)
+def refresh_facets(sender, **kwargs):
+    """Любое изменение товаров сбрасывает закешированные фасеты."""
+    invalidate_facets()
+
+
+@receiver(post_delete, sender=Product)
+def unindex_deleted_product(sender, instance, using, **kwargs):
+    """Удаление товара из поискового индекса."""
+    search.remove_products([instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Product)
+def update_category_counts_on_delete(sender, instance, using, **kwargs):
+    """Уменьшение счетчика категории удаленного товара."""
+    adjust_product_count(instance.category_id, -1, using=using)
+    invalidate_category_navigation()
+
+
+@receiver(products_updated, sender=Product)
+def index_updated_products(sender, pks, fields, using, previous_categories=None, **kwargs):
+    """Переиндексация и счетчики категорий после массового QuerySet.update()."""
+    if fields & SEARCH_FIELDS:
+        search.index_products(pks, using=using)
+    if fields & CATEGORY_FIELDS:
+        if previous_categories is not None:
+            adjust_moved_products(pks, previous_categories, using=using)
+        else:
+            # Исходные категории неизвестны — пересчет одним GROUP BY.
+            recount_categories(using=using)
+        invalidate_category_navigation()
+
+
+@receiver(post_init, sender=Product)
+def remember_loaded_price(sender, instance, **kwargs):
+    """Запоминание исходных цены и категории для истории цен."""
+    instance._loaded_price = (
+        instance.__dict__.get('price', DEFERRED), instance.__dict__.get('category_id', DEFERRED),
+    )
+
+
+@receiver(post_save, sender=Product)
+def record_price_on_save(sender, instance, created, using, **kwargs):
+    """Строка истории цен при создании товара и изменении его цены или категории."""
+    current = (instance.price, instance.category_id)
+    if created or instance._loaded_price != current:
+        prices.record_prices([instance.pk], using=using)
+    instance._loaded_price = current
+
+
+@receiver(post_delete, sender=Product)
+def record_price_on_delete(sender, instance, using, **kwargs):
+    prices.record_removed(instance, using=using)
+
+
+@receiver(products_updated, sender=Product)
+def record_updated_prices(sender, pks, fields, using, **kwargs):
+    """История цен после массового QuerySet.update() и bulk_update()."""
+    if fields & prices.HISTORY_FIELDS:
+        prices.record_prices(pks, using=using)
+
+
+@receiver(post_init, sender=Category)
+def remember_loaded_name(sender, instance, **kwargs):
+    """Запоминание исходного названия, чтобы заметить переименование категории."""
+    instance._loaded_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=Category)
+def bump_renamed_category_products(sender, instance, created, using, **kwargs):
+    """Название категории входит в фрагменты товаров — их ревизия растет."""
+    if not created and instance._loaded_name != instance.name:
+        Product.objects.using(using).filter(category_id=instance.pk).update(
+            revision=F('revision') + 1
+        )
+    instance._loaded_name = instance.name
+
+
+@receiver(post_save, sender=Category)
+def index_category_products(sender, instance, created, using, **kwargs):
+    """Переименование категории меняет документы всех её товаров."""
+    if not created:
+        search.index_category(instance.pk, using=using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def refresh_navigation_on_category_change(sender, **kwargs):
+    """Любое изменение категорий сбрасывает закешированную навигацию."""
+    invalidate_category_navigation()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+def record_saved(sender, instance, created, update_fields, using, **kwargs):
+    """Событие outbox о создании или изменении в транзакции сохранения."""
+    operation = ChangeEvent.INSERT if created else ChangeEvent.UPDATE
+    outbox.record(instance, operation, update_fields, using=using)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def record_deleted(sender, instance, using, **kwargs):
+    outbox.record(instance, ChangeEvent.DELETE, using=using)
+
+
+@receiver(products_updated, sender=Product)
+def record_updated_products(sender, pks, fields, using, **kwargs):
+    """События outbox о товарах, измененных QuerySet.update() и bulk_update()."""
+    outbox.record_bulk(sender, pks, ChangeEvent.UPDATE, fields, using=using)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """PRAGMA профиля БД для каждого нового соединения SQLite."""
+    configure_connection(connection)
+
+
+@receiver(connection_created)
+def time_replica_queries(sender, connection, **kwargs):
+    """Замер времени запросов к репликам для выбора least_latency."""
+    track_replica_latency(connection)
@@ -0,0 +1,269 @@
+"""
+Массовая переоценка товаров по правилам.
+
+Правило задает условия отбора (категория, диапазон цен) и изменение цены:
+процент, абсолютную надбавку или новую цену. К каждому товару применяется
+первое подходящее правило набора. Новая цена считается в Decimal и
+округляется до копеек по ROUND_HALF_UP, поэтому результат не зависит от
+того, как БД хранит DECIMAL (в SQLite это REAL).
+
+Переоценка идет порциями по диапазонам id (``WHERE id BETWEEN a AND b``),
+каждая порция — отдельная короткая транзакция: SELECT подходящих строк и
+UPDATE ... CASE через bulk_update. Блокировки держатся только на время
+порции, а прерванный запуск можно продолжить с первого необработанного id.
+"""
+import time
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Max, Min, Q
+
+from .models import Product
+
+CENTS = Decimal('0.01')
+# Переоценка не опускает цену ниже копейки (validate_price требует цену > 0)
+# и не поднимает выше максимума Product.price (max_digits=10, decimal_places=2).
+MIN_PRICE = CENTS
+_price_field = Product._meta.get_field('price')
+MAX_PRICE = Decimal(10) ** (_price_field.max_digits - _price_field.decimal_places) - CENTS
+CHUNK_SIZE = 1000
+
+
+def _decimal(value, name):
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f'Некорректное число в поле {name}: {value!r}')
+
+
+class RepricingRule:
+    """Условия отбора товаров и изменение цены."""
+
+    ACTIONS = ('percent', 'amount', 'price')
+
+    def __init__(self, category_id=None, min_price=None, max_price=None,
+                 percent=None, amount=None, price=None):
+        """
+        Args:
+            category_id: только товары категории
+            min_price: цена не ниже (включительно)
+            max_price: цена ниже (не включительно)
+            percent: изменение в процентах (10 — на 10% дороже, -10 — дешевле)
+            amount: абсолютное изменение в рублях
+            price: новая цена
+        """
+        values = {'percent': percent, 'amount': amount, 'price': price}
+        actions = [name for name, value in values.items() if value is not None]
+        if len(actions) != 1:
+            raise ValueError('Правило должно задавать ровно одно из: percent, amount, price.')
+        self.action = actions[0]
+        self.value = _decimal(values[self.action], self.action)
+        if self.action == 'price' and self.value < MIN_PRICE:
+            raise ValueError('Новая цена должна быть больше нуля.')
+        if self.action == 'price' and self.value > MAX_PRICE:
+            raise ValueError(f'Новая цена не может превышать {MAX_PRICE}.')
+        self.category_id = int(category_id) if category_id is not None else None
+        self.min_price = _decimal(min_price, 'min_price') if min_price is not None else None
+        self.max_price = _decimal(max_price, 'max_price') if max_price is not None else None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Правило из словаря (аргументы задачи Celery, JSON-файл)."""
+        unknown = set(data) - {'category_id', 'min_price', 'max_price', *cls.ACTIONS}
+        if unknown:
+            raise ValueError(f'Неизвестные поля правила: {", ".join(sorted(unknown))}')
+        return cls(**data)
+
+    def as_dict(self):
+        """Словарь, пригодный для JSON; обратная операция — from_dict()."""
+        data = {self.action: str(self.value)}
+        if self.category_id is not None:
+            data['category_id'] = self.category_id
+        if self.min_price is not None:
+            data['min_price'] = str(self.min_price)
+        if self.max_price is not None:
+            data['max_price'] = str(self.max_price)
+        return data
+
+    def q(self):
+        """Условие отбора для QuerySet товаров."""
+        conditions = {}
+        if self.category_id is not None:
+            conditions['category_id'] = self.category_id
+        if self.min_price is not None:
+            conditions['price__gte'] = self.min_price
+        if self.max_price is not None:
+            conditions['price__lt'] = self.max_price
+        # Пустой Q() при объединении через | и ~ теряет смысл «все товары».
+        return Q(**conditions) if conditions else Q(pk__isnull=False)
+
+    def matches(self, category_id, price):
+        return (
+            (self.category_id is None or self.category_id == category_id)
+            and (self.min_price is None or price >= self.min_price)
+            and (self.max_price is None or price < self.max_price)
+        )
+
+    def apply(self, price):
+        """Новая цена, округленная до копеек и ограниченная [MIN_PRICE, MAX_PRICE]."""
+        if self.action == 'percent':
+            new_price = price * (100 + self.value) / 100
+        elif self.action == 'amount':
+            new_price = price + self.value
+        else:
+            new_price = self.value
+        return min(max(new_price.quantize(CENTS, rounding=ROUND_HALF_UP), MIN_PRICE), MAX_PRICE)
+
+    def __str__(self):
+        change = {
+            'percent': f'{self.value:+}%',
+            'amount': f'{self.value:+} ₽',
+            'price': f'= {self.value} ₽',
+        }[self.action]
+        conditions = []
+        if self.category_id is not None:
+            conditions.append(f'категория {self.category_id}')
+        if self.min_price is not None or self.max_price is not None:
+            conditions.append(f'цена {self.min_price or 0}–{self.max_price or "∞"}')
+        return f'{change} ({", ".join(conditions)})' if conditions else change
+
+
+def parse_rules(data):
+    """Список правил из списка словарей."""
+    rules = [RepricingRule.from_dict(item) for item in data]
+    if not rules:
+        raise ValueError('Набор правил пуст.')
+    return rules
+
+
+class RepricingStats:
+    """Счетчики запуска переоценки."""
+
+    def __init__(self):
+        self.chunks = 0
+        self.matched = 0
+        self.updated = 0
+        self.next_id = None
+        self.last_id = None
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'chunks': self.chunks,
+            'matched': self.matched,
+            'updated': self.updated,
+            'next_id': self.next_id,
+            'last_id': self.last_id,
+            'elapsed': round(self.elapsed, 3),
+        }
+
+
+class Repricer:
+    """Применение набора правил к товарам порциями по диапазонам id."""
+
+    def __init__(self, rules, queryset=None, chunk_size=CHUNK_SIZE, using=DEFAULT_DB_ALIAS):
+        """
+        Args:
+            rules: правила RepricingRule, применяется первое подходящее
+            queryset: ограничение набора товаров (например, выбор в админке)
+            chunk_size: ширина диапазона id одной порции
+        """
+        self.rules = list(rules)
+        if not self.rules:
+            raise ValueError('Набор правил пуст.')
+        self.using = queryset.db if queryset is not None else using
+        self.queryset = (queryset if queryset is not None else Product.objects.using(using)).order_by()
+        self.chunk_size = chunk_size
+        self.last_stats = None
+
+    def matching_q(self):
+        q = self.rules[0].q()
+        for rule in self.rules[1:]:
+            q |= rule.q()
+        return q
+
+    def rule_for(self, category_id, price):
+        for rule in self.rules:
+            if rule.matches(category_id, price):
+                return rule
+        return None
+
+    def preview(self):
+        """
+        Сколько товаров затронет каждое правило — одним агрегирующим запросом.
+
+        Returns:
+            {'total': int, 'rules': [{'rule': str, 'count': int}, ...]}
+        """
+        aggregates = {}
+        previous = None
+        for index, rule in enumerate(self.rules):
+            condition = rule.q() if previous is None else rule.q() & ~previous
+            aggregates[f'rule_{index}'] = Count('pk', filter=condition)
+            previous = rule.q() if previous is None else previous | rule.q()
+        row = self.queryset.aggregate(**aggregates)
+        counts = [row[f'rule_{index}'] for index in range(len(self.rules))]
+        return {
+            'total': sum(counts),
+            'rules': [{'rule': str(rule), 'count': count} for rule, count in zip(self.rules, counts)],
+        }
+
+    def bounds(self):
+        """Диапазон id подходящих товаров: (первый, последний) или (None, None)."""
+        row = self.queryset.filter(self.matching_q()).aggregate(first=Min('pk'), last=Max('pk'))
+        return row['first'], row['last']
+
+    def run(self, start_id=None, end_id=None, progress=None):
+        """
+        Переоценка порциями.
+
+        Args:
+            start_id, end_id: диапазон id (по умолчанию — все подходящие товары);
+                для продолжения прерванного запуска передается stats.next_id —
+                первый id после последней зафиксированной порции
+            progress: функция (stats, done, total), вызываемая после каждой порции
+
+        Счетчики текущего запуска доступны в self.last_stats и после
+        исключения (например, SoftTimeLimitExceeded в задаче Celery).
+        """
+        stats = self.last_stats = RepricingStats()
+        first, last = self.bounds()
+        if first is None:
+            return stats
+        start = max(first, start_id) if start_id is not None else first
+        last = min(last, end_id) if end_id is not None else last
+        stats.last_id = last
+        while start <= last:
+            end = min(start + self.chunk_size - 1, last)
+            stats.next_id = start
+            self._reprice_chunk(start, end, stats)
+            # Порция зафиксирована: продолжение не должно применить правила повторно,
+            # даже если прерывание придет во время progress().
+            stats.next_id = end + 1
+            stats.chunks += 1
+            start = end + 1
+            if progress is not None:
+                progress(stats, done=end - first + 1, total=last - first + 1)
+        stats.next_id = None
+        return stats
+
+    def _reprice_chunk(self, start, end, stats):
+        with transaction.atomic(using=self.using):
+            rows = (
+                self.queryset.filter(self.matching_q(), pk__range=(start, end))
+                .select_for_update()
+                .values_list('pk', 'category_id', 'price')
+            )
+            changed = []
+            for pk, category_id, price in rows:
+                stats.matched += 1
+                new_price = self.rule_for(category_id, price).apply(price)
+                if new_price != price:
+                    changed.append(Product(pk=pk, price=new_price))
+            if changed:
+                Product.objects.using(self.using).bulk_update(changed, ['price'])
+                stats.updated += len(changed)
@@ -0,0 +1,204 @@
+"""
+Сводная статистика каталога по категориям и дням (CategoryDailyStats).
+
+Строка сводки — товары категории, созданные за один день (по местному
+времени): количество, минимальная, максимальная цена и сумма цен. На ней
+строятся дашборд статистики и date_hierarchy списка товаров в админке,
+без агрегатов по всей таблице товаров.
+
+Сводка обновляется инкрементально задачей refresh_catalog_stats: источник
+изменений — история цен (store.prices), куда попадают создание, изменение
+цены или категории и удаление товара. refresh() читает строки PriceHistory
+новее водяного знака (RollupWatermark) и пересчитывает только затронутые
+пары (категория, день): новую и прежнюю категорию товара в день его
+создания. Для удаленного товара день создания неизвестен — категория
+пересчитывается целиком.
+
+Ограничения:
+
+* сводка отстает от каталога на период запуска задачи;
+* generate_catalog историю цен не пишет и пересчитывает сводку своих
+  категорий сам (rebuild);
+* ID истории, как и ID событий outbox, фиксируются по возрастанию только
+  на SQLite; на других БД пропускаются строки моложе
+  STORE_OUTBOX_SETTLE_SECONDS.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import locks
+from .models import CategoryDailyStats, PriceHistory, Product, RollupWatermark
+
+NAME = 'category_daily'
+BATCH_SIZE = 5000
+QUERY_BATCH_SIZE = 500
+LOCK_TIMEOUT = 300
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _aggregate(products):
+    """Строки сводки по товарам: GROUP BY категория, день создания."""
+    return (
+        products.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('category_id', 'day')
+        .annotate(
+            product_count=Count('id'), price_min=Min('price'),
+            price_max=Max('price'), price_sum=Sum('price'),
+        )
+    )
+
+
+def _recompute(category_id, days, using):
+    """
+    Пересчет сводки категории за дни days (None — за все дни).
+
+    Returns:
+        количество записанных строк сводки
+    """
+    products = Product.objects.using(using).filter(category_id=category_id)
+    stats = CategoryDailyStats.objects.using(using).filter(category_id=category_id)
+    if days is not None:
+        first, last = min(days), max(days)
+        products = products.filter(
+            created_at__gte=_start_of(first), created_at__lt=_start_of(last + timedelta(days=1)),
+        )
+        stats = stats.filter(day__in=sorted(days))
+    rows = [
+        CategoryDailyStats(**row) for row in _aggregate(products)
+        if days is None or row['day'] in days
+    ]
+    stats.delete()
+    CategoryDailyStats.objects.using(using).bulk_create(rows, batch_size=QUERY_BATCH_SIZE)
+    return len(rows)
+
+
+def _pending(position, using):
+    """Строки истории новее водяного знака с категорией товара до них."""
+    previous = PriceHistory.objects.using(using).filter(
+        product_id=OuterRef('product_id'), pk__lte=position,
+    ).order_by('-valid_from', '-pk').values('category_id')[:1]
+    rows = PriceHistory.objects.using(using).filter(pk__gt=position)
+    settle = getattr(settings, 'STORE_OUTBOX_SETTLE_SECONDS', 0)
+    if settle and connections[using].vendor != 'sqlite':
+        rows = rows.filter(valid_from__lt=timezone.now() - timedelta(seconds=settle))
+    return rows.order_by('pk').annotate(previous_category=Subquery(previous)).values_list(
+        'pk', 'product_id', 'category_id', 'previous_category',
+    )
+
+
+def _dirty_buckets(rows, using):
+    """{category_id: множество дней или None (вся категория)} для порции истории."""
+    product_ids = sorted({product_id for _, product_id, _, _ in rows})
+    created = {}
+    for start in range(0, len(product_ids), QUERY_BATCH_SIZE):
+        created.update(
+            Product.objects.using(using)
+            .filter(pk__in=product_ids[start:start + QUERY_BATCH_SIZE])
+            .values_list('pk', 'created_at')
+        )
+    dirty = {}
+    for _, product_id, category_id, previous_category in rows:
+        created_at = created.get(product_id)
+        for category in {category_id, previous_category} - {None}:
+            if created_at is None:
+                dirty[category] = None
+            elif dirty.get(category, ()) is not None:
+                dirty.setdefault(category, set()).add(timezone.localdate(created_at))
+    return dirty
+
+
+def rebuild(category_ids=None, using=DEFAULT_DB_ALIAS):
+    """
+    Полный пересчет сводки (одним GROUP BY) для категорий category_ids или всего каталога.
+
+    Полный пересчет каталога переносит водяной знак на последнюю строку истории.
+
+    Returns:
+        {'processed': 0, 'buckets': записано строк сводки}
+    """
+    with transaction.atomic(using=using):
+        products = Product.objects.using(using)
+        stats = CategoryDailyStats.objects.using(using)
+        if category_ids is not None:
+            category_ids = list(category_ids)
+            products = products.filter(category_id__in=category_ids)
+            stats = stats.filter(category_id__in=category_ids)
+        else:
+            position = PriceHistory.objects.using(using).aggregate(last=Max('pk'))['last'] or 0
+            RollupWatermark.objects.using(using).update_or_create(
+                name=NAME, defaults={'position': position},
+            )
+        rows = [CategoryDailyStats(**row) for row in _aggregate(products).iterator()]
+        stats.delete()
+        CategoryDailyStats.objects.using(using).bulk_create(rows, batch_size=QUERY_BATCH_SIZE)
+    return {'processed': 0, 'buckets': len(rows)}
+
+
+def is_built(using=DEFAULT_DB_ALIAS):
+    """Построена ли сводка (был ли хотя бы один полный пересчет)."""
+    return RollupWatermark.objects.using(using).filter(name=NAME).exists()
+
+
+def refresh(batch_size=BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Инкрементальное обновление сводки по новым строкам истории цен.
+
+    Первый запуск строит сводку полностью; параллельный запуск пропускается
+    (блокировка в БД, store.locks).
+
+    Returns:
+        {'processed': обработано строк истории, 'buckets': записано строк сводки}
+        или {} при параллельном запуске
+    """
+    with locks.hold(f'store:rollups:refresh:{using}', LOCK_TIMEOUT, using=using) as acquired:
+        if not acquired:
+            return {}
+        if not is_built(using):
+            return rebuild(using=using)
+        processed = buckets = 0
+        while True:
+            with transaction.atomic(using=using):
+                watermark = RollupWatermark.objects.using(using).select_for_update().get(name=NAME)
+                rows = list(_pending(watermark.position, using)[:batch_size])
+                if not rows:
+                    break
+                for category_id, days in _dirty_buckets(rows, using).items():
+                    buckets += _recompute(category_id, days, using)
+                watermark.position = rows[-1][0]
+                watermark.save(update_fields=['position', 'updated_at'])
+            processed += len(rows)
+            if len(rows) < batch_size:
+                break
+        return {'processed': processed, 'buckets': buckets}
+
+
+def category_summary(stats=None):
+    """
+    Итоги по категориям из строк сводки stats (по умолчанию — вся сводка).
+
+    Returns:
+        список словарей category_id, category__name, product_count,
+        price_min, price_max, price_avg в порядке названий категорий
+    """
+    if stats is None:
+        stats = CategoryDailyStats.objects.all()
+    rows = list(
+        stats.order_by().values('category_id', 'category__name')
+        .annotate(
+            product_count=Sum('product_count'), price_min=Min('price_min'),
+            price_max=Max('price_max'), price_sum=Sum('price_sum'),
+        )
+        .order_by('category__name')
+    )
+    for row in rows:
+        row['price_avg'] = round(row.pop('price_sum') / row['product_count'], 2)
+    return rows
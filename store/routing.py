@@ -0,0 +1,257 @@
+"""
+Чтение каталога с реплик БД.
+
+ReplicaRouter отправляет чтения моделей store на реплики из
+settings.STORE_READ_REPLICAS, но только внутри блока use_replicas().
+ReplicaMiddleware открывает такой блок для GET/HEAD-запросов к страницам
+каталога (пространство имен ``store``: список, товар, категория, поиск,
+выгрузка). Админка, формы, задачи Celery и команды читают с основной БД,
+как и потоковые ответы: их тело читается уже после выхода из middleware.
+
+Реплика выбирается один раз на запрос, чтобы все запросы страницы видели
+одно состояние данных:
+
+* ``round_robin`` — по кругу;
+* ``least_latency`` — с наименьшим скользящим средним времени запросов
+  (замеряется оберткой connection.execute_wrapper на соединениях реплик).
+
+После записи в модели store клиент на settings.STORE_PRIMARY_PIN_SECONDS
+секунд закрепляется за основной БД (cookie), поэтому редирект после
+создания товара показывает только что сохраненные данные, несмотря на
+задержку репликации.
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .metrics import counters
+
+APP_LABEL = 'store'
+PIN_COOKIE = 'store_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+# Вес нового замера в скользящем среднем времени запроса.
+LATENCY_WEIGHT = 0.2
+
+
+def get_replicas():
+    return list(getattr(settings, 'STORE_READ_REPLICAS', []))
+
+
+def get_pin_seconds():
+    return getattr(settings, 'STORE_PRIMARY_PIN_SECONDS', 5)
+
+
+class ReplicaLatency:
+    """Скользящее среднее времени запросов к каждой реплике."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def record(self, alias, seconds):
+        with self._lock:
+            previous = self._values.get(alias)
+            self._values[alias] = seconds if previous is None else (
+                previous + LATENCY_WEIGHT * (seconds - previous)
+            )
+
+    def get(self, alias):
+        """Среднее время запроса (с) или None, если замеров еще не было."""
+        with self._lock:
+            return self._values.get(alias)
+
+    def fastest(self, aliases):
+        # Реплики без замеров выбираются первыми, чтобы получить замер.
+        with self._lock:
+            return min(aliases, key=lambda alias: self._values.get(alias, 0.0))
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+latency = ReplicaLatency()
+_round_robin = itertools.count()
+
+
+def choose_replica(replicas=None):
+    """Реплика для нового запроса по политике settings.STORE_REPLICA_SELECTION."""
+    replicas = get_replicas() if replicas is None else replicas
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+    policy = getattr(settings, 'STORE_REPLICA_SELECTION', 'round_robin')
+    if policy == 'least_latency':
+        return latency.fastest(replicas)
+    if policy != 'round_robin':
+        raise ValueError(f'Неизвестная политика выбора реплики: {policy}')
+    return replicas[next(_round_robin) % len(replicas)]
+
+
+class LatencyRecorder:
+    """Обертка connection.execute_wrapper, замеряющая время запросов реплики."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            latency.record(self.alias, time.perf_counter() - started)
+
+
+def track_replica_latency(connection):
+    """Подключение замера времени к соединению реплики (сигнал connection_created)."""
+    if connection.alias not in get_replicas():
+        return
+    if not any(isinstance(wrapper, LatencyRecorder) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(LatencyRecorder(connection.alias))
+
+
+class _ReadState:
+    """Состояние чтения в пределах одного HTTP-запроса (или блока use_replicas)."""
+
+    def __init__(self, pinned=False):
+        self.enabled = False
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+    def read_alias(self):
+        if not self.enabled or self.pinned or self.wrote:
+            return None
+        if self.replica is None:
+            self.replica = choose_replica()
+            counters.incr(f'replicas.reads.{self.replica}')
+        return self.replica
+
+
+_state = ContextVar('store_read_state', default=None)
+
+
+@contextmanager
+def read_state(pinned=False):
+    """Новое состояние чтения на время блока; чтения идут на основную БД."""
+    state = _ReadState(pinned=pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_replicas():
+    """Чтения моделей store внутри блока — с реплики (до первой записи)."""
+    state = _state.get()
+    if state is None:
+        with read_state() as state:
+            state.enabled = True
+            yield state
+        return
+    enabled = state.enabled
+    state.enabled = True
+    try:
+        yield state
+    finally:
+        state.enabled = enabled
+
+
+class ReplicaRouter:
+    """Роутер БД: чтения каталога — с реплик, записи — в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != APP_LABEL:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаются из той же БД, что и исходный.
+            return instance._state.db
+        state = _state.get()
+        return state.read_alias() if state is not None else None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != APP_LABEL:
+            return None
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Чтение страниц каталога с реплик и закрепление за основной БД после записи.
+
+    Должен стоять до middleware, которые читают модели store.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with read_state(pinned=self.is_pinned(request)) as state:
+            response = self.get_response(request)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        # Состояние — изменяемый объект в ContextVar: sync_to_async копирует
+        # контекст в поток, и флаги, выставленные там, видны здесь.
+        with read_state(pinned=self.is_pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.finish(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        match = request.resolver_match
+        if (state is not None and request.method in SAFE_METHODS
+                and match is not None and match.namespace == APP_LABEL):
+            state.enabled = True
+        return None
+
+    def is_pinned(self, request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def finish(self, response, state):
+        if state.wrote:
+            seconds = get_pin_seconds()
+            response.set_cookie(
+                PIN_COOKIE, f'{time.time() + seconds:.3f}',
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+            counters.incr('replicas.pinned')
+        return response
+
+
+def get_metrics():
+    """Чтения по репликам и число закреплений за основной БД."""
+    metrics = counters.snapshot('replicas.')
+    for alias in get_replicas():
+        value = latency.get(alias)
+        metrics[f'replicas.latency_ms.{alias}'] = round(value * 1000, 3) if value is not None else None
+    return metrics
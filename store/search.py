@@ -0,0 +1,267 @@
+"""
+Полнотекстовый поиск по товарам.
+
+Инвертированный индекс строится по названию, описанию товара и названию
+категории и хранится в отдельной таблице:
+
+* SQLite — виртуальная таблица FTS5 ``store_product_fts`` (rowid = ID товара);
+* PostgreSQL — таблица ``store_product_search`` с колонкой tsvector и GIN-индексом.
+
+Для остальных СУБД (или SQLite без FTS5) используется прежний поиск через
+``icontains``. Индекс поддерживается в актуальном состоянии обработчиками
+сигналов из ``store.receivers``.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+SQLITE_TABLE = 'store_product_fts'
+POSTGRES_TABLE = 'store_product_search'
+
+# Ограничение на количество параметров в одном запросе (SQLite по умолчанию 999).
+BATCH_SIZE = 500
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Разбиение поискового запроса на токены в нижнем регистре."""
+    return TOKEN_RE.findall((query or '').lower())
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _placeholders(count):
+    return ', '.join(['%s'] * count)
+
+
+class IcontainsBackend:
+    """Запасной вариант: поиск через LIKE без индекса."""
+
+    vendor = None
+
+    def search(self, queryset, query):
+        q = (query or '').strip()
+        if not q:
+            return queryset
+        return queryset.filter(
+            Q(name__icontains=q) |
+            Q(description__icontains=q) |
+            Q(category__name__icontains=q)
+        )
+
+    def index_products(self, cursor, product_ids=None):
+        pass
+
+    def remove_products(self, cursor, product_ids):
+        pass
+
+    def index_category(self, cursor, category_id):
+        pass
+
+    def create_index(self, cursor):
+        pass
+
+    def drop_index(self, cursor):
+        pass
+
+
+class SQLiteFTSBackend(IcontainsBackend):
+    """Поиск через виртуальную таблицу SQLite FTS5."""
+
+    vendor = 'sqlite'
+    # Веса колонок для bm25: название, описание, категория.
+    weights = (10.0, 1.0, 5.0)
+
+    def build_match(self, query):
+        """Запрос MATCH: все токены обязательны, каждый ищется по префиксу."""
+        return ' '.join(f'"{token}"*' for token in tokenize(query))
+
+    def search(self, queryset, query):
+        match = self.build_match(query)
+        if not match:
+            return queryset
+        weights = ', '.join(str(w) for w in self.weights)
+        # Один JOIN с виртуальной таблицей: MATCH и bm25 вычисляются за один проход.
+        # bm25 возвращает отрицательные значения: чем меньше, тем релевантнее.
+        return queryset.extra(
+            select={'search_rank': f'bm25({SQLITE_TABLE}, {weights})'},
+            tables=[SQLITE_TABLE],
+            where=[
+                f'{SQLITE_TABLE}.rowid = store_product.id',
+                f'{SQLITE_TABLE} MATCH %s',
+            ],
+            params=[match],
+        ).order_by('search_rank', '-created_at', '-id')
+
+    def _select_documents(self, where=''):
+        return (
+            f'INSERT INTO {SQLITE_TABLE} (rowid, name, description, category_name) '
+            'SELECT p.id, p.name, p.description, c.name '
+            'FROM store_product p JOIN store_category c ON c.id = p.category_id'
+            + where
+        )
+
+    def index_products(self, cursor, product_ids=None):
+        if product_ids is None:
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+            cursor.execute(self._select_documents())
+            return
+        for chunk in _chunks(product_ids):
+            marks = _placeholders(len(chunk))
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({marks})', chunk)
+            cursor.execute(self._select_documents(f' WHERE p.id IN ({marks})'), chunk)
+
+    def remove_products(self, cursor, product_ids):
+        for chunk in _chunks(product_ids):
+            cursor.execute(
+                f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({_placeholders(len(chunk))})',
+                chunk,
+            )
+
+    def index_category(self, cursor, category_id):
+        cursor.execute(
+            f'UPDATE {SQLITE_TABLE} SET category_name = '
+            '(SELECT name FROM store_category WHERE id = %s) '
+            'WHERE rowid IN (SELECT id FROM store_product WHERE category_id = %s)',
+            [category_id, category_id],
+        )
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5('
+            "name, description, category_name, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_TABLE}')
+
+
+class PostgresFTSBackend(IcontainsBackend):
+    """Поиск через tsvector + GIN-индекс PostgreSQL."""
+
+    vendor = 'postgresql'
+    config = 'simple'
+
+    def build_tsquery(self, query):
+        return ' & '.join(f'{token}:*' for token in tokenize(query))
+
+    def search(self, queryset, query):
+        tsquery = self.build_tsquery(query)
+        if not tsquery:
+            return queryset
+        return queryset.extra(
+            select={
+                'search_rank': f'ts_rank({POSTGRES_TABLE}.document, to_tsquery(%s, %s))',
+            },
+            select_params=(self.config, tsquery),
+            tables=[POSTGRES_TABLE],
+            where=[
+                f'{POSTGRES_TABLE}.product_id = store_product.id',
+                f'{POSTGRES_TABLE}.document @@ to_tsquery(%s, %s)',
+            ],
+            params=[self.config, tsquery],
+        ).order_by('-search_rank', '-created_at', '-id')
+
+    def _upsert_documents(self, where='', params=()):
+        return (
+            f'INSERT INTO {POSTGRES_TABLE} (product_id, document) '
+            'SELECT p.id, '
+            "setweight(to_tsvector(%s, p.name), 'A') || "
+            "setweight(to_tsvector(%s, c.name), 'B') || "
+            "setweight(to_tsvector(%s, p.description), 'C') "
+            'FROM store_product p JOIN store_category c ON c.id = p.category_id'
+            + where +
+            ' ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document',
+            [self.config] * 3 + list(params),
+        )
+
+    def index_products(self, cursor, product_ids=None):
+        if product_ids is None:
+            cursor.execute(f'TRUNCATE {POSTGRES_TABLE}')
+            cursor.execute(*self._upsert_documents())
+            return
+        for chunk in _chunks(product_ids):
+            cursor.execute(*self._upsert_documents(' WHERE p.id = ANY(%s)', [chunk]))
+
+    def remove_products(self, cursor, product_ids):
+        for chunk in _chunks(product_ids):
+            cursor.execute(f'DELETE FROM {POSTGRES_TABLE} WHERE product_id = ANY(%s)', [chunk])
+
+    def index_category(self, cursor, category_id):
+        cursor.execute(*self._upsert_documents(' WHERE p.category_id = %s', [category_id]))
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ('
+            'product_id bigint PRIMARY KEY REFERENCES store_product (id) '
+            'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+            'document tsvector NOT NULL)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_gin '
+            f'ON {POSTGRES_TABLE} USING GIN (document)'
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {POSTGRES_TABLE}')
+
+
+_backends = {}
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def get_backend(using='default'):
+    """Поисковый бэкенд для подключения к БД (результат кешируется)."""
+    if using not in _backends:
+        connection = connections[using]
+        if connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+            backend = SQLiteFTSBackend()
+        elif connection.vendor == 'postgresql':
+            backend = PostgresFTSBackend()
+        else:
+            backend = IcontainsBackend()
+        _backends[using] = backend
+    return _backends[using]
+
+
+def search_products(queryset, query):
+    """Фильтрация QuerySet товаров по запросу с сортировкой по релевантности."""
+    return get_backend(queryset.db).search(queryset, query)
+
+
+def index_products(product_ids=None, using='default'):
+    """Переиндексация товаров по списку ID (None — весь каталог)."""
+    with connections[using].cursor() as cursor:
+        get_backend(using).index_products(cursor, product_ids)
+
+
+def remove_products(product_ids, using='default'):
+    """Удаление товаров из индекса."""
+    with connections[using].cursor() as cursor:
+        get_backend(using).remove_products(cursor, product_ids)
+
+
+def index_category(category_id, using='default'):
+    """Обновление названия категории у всех её товаров в индексе."""
+    with connections[using].cursor() as cursor:
+        get_backend(using).index_category(cursor, category_id)
+
+
+def rebuild_index(using='default'):
+    """Полное пересоздание индекса."""
+    backend = get_backend(using)
+    with connections[using].cursor() as cursor:
+        backend.drop_index(cursor)
+        backend.create_index(cursor)
+        backend.index_products(cursor)
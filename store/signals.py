@@ -0,0 +1,10 @@
+"""
+Пользовательские сигналы приложения store.
+"""
+from django.dispatch import Signal
+
+# Отправляется после массового обновления товаров через QuerySet.update().
+# Аргументы: pks (список ID затронутых товаров), fields (множество полей), using,
+# previous_categories (Counter {category_id: товаров порции до UPDATE} при
+# изменении категории, иначе None). Отправляется на каждую порцию ID.
+products_updated = Signal()
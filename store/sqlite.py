@@ -0,0 +1,53 @@
+"""
+Настройка соединений SQLite.
+
+PRAGMA из settings.STORE_SQLITE_PRAGMAS выполняются для каждого нового
+соединения (сигнал connection_created). Профиль production
+(DATABASE_PROFILE=production в config/settings.py) включает:
+
+* ``journal_mode=WAL`` — читатели не блокируют писателя и наоборот;
+* ``synchronous=NORMAL`` — в WAL надежно и без fsync на каждую транзакцию;
+* ``busy_timeout`` — ожидание блокировки вместо ошибки «database is locked»;
+* ``cache_size`` и ``mmap_size`` — страницы БД в памяти процесса;
+* постоянные соединения (CONN_MAX_AGE), поэтому PRAGMA выполняются один
+  раз на соединение, а не на каждый запрос.
+
+Режим WAL сохраняется в файле БД и после смены профиля.
+"""
+from django.conf import settings
+from django.db import connections
+
+# PRAGMA, значения которых показывает pragma_values() по умолчанию.
+REPORTED_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size')
+
+
+def configure_connection(connection):
+    """Выполнение PRAGMA профиля для нового соединения SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'STORE_SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def pragma_values(using='default', names=REPORTED_PRAGMAS):
+    """Текущие значения PRAGMA соединения: {имя: значение или None}."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return {}
+    values = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            # Для БД в памяти часть PRAGMA (mmap_size) не возвращает строку.
+            row = cursor.fetchone()
+            values[name] = row[0] if row else None
+    return values
+
+
+def is_locked_error(error):
+    """Ошибка SQLite о занятой блокировке («database is locked»)."""
+    return 'locked' in str(error) or 'busy' in str(error)
@@ -0,0 +1,13 @@
+'use strict';
+{
+    // Фильтр списка с автодополнением (store.admin.CategoryAutocompleteFilter):
+    // выбор значения открывает список с новым параметром фильтра.
+    const $ = django.jQuery;
+    $(document).on('change', '.autocomplete-filter select', function() {
+        const params = new URLSearchParams(this.closest('.autocomplete-filter').dataset.queryString);
+        if (this.value) {
+            params.set(this.name, this.value);
+        }
+        window.location.search = params.toString();
+    });
+}
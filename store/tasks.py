@@ -3,46 +3,59 @@
 """
 import logging
 from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from store import outbox, prices, rollups
 from store.models import Product
+from store.repricing import CHUNK_SIZE, Repricer, parse_rules
 
 # Настройка логгера для задач
 logger = logging.getLogger(__name__)
 
 
+def _log_product(product):
+    """Одна структурированная запись лога о новом товаре."""
+    logger.info(
+        f"Новый товар добавлен в магазин: '{product.name}'",
+        extra={
+            'event': 'product_created',
+            **_product_summary(product),
+            'description': product.description,
+            'created_at': product.created_at.isoformat(),
+        },
+    )
+
+
+def _log_missing(product_id):
+    logger.error(
+        f"ОШИБКА: Товар с ID {product_id} не найден!",
+        extra={'event': 'product_missing', 'product_id': product_id},
+    )
+
+
+def _product_summary(product):
+    return {
+        'product_id': product.id,
+        'product_name': product.name,
+        'category': product.category.name,
+        'price': str(product.price)
+    }
+
+
 @shared_task
 def log_new_product(product_id):
     """
     Фоновая задача для логирования информации о добавлении нового товара.
-    
+
     Args:
         product_id: ID созданного товара
     """
     try:
-        product = Product.objects.get(id=product_id)
-        
-        logger.info("=" * 70)
-        logger.info("НОВЫЙ ТОВАР ДОБАВЛЕН В МАГАЗИН")
-        logger.info("=" * 70)
-        logger.info(f"ID товара: {product.id}")
-        logger.info(f"Название: {product.name}")
-        logger.info(f"Категория: {product.category.name}")
-        logger.info(f"Цена: {product.price} руб.")
-        if product.description:
-            logger.info(f"Описание: {product.description}")
-        logger.info(f"Дата создания: {product.created_at}")
-        logger.info("=" * 70)
-        logger.info(f"Задача выполнена успешно для товара '{product.name}'")
-        logger.info("=" * 70)
-        
-        return {
-            'status': 'success',
-            'product_id': product.id,
-            'product_name': product.name,
-            'category': product.category.name,
-            'price': str(product.price)
-        }
+        product = Product.objects.select_related('category').get(id=product_id)
+        _log_product(product)
+        return {'status': 'success', **_product_summary(product)}
     except Product.DoesNotExist:
-        logger.error(f"ОШИБКА: Товар с ID {product_id} не найден!")
+        _log_missing(product_id)
         return {
             'status': 'error',
             'message': f'Товар с ID {product_id} не найден',
@@ -56,3 +69,121 @@ def log_new_product(product_id):
             'product_id': product_id
         }
 
+
+@shared_task
+def log_new_products(product_ids):
+    """
+    Пакетное логирование новых товаров.
+
+    Все товары загружаются одним запросом (in_bulk + select_related),
+    вместо двух запросов и одной задачи на каждый товар.
+
+    Args:
+        product_ids: список ID созданных товаров
+    """
+    try:
+        products = Product.objects.select_related('category').in_bulk(product_ids)
+        logged = []
+        missing = []
+        for product_id in product_ids:
+            product = products.get(product_id)
+            if product is None:
+                _log_missing(product_id)
+                missing.append(product_id)
+                continue
+            _log_product(product)
+            logged.append(_product_summary(product))
+        return {
+            'status': 'success' if not missing else 'partial',
+            'products': logged,
+            'missing': missing,
+        }
+    except Exception as e:
+        logger.exception(f"ОШИБКА при выполнении задачи: {e}")
+        return {
+            'status': 'error',
+            'message': str(e),
+            'product_ids': list(product_ids)
+        }
+
+
+@shared_task(bind=True, soft_time_limit=25 * 60, time_limit=30 * 60)
+def reprice_products(self, rules, dry_run=False, chunk_size=CHUNK_SIZE,
+                     start_id=None, end_id=None):
+    """
+    Массовая переоценка товаров по набору правил (см. store.repricing).
+
+    Прогресс публикуется состоянием PROGRESS. Если время задачи истекает,
+    оставшийся диапазон id передается новой задаче.
+
+    Args:
+        rules: список правил RepricingRule.as_dict()
+        dry_run: только посчитать товары, затронутые каждым правилом
+        chunk_size: ширина диапазона id одной порции
+        start_id, end_id: диапазон id (для продолжения прерванного запуска)
+    """
+    try:
+        repricer = Repricer(parse_rules(rules), chunk_size=chunk_size)
+    except ValueError as e:
+        logger.error(f"ОШИБКА в правилах переоценки: {e}")
+        return {'status': 'error', 'message': str(e)}
+
+    if dry_run:
+        return {'status': 'dry_run', **repricer.preview()}
+
+    def progress(stats, done, total):
+        logger.info(f"Переоценка: {done}/{total} id, изменено {stats.updated} товаров")
+        if not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta={
+                'done': done, 'total': total, **stats.as_dict(),
+            })
+
+    try:
+        stats = repricer.run(start_id=start_id, end_id=end_id, progress=progress)
+    except SoftTimeLimitExceeded:
+        # Прерванная порция откатилась целиком, зафиксированные не повторяются:
+        # next_id — первый id после последней зафиксированной порции.
+        stats = repricer.last_stats
+        reprice_products.apply_async(kwargs={
+            'rules': rules, 'chunk_size': chunk_size,
+            'start_id': stats.next_id, 'end_id': stats.last_id,
+        })
+        logger.warning(f"Переоценка продолжится с id {stats.next_id} в новой задаче")
+        return {'status': 'continued', **stats.as_dict()}
+    return {'status': 'success', **stats.as_dict()}
+
+
+@shared_task(ignore_result=True)
+def relay_outbox(batch_size=outbox.BATCH_SIZE):
+    """
+    Доставка новых событий outbox потребителям (store.outbox.relay).
+
+    Запускается Celery beat; параллельный запуск пропускается.
+    """
+    results = outbox.relay(batch_size=batch_size)
+    failed = [name for name, delivered in results.items() if delivered is None]
+    return {'status': 'partial' if failed else 'success', 'delivered': results, 'failed': failed}
+
+
+@shared_task
+def compact_outbox():
+    """Удаление доставленных и перекрытых событий outbox (store.outbox.compact)."""
+    return {'status': 'success', **outbox.compact()}
+
+
+@shared_task
+def compact_price_history():
+    """Прореживание истории цен (store.prices.compact_history)."""
+    return {'status': 'success', **prices.compact_history(
+        retention_days=settings.STORE_PRICE_HISTORY_RETENTION_DAYS,
+        full_resolution_days=settings.STORE_PRICE_HISTORY_FULL_RESOLUTION_DAYS,
+    )}
+
+
+@shared_task(ignore_result=True)
+def refresh_catalog_stats(batch_size=rollups.BATCH_SIZE):
+    """
+    Обновление сводной статистики каталога по новым строкам истории цен
+    (store.rollups.refresh). Запускается Celery beat; параллельный запуск пропускается.
+    """
+    return {'status': 'success', **rollups.refresh(batch_size=batch_size)}
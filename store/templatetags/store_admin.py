@@ -0,0 +1,53 @@
+"""
+Теги шаблонов админки store.
+"""
+import copy
+from datetime import datetime, time
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from store.admin import product_rollup_stats
+
+register = template.Library()
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class RollupDates:
+    """
+    Замена cl.queryset для date_hierarchy: aggregate(Min, Max) и datetimes()
+    по дням сводки CategoryDailyStats вместо таблицы товаров.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def aggregate(self, **kwargs):
+        dates = self.stats.aggregate(first=Min('day'), last=Max('day'))
+        return {name: day and _midnight(day) for name, day in dates.items()}
+
+    def datetimes(self, field_name, kind):
+        return [_midnight(day) for day in self.stats.dates('day', kind)]
+
+
+def product_date_hierarchy(cl):
+    """date_hierarchy списка товаров по сводке, когда она применима."""
+    stats = product_rollup_stats(cl.params, cl.query)
+    if stats is not None:
+        cl = copy.copy(cl)
+        cl.queryset = RollupDates(stats)
+    return date_hierarchy(cl)
+
+
+@register.tag(name='product_date_hierarchy')
+def product_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser, token, func=product_date_hierarchy,
+        template_name='date_hierarchy.html', takes_context=False,
+    )
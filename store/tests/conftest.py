@@ -0,0 +1,59 @@
+"""
+Общие фикстуры тестов приложения store.
+"""
+import copy
+import logging.config
+import pytest
+from contextlib import contextmanager
+from django.conf import settings
+from store.caching import get_cache
+from store.instrumentation import record_queries
+from store.navigation import clear_local_cache
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_log_file(tmp_path_factory):
+    """Файловый лог тестов пишется во временную папку, а не в logs/ проекта."""
+    config = copy.deepcopy(settings.LOGGING)
+    config['handlers']['file']['filename'] = tmp_path_factory.mktemp('logs') / 'celery.log'
+    logging.config.dictConfig(config)
+    yield
+    logging.config.dictConfig(settings.LOGGING)
+
+
+@pytest.fixture(autouse=True)
+def clear_store_cache():
+    """Кеш не должен переживать откат транзакции между тестами."""
+    get_cache().clear()
+    clear_local_cache()
+    yield
+    get_cache().clear()
+    clear_local_cache()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Проверка бюджета запросов к БД внутри блока.
+
+    Пример::
+
+        with query_budget(3):
+            client.get(url)
+
+    Помимо общего количества проверяется число повторов одного и того же
+    запроса (признак N+1), по умолчанию повторы запрещены.
+    """
+    @contextmanager
+    def check(max_queries, max_duplicates=0):
+        with record_queries() as recorder:
+            yield recorder
+        fields = recorder.as_log_fields()
+        assert recorder.count <= max_queries, (
+            f'Превышен бюджет запросов: {recorder.count} > {max_queries}\n'
+            + '\n'.join(recorder.fingerprints)
+        )
+        assert fields['db_duplicate_queries'] <= max_duplicates, (
+            f'Повторяющиеся запросы (N+1): {recorder.duplicates()}'
+        )
+    return check
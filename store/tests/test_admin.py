@@ -0,0 +1,109 @@
+"""
+Тесты для режима производительности списка товаров в админке.
+"""
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from store import rollups
+from store.admin import estimate_product_count
+from store.models import Category, Product
+from store.pagination import EstimatedCountPaginator
+
+
+@pytest.fixture
+def catalog():
+    books = Category.objects.create(name='Книги')
+    phones = Category.objects.create(name='Телефоны')
+    for name, price, category, year in (
+        ('Роман', '500.00', books, 2025),
+        ('Учебник', '1500.00', books, 2026),
+        ('Смартфон', '29999.00', phones, 2026),
+    ):
+        Product.objects.create(name=name, price=Decimal(price), category=category,
+                               created_at=timezone.make_aware(datetime(year, 3, 1)))
+    return books, phones
+
+
+def product_queries(queries, prefix):
+    return [q['sql'] for q in queries if q['sql'].startswith(prefix) and '"store_product"' in q['sql']]
+
+
+@pytest.mark.django_db
+class TestEstimatedCount:
+    """Оценка количества вместо COUNT(*)."""
+
+    def test_paginator_threshold(self, catalog, django_assert_num_queries):
+        products = Product.objects.all()
+        with django_assert_num_queries(0):
+            assert EstimatedCountPaginator(products, 10, estimate=lambda: 1000, threshold=100).count == 1000
+        with django_assert_num_queries(1):
+            assert EstimatedCountPaginator(products, 10, estimate=lambda: 50, threshold=100).count == 3
+        assert EstimatedCountPaginator(products, 10, estimate=lambda: None, threshold=0).count == 3
+        assert EstimatedCountPaginator(products, 10, estimate=lambda: 1000).count == 3
+
+    def test_estimate_sources(self, catalog):
+        books, _ = catalog
+        assert estimate_product_count({}) == 3
+        assert estimate_product_count({'category__id__exact': str(books.pk)}) == 2
+        assert estimate_product_count({}, search='роман') is None
+        assert estimate_product_count({'price_range': '0-1000'}) is None
+        # Фильтр по дате — только по построенной сводке.
+        assert estimate_product_count({'created_at__year': '2026'}) is None
+        rollups.refresh()
+        assert estimate_product_count({'created_at__year': '2026'}) == 2
+        assert estimate_product_count(
+            {'created_at__year': '2026', 'category__id__exact': str(books.pk)}
+        ) == 1
+
+    def test_changelist_without_count(self, admin_client, catalog, settings):
+        books, _ = catalog
+        settings.STORE_ADMIN_ESTIMATED_COUNT_THRESHOLD = 0
+        url = reverse('admin:store_product_changelist')
+        admin_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get(url, {'category__id__exact': books.pk})
+        assert response.context['cl'].result_count == 2
+        assert response.context['cl'].full_result_count is None
+        assert not product_queries(queries, 'SELECT COUNT(*)')
+        # Ни фильтр, ни list_editable не загружают список категорий.
+        assert not [q['sql'] for q in queries if 'FROM "store_category"' in q['sql']]
+
+        with CaptureQueriesContext(connection) as queries:
+            admin_client.get(url, {'q': 'Роман'})
+        assert product_queries(queries, 'SELECT COUNT(*)')
+
+
+@pytest.mark.django_db
+class TestCategoryFilter:
+    """Фильтр и поле категории с автодополнением."""
+
+    def test_filter_renders_selected(self, admin_client, catalog):
+        books, _ = catalog
+        response = admin_client.get(reverse('admin:store_product_changelist'),
+                                    {'category__id__exact': books.pk})
+        content = response.content.decode()
+        assert f'<option value="{books.pk}" selected>Книги</option>' in content
+        assert 'Телефоны' not in content.split('autocomplete-filter')[1].split('</details>')[0]
+        assert [p.name for p in response.context['cl'].result_list] == ['Учебник', 'Роман']
+
+    def test_autocomplete_search(self, admin_client, catalog):
+        response = admin_client.get(reverse('admin:autocomplete'), {
+            'app_label': 'store', 'model_name': 'product', 'field_name': 'category', 'term': 'Тел',
+        })
+        assert [item['text'] for item in response.json()['results']] == ['Телефоны']
+
+    def test_list_editable_saves_category(self, admin_client, catalog):
+        books, phones = catalog
+        product = Product.objects.get(name='Роман')
+        response = admin_client.post(reverse('admin:store_product_changelist'), {
+            'form-TOTAL_FORMS': '1', 'form-INITIAL_FORMS': '1',
+            'form-0-id': product.pk, 'form-0-price': '500.00', 'form-0-category': phones.pk,
+            '_save': 'Сохранить',
+        })
+        assert response.status_code == 302
+        product.refresh_from_db()
+        assert product.category == phones
@@ -0,0 +1,100 @@
+"""
+Тесты для async-вариантов страниц каталога (config.asgi_urls).
+"""
+import pytest
+from asgiref.sync import async_to_sync
+from decimal import Decimal
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from store.models import Category, Product
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls('config.asgi_urls')]
+
+
+@pytest.fixture
+def catalog():
+    books = Category.objects.create(name='Книги')
+    Category.objects.create(name='Телефоны')
+    for i in range(15):
+        Product.objects.create(name=f'Книга {i}', price=Decimal('100.00') * (i + 1), category=books)
+    return books
+
+
+def pages(category):
+    product = category.products.first()
+    return [
+        reverse('store:index'),
+        reverse('store:index') + '?search=книга&price=0-1000',
+        reverse('store:index') + '?page=2',
+        reverse('store:index') + '?pagination=cursor',
+        reverse('store:category_detail', kwargs={'category_id': category.pk}),
+        reverse('store:category_detail', kwargs={'category_id': category.pk}) + '?page=2',
+        reverse('store:product_detail', kwargs={'product_id': product.pk}),
+    ]
+
+
+@async_to_sync
+async def async_get(path, headers=None):
+    response = await AsyncClient().get(path, headers=headers)
+    if response.streaming:
+        response.body = b''.join([chunk async for chunk in response.streaming_content])
+    else:
+        response.body = response.content
+    return response
+
+
+class TestAsyncViews:
+    """Тесты для async-представлений каталога."""
+
+    def test_same_html_as_sync_views(self, catalog):
+        """Async-страницы совпадают с синхронными."""
+        sync_client = Client()
+        for path in pages(catalog):
+            expected = sync_client.get(path)
+            response = async_get(path)
+            assert response.status_code == 200, path
+            assert response.body.decode() == expected.content.decode(), path
+
+    def test_first_search_in_event_loop(self, catalog, monkeypatch):
+        """Бэкенд поиска, еще не выбранный синхронным кодом, определяется вне event loop."""
+        monkeypatch.setattr('store.search._backends', {})
+        response = async_get(reverse('store:index') + '?search=книга')
+        assert response.status_code == 200
+        assert 'Книга 1' in response.body.decode()
+
+    def test_views_are_async(self):
+        """Страницы каталога обслуживаются async-представлениями."""
+        from django.urls import resolve
+        for name in ('index', 'category_detail', 'product_detail'):
+            match = resolve(reverse(f'store:{name}', kwargs={
+                'category_detail': {'category_id': 1},
+                'product_detail': {'product_id': 1},
+            }.get(name, {})))
+            assert match.func.__module__ == 'store.async_views'
+
+    def test_stream(self, catalog):
+        """Потоковая страница категории через aiterator()."""
+        path = reverse('store:category_detail', kwargs={'category_id': catalog.pk})
+        content = async_get(path + '?stream=1').body.decode()
+        assert content.count('class="product-card"') == 15
+        assert '</html>' in content
+
+    def test_not_found(self, catalog):
+        """Несуществующие товар, категория и страница — 404."""
+        assert async_get(reverse('store:product_detail', kwargs={'product_id': 0})).status_code == 404
+        assert async_get(reverse('store:category_detail', kwargs={'category_id': 0})).status_code == 404
+        assert async_get(reverse('store:index') + '?page=99').status_code == 404
+
+    def test_not_modified(self, catalog):
+        """Условный GET работает и для async-представлений."""
+        path = reverse('store:index')
+        response = async_get(path)
+        assert async_get(path, {'If-None-Match': response['ETag']}).status_code == 304
+
+    def test_query_headers(self, catalog, settings):
+        """Учет запросов middleware работает в async-режиме."""
+        settings.STORE_QUERY_HEADERS = True
+        response = async_get(reverse('store:product_detail', kwargs={
+            'product_id': catalog.products.first().pk,
+        }))
+        assert response['X-DB-Query-Count'] == '3'
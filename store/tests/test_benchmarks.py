@@ -0,0 +1,97 @@
+"""
+Тесты для набора бенчмарков и сравнения с базовой линией.
+"""
+import json
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from store import benchmarks
+from store.benchmark_results import compare, flatten, load_results
+from store.models import Product
+
+
+def fake_results(median_ms, rows_per_sec):
+    return {
+        'fake': [{
+            'size': 100,
+            'query': 'смартфон',
+            'list': {'min_ms': 1.0, 'median_ms': median_ms, 'max_ms': 50.0},
+            'rows_per_sec': rows_per_sec,
+        }],
+    }
+
+
+@pytest.fixture
+def fake_scenario(monkeypatch):
+    """Сценарий с заданными результатами вместо реальных замеров."""
+    state = {'median_ms': 10.0, 'rows_per_sec': 1000}
+
+    def run(sizes, repeat, **options):
+        return fake_results(state['median_ms'], state['rows_per_sec'])['fake']
+
+    monkeypatch.setitem(benchmarks.SCENARIOS, 'fake', run)
+    return state
+
+
+class TestBaselineComparison:
+    """Тесты для сравнения результатов с базовой линией."""
+
+    def test_flatten(self):
+        metrics = flatten(fake_results(10.0, 1000))
+        assert metrics == {
+            'fake[size=100,query=смартфон].list.min_ms': 1.0,
+            'fake[size=100,query=смартфон].list.median_ms': 10.0,
+            'fake[size=100,query=смартфон].list.max_ms': 50.0,
+            'fake[size=100,query=смартфон].rows_per_sec': 1000,
+        }
+
+    def test_slower_median_is_regression(self):
+        regressions = compare(fake_results(13.0, 1000), fake_results(10.0, 1000), 0.2)
+        assert [r.key for r in regressions] == ['fake[size=100,query=смартфон].list.median_ms']
+        assert regressions[0].change == pytest.approx(0.3)
+
+    def test_lower_throughput_is_regression(self):
+        regressions = compare(fake_results(10.0, 700), fake_results(10.0, 1000), 0.2)
+        assert [r.key for r in regressions] == ['fake[size=100,query=смартфон].rows_per_sec']
+
+    def test_improvements_noise_and_new_metrics_ignored(self):
+        """Улучшения, разница меньше порога в мс и новые метрики не считаются регрессией."""
+        assert compare(fake_results(5.0, 2000), fake_results(10.0, 1000)) == []
+        assert compare(fake_results(0.6, 1000), fake_results(0.3, 1000)) == []
+        assert compare(fake_results(99.0, 1), {'other': []}) == []
+
+
+@pytest.mark.django_db
+class TestBenchmarkCommand:
+    """Тесты для команды benchmark: JSON-результаты и базовая линия."""
+
+    def test_output_and_baseline(self, fake_scenario, tmp_path, capsys):
+        baseline = tmp_path / 'baseline.json'
+        call_command('benchmark', 'fake', '--sizes', '100', '-o', str(baseline))
+        document = load_results(baseline)
+        assert document['scenarios'] == fake_results(10.0, 1000)
+        assert document['meta']['database'] == 'sqlite'
+
+        fake_scenario['median_ms'] = 10.5
+        call_command('benchmark', 'fake', '--sizes', '100', '--baseline', str(baseline))
+
+        fake_scenario['median_ms'] = 20.0
+        with pytest.raises(CommandError, match='1 метрикам'):
+            call_command('benchmark', 'fake', '--sizes', '100', '--baseline', str(baseline))
+        call_command('benchmark', 'fake', '--sizes', '100', '--baseline', str(baseline),
+                     '--max-regression', '1.5')
+
+    @pytest.mark.parametrize('name', ['views', 'admin', 'changelist', 'bulk', 'category_page'])
+    def test_scenarios_run(self, name):
+        """Сценарии выполняются на маленьком каталоге и откатывают данные."""
+        rows = benchmarks.SCENARIOS[name](sizes=[60], repeat=1)
+        assert rows[0]['size'] == 60
+        assert all('median_ms' in value for value in rows[0].values() if isinstance(value, dict))
+        json.dumps(rows)
+        assert not Product.objects.exists()
+
+    def test_task_logging_scenario(self):
+        """Прежний формат — десять строк на товар, новый — одна."""
+        row = benchmarks.SCENARIOS['task_logging'](sizes=[20])[0]
+        assert row['banner_file']['lines'] == 200
+        assert row['json_file']['lines'] == row['json_queue']['lines'] == 20
@@ -0,0 +1,160 @@
+"""
+Тесты для условных GET и кеша страниц каталога.
+"""
+import pytest
+from decimal import Decimal
+from django.db.models import F
+from django.urls import reverse
+from store.conditional import catalog_watermark, get_metrics
+from store.metrics import counters
+from store.models import Category, Product
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    counters.reset('pages.')
+
+
+@pytest.fixture
+def catalog():
+    books = Category.objects.create(name='Книги')
+    phones = Category.objects.create(name='Телефоны')
+    book = Product.objects.create(name='Роман', price=Decimal('500.00'), category=books)
+    phone = Product.objects.create(name='Смартфон', price=Decimal('9000.00'), category=phones)
+    return book, phone
+
+
+def pages(catalog):
+    book, _ = catalog
+    return [
+        reverse('store:index'),
+        reverse('store:category_detail', kwargs={'category_id': book.category_id}),
+        reverse('store:product_detail', kwargs={'product_id': book.pk}),
+    ]
+
+
+def revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    """Тесты для ETag/Last-Modified и ответа 304."""
+
+    def test_not_modified_without_rendering(self, client, catalog, django_assert_num_queries):
+        """Повторный запрос с ETag получает 304 одним запросом к БД."""
+        for url in pages(catalog):
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response['Last-Modified']
+            with django_assert_num_queries(1):
+                assert revalidate(client, url, response).status_code == 304
+        assert get_metrics() == {'pages.not_modified': 3}
+
+    def test_if_modified_since(self, client, catalog):
+        """Заголовок If-Modified-Since тоже дает 304."""
+        url = reverse('store:index')
+        response = client.get(url)
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert response.status_code == 304
+
+    def test_product_save_changes_etag(self, client, catalog):
+        """Изменение товара меняет ETag его страницы, категории и главной."""
+        book, _ = catalog
+        responses = {url: client.get(url) for url in pages(catalog)}
+        book.name = 'Повесть'
+        book.save()
+        for url, response in responses.items():
+            assert revalidate(client, url, response).status_code == 200
+
+    def test_queryset_update_changes_etag(self, client, catalog):
+        """Массовое изменение цены меняет ETag."""
+        book, _ = catalog
+        responses = {url: client.get(url) for url in pages(catalog)}
+        Product.objects.filter(pk=book.pk).update(price=F('price') * 2)
+        for url, response in responses.items():
+            assert revalidate(client, url, response).status_code == 200
+
+    def test_delete_changes_etag(self, client, catalog):
+        """Удаление товара меняет счетчики боковой панели на всех страницах."""
+        _, phone = catalog
+        responses = {url: client.get(url) for url in pages(catalog)}
+        Product.objects.get(pk=phone.pk).delete()
+        for url, response in responses.items():
+            assert revalidate(client, url, response).status_code == 200
+
+    def test_other_category_edit_keeps_category_page(self, client, catalog):
+        """Правка товара другой категории не меняет страницу категории."""
+        book, phone = catalog
+        url = reverse('store:category_detail', kwargs={'category_id': book.category_id})
+        response = client.get(url)
+        phone.name = 'Телефон'
+        phone.save()
+        assert revalidate(client, url, response).status_code == 304
+
+    def test_category_rename_changes_etag(self, client, catalog):
+        """Переименование категории видно в боковой панели всех страниц."""
+        _, phone = catalog
+        responses = {url: client.get(url) for url in pages(catalog)}
+        phone.category.name = 'Смартфоны'
+        phone.category.save()
+        for url, response in responses.items():
+            assert revalidate(client, url, response).status_code == 200
+
+    def test_query_string_changes_etag(self, client, catalog):
+        """Разные параметры запроса — разные ETag."""
+        url = reverse('store:index')
+        assert client.get(url)['ETag'] != client.get(url, {'search': 'роман'})['ETag']
+
+    def test_empty_catalog(self, db):
+        """Для пустого каталога водяного знака нет."""
+        assert catalog_watermark(Product.objects.all())[0] is None
+
+
+@pytest.mark.django_db
+class TestPageCache:
+    """Тесты для кеша страниц анонимных пользователей."""
+
+    @pytest.fixture(autouse=True)
+    def enable_page_cache(self, settings):
+        settings.STORE_PAGE_CACHE = True
+
+    def test_cached_page(self, client, catalog, django_assert_num_queries):
+        """Повторный запрос без ETag отдается из кеша одним запросом."""
+        for url in pages(catalog):
+            first = client.get(url)
+            with django_assert_num_queries(1):
+                second = client.get(url)
+            assert second.content == first.content
+            assert second['ETag'] == first['ETag']
+        assert get_metrics() == {'pages.miss': 3, 'pages.hit': 3}
+
+    def test_write_invalidates_page(self, client, catalog):
+        """Изменение товара делает закешированную страницу недоступной."""
+        book, _ = catalog
+        url = reverse('store:product_detail', kwargs={'product_id': book.pk})
+        client.get(url)
+        book.name = 'Повесть'
+        book.save()
+        assert 'Повесть' in client.get(url).content.decode()
+        assert counters.get('pages.hit') == 0
+
+    def test_authenticated_users_bypass_cache(self, client, catalog, django_user_model):
+        """Страницы авторизованных пользователей не кешируются."""
+        client.force_login(django_user_model.objects.create_user('staff'))
+        url = reverse('store:index')
+        client.get(url)
+        client.get(url)
+        assert get_metrics() == {}
+
+    def test_messages_bypass_cache(self, client, catalog):
+        """Страница с одноразовыми сообщениями не берется из кеша."""
+        book, _ = catalog
+        url = reverse('store:product_detail', kwargs={'product_id': book.pk})
+        client.get(url)
+        response = client.post(
+            reverse('store:product_edit', kwargs={'product_id': book.pk}),
+            {'name': 'Роман', 'price': '500.00', 'category': book.category_id},
+            follow=True,
+        )
+        assert 'успешно обновлен' in response.content.decode()
@@ -0,0 +1,91 @@
+"""
+Тесты для денормализованного счетчика товаров в категории.
+"""
+import pytest
+from io import StringIO
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+from store.models import Category, Product
+
+
+def product_count(category):
+    return Category.objects.get(pk=category.pk).product_count
+
+
+@pytest.mark.django_db
+class TestProductCount:
+    """Тесты для Category.product_count."""
+
+    def test_create_move_delete(self):
+        """Счетчик следует за созданием, переносом и удалением товара."""
+        books = Category.objects.create(name='Книги')
+        phones = Category.objects.create(name='Телефоны')
+        product = Product.objects.create(name='Роман', price=Decimal('500.00'), category=books)
+        assert (product_count(books), product_count(phones)) == (1, 0)
+
+        product.category = phones
+        product.save()
+        assert (product_count(books), product_count(phones)) == (0, 1)
+
+        product.save()
+        assert product_count(phones) == 1
+
+        product.delete()
+        assert product_count(phones) == 0
+
+    def test_save_with_deferred_category(self):
+        """Товар, загруженный без категории, при сохранении не считается перенесенным."""
+        books = Category.objects.create(name='Книги')
+        phones = Category.objects.create(name='Телефоны')
+        product = Product.objects.create(name='Роман', price=Decimal('500.00'), category=books)
+        Product.objects.only('name').get(pk=product.pk).save()
+        assert product_count(books) == 1
+
+        deferred = Product.objects.defer('category').get(pk=product.pk)
+        deferred.category_id = phones.pk
+        deferred.save()
+        assert (product_count(books), product_count(phones)) == (0, 1)
+
+    def test_bulk_update_and_category_delete(self):
+        """Массовый перенос пересчитывает счетчики."""
+        books = Category.objects.create(name='Книги')
+        phones = Category.objects.create(name='Телефоны')
+        for i in range(3):
+            Product.objects.create(name=f'Товар {i}', price=Decimal('1.00'), category=books)
+        Product.objects.filter(name='Товар 0').update(category=phones)
+        assert (product_count(books), product_count(phones)) == (2, 1)
+
+    def test_bulk_move_in_batches_without_full_recount(self, monkeypatch):
+        """Перенос порциями меняет счетчики по исходным категориям, без GROUP BY по всей таблице."""
+        books = Category.objects.create(name='Книги')
+        phones = Category.objects.create(name='Телефоны')
+        other = Category.objects.create(name='Прочее')
+        for i in range(5):
+            Product.objects.create(name=f'Товар {i}', price=Decimal('1.00'),
+                                   category=books if i % 2 else other)
+        monkeypatch.setattr('store.models.UPDATE_BATCH_SIZE', 2)
+        monkeypatch.setattr('store.receivers.recount_categories', pytest.fail)
+        assert Product.objects.exclude(name='Товар 4').update(category=phones) == 4
+        assert (product_count(books), product_count(phones), product_count(other)) == (0, 4, 1)
+
+    def test_reconcile_command(self):
+        """Команда исправляет счетчики после bulk_create."""
+        books = Category.objects.create(name='Книги')
+        Product.objects.bulk_create(
+            Product(name=f'Товар {i}', price=Decimal('1.00'), category=books)
+            for i in range(5)
+        )
+        assert product_count(books) == 0
+        call_command('reconcile_product_counts', stdout=StringIO())
+        assert product_count(books) == 5
+
+    def test_admin_changelist_without_per_row_queries(self, admin_client, django_assert_max_num_queries):
+        """Список категорий в админке не делает запрос на каждую строку."""
+        for i in range(10):
+            category = Category.objects.create(name=f'Категория {i}')
+            Product.objects.create(name='Товар', price=Decimal('1.00'), category=category)
+        admin_client.get(reverse('admin:store_category_changelist'))
+        with django_assert_max_num_queries(6):
+            response = admin_client.get(reverse('admin:store_category_changelist'))
+        assert response.status_code == 200
@@ -0,0 +1,58 @@
+"""
+Тесты для отправки задач Celery после фиксации транзакции.
+"""
+import pytest
+from django.db import transaction
+from store.dispatch import enqueue, get_metrics
+from store.metrics import counters
+from store.tasks import log_new_product
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Перехват отправки задачи в брокер."""
+    calls = []
+    monkeypatch.setattr(log_new_product, 'apply_async',
+                        lambda args, kwargs: calls.append(tuple(args)))
+    counters.reset('dispatch.')
+    return calls
+
+
+@pytest.mark.django_db
+class TestDispatch:
+    """Тесты для store.dispatch.enqueue."""
+
+    def test_deferred_until_commit_and_coalesced(self, sent, django_capture_on_commit_callbacks):
+        """Задачи уходят после коммита, дубликаты схлопываются."""
+        with django_capture_on_commit_callbacks(execute=True):
+            assert enqueue(log_new_product, 1)
+            assert not enqueue(log_new_product, 1)
+            assert enqueue(log_new_product, 2)
+            assert sent == []
+        assert sent == [(1,), (2,)]
+        assert get_metrics() == {
+            'dispatch.requested': 3,
+            'dispatch.enqueued': 2,
+            'dispatch.coalesced': 1,
+        }
+
+    def test_rolled_back_savepoint_drops_task(self, sent, django_capture_on_commit_callbacks):
+        """Задача из откаченного блока не отправляется и учитывается как dropped."""
+        with django_capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    enqueue(log_new_product, 1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            # Та же задача после отката снова ставится в очередь
+            assert enqueue(log_new_product, 1)
+        assert sent == [(1,)]
+        assert get_metrics()['dispatch.dropped'] == 1
+
+    def test_new_transaction_is_not_coalesced(self, sent, django_capture_on_commit_callbacks):
+        """После отправки такой же вызов в новой транзакции снова ставит задачу."""
+        for _ in range(2):
+            with django_capture_on_commit_callbacks(execute=True):
+                enqueue(log_new_product, 1)
+        assert sent == [(1,), (1,)]
@@ -0,0 +1,70 @@
+"""
+Тесты для потокового экспорта каталога.
+"""
+import csv
+import gzip
+import io
+import json
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+from store.models import Category, Product
+
+
+@pytest.fixture
+def catalog():
+    books = Category.objects.create(name='Книги')
+    phones = Category.objects.create(name='Телефоны')
+    Product.objects.create(name='Django в примерах', description='Про "ORM", с запятой',
+                           price=Decimal('1599.00'), category=books)
+    Product.objects.create(name='Смартфон', price=Decimal('29999.00'), category=phones)
+    return books, phones
+
+
+@pytest.mark.django_db
+class TestExport:
+    """Тесты для экспорта."""
+
+    def test_csv_endpoint(self, client, catalog):
+        """CSV с заголовком и экранированием."""
+        response = client.get(reverse('store:export'))
+        assert response.streaming
+        assert response['Content-Type'].startswith('text/csv')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert {row['name'] for row in rows} == {'Django в примерах', 'Смартфон'}
+        book = next(row for row in rows if row['category'] == 'Книги')
+        assert book['description'] == 'Про "ORM", с запятой'
+        assert book['price'] == '1599.00'
+
+    def test_jsonl_gzip_with_filters(self, client, catalog):
+        """Фильтры поиска и категории, как у списка товаров."""
+        books, _ = catalog
+        response = client.get(reverse('store:export'),
+                              {'format': 'jsonl', 'gzip': 1, 'search': 'django',
+                               'category': books.id})
+        assert response['Content-Disposition'] == 'attachment; filename="products.jsonl.gz"'
+        data = gzip.decompress(b''.join(response.streaming_content)).decode()
+        records = [json.loads(line) for line in data.splitlines()]
+        assert [r['name'] for r in records] == ['Django в примерах']
+        assert records[0]['price'] == '1599.00'
+
+        response = client.get(reverse('store:export'), {'search': 'django',
+                                                        'category': catalog[1].id})
+        assert b''.join(response.streaming_content).decode().count('\n') == 1
+
+    def test_unknown_format(self, client, catalog):
+        response = client.get(reverse('store:export'), {'format': 'xml'})
+        assert response.status_code == 400
+
+    def test_invalid_category(self, client, catalog):
+        response = client.get(reverse('store:export'), {'category': 'abc'})
+        assert response.status_code == 400
+
+    def test_command(self, tmp_path, catalog):
+        """Команда пишет gzip-файл."""
+        path = tmp_path / 'products.csv.gz'
+        call_command('export_products', '--gzip', '-o', str(path), stderr=io.StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as fh:
+            assert len(list(csv.DictReader(fh))) == 2
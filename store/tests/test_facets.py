@@ -0,0 +1,74 @@
+"""
+Тесты для фасетов по ценам и категориям.
+"""
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from store.facets import get_facets
+from store.models import Category, Product
+
+
+@pytest.fixture
+def catalog():
+    books = Category.objects.create(name='Книги')
+    phones = Category.objects.create(name='Телефоны')
+    for name, price, category in (
+        ('Роман', '500.00', books),
+        ('Учебник', '1500.00', books),
+        ('Смартфон', '29999.00', phones),
+        ('Кнопочный телефон', '999.99', phones),
+    ):
+        Product.objects.create(name=name, price=Decimal(price), category=category)
+    return books, phones
+
+
+@pytest.mark.django_db
+class TestFacets:
+    """Тесты для store.facets."""
+
+    def test_single_query_then_cached(self, catalog, django_assert_num_queries):
+        """Фасеты считаются одним агрегатом и затем берутся из кеша."""
+        books, phones = catalog
+        # Навигация по категориям прогревается отдельно
+        with django_assert_num_queries(2):
+            facets = get_facets(Product.objects.all(), {})
+        assert facets['total'] == 4
+        assert facets['price'] == {'0-1000': 2, '1000-5000': 1, '5000-20000': 0, '20000+': 1}
+        assert facets['category'] == {books.id: 2, phones.id: 2}
+        with django_assert_num_queries(0):
+            assert get_facets(Product.objects.all(), {}) == facets
+
+    def test_invalidated_by_bulk_update(self, catalog):
+        """Массовое изменение цен сбрасывает кеш фасетов."""
+        get_facets(Product.objects.all(), {})
+        Product.objects.update(price=Decimal('100.00'))
+        assert get_facets(Product.objects.all(), {})['price']['0-1000'] == 4
+
+    def test_list_view_facets_and_price_filter(self, client, catalog):
+        """Список товаров показывает фасеты и фильтрует по ?price=."""
+        books, _ = catalog
+        response = client.get(reverse('store:index'), {'category': books.id, 'price': '0-1000'})
+        assert [p.name for p in response.context['products']] == ['Роман']
+        facets = {f['key']: f for f in response.context['price_facets']}
+        assert facets['0-1000']['count'] == 1
+        assert facets['1000-5000']['count'] == 1
+        assert facets['0-1000']['active']
+        assert 'price=1000-5000' in facets['1000-5000']['query']
+
+    def test_admin_filter_shows_counts(self, admin_client, catalog):
+        """Фильтр по цене в админке показывает количество товаров."""
+        response = admin_client.get(reverse('admin:store_product_changelist'))
+        assert 'До 1 000 ₽ (2)' in response.content.decode()
+        response = admin_client.get(reverse('admin:store_product_changelist'),
+                                    {'price_range': '20000+'})
+        assert response.context['cl'].result_count == 1
+
+    def test_admin_filter_counts_only_when_exact(self, admin_client, catalog):
+        """С поиском счетчики по категории не показываются, неверная категория — не 500."""
+        url = reverse('admin:store_product_changelist')
+        content = admin_client.get(url, {'q': 'Роман'}).content.decode()
+        assert 'До 1 000 ₽</a>' in content
+        assert 'До 1 000 ₽ (' not in content
+        response = admin_client.get(url, {'category__id__exact': 'abc'})
+        assert response.status_code == 302
+        assert admin_client.get(response.url).status_code == 200
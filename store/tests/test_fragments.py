@@ -0,0 +1,127 @@
+"""
+Тесты для кеша отрендеренных фрагментов.
+"""
+import pytest
+from decimal import Decimal
+from django.db.models import F
+from django.urls import reverse
+from store.fragments import get_metrics, invalidate_fragments, render_cards, render_detail
+from store.metrics import counters
+from store.models import Category, Product
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    counters.reset('fragments.')
+
+
+@pytest.fixture
+def products():
+    category = Category.objects.create(name='Книги')
+    return [
+        Product.objects.create(name=f'Книга {i}', price=Decimal('100.00'), category=category)
+        for i in range(3)
+    ]
+
+
+def cards(show_category=False):
+    queryset = Product.objects.select_related('category').order_by('id')
+    return render_cards(queryset, show_category=show_category)
+
+
+@pytest.mark.django_db
+class TestFragmentCache:
+    """Тесты для кеша карточек и страниц товаров."""
+
+    def test_cards_are_cached(self, products):
+        """Повторный рендер списка берет все карточки из кеша."""
+        first = cards()
+        assert get_metrics() == {'fragments.hit': 0, 'fragments.miss': 3}
+        assert cards() == first
+        assert get_metrics() == {'fragments.hit': 3, 'fragments.miss': 3}
+        assert 'Книга 0' in first[0]
+
+    def test_save_rerenders_only_changed_card(self, products):
+        """save() увеличивает ревизию — перерендеривается только этот товар."""
+        cards()
+        products[1].name = 'Новое название'
+        products[1].save()
+        result = cards()
+        assert 'Новое название' in result[1]
+        assert counters.get('fragments.miss') == 4
+
+    def test_save_of_stale_instance_bumps_revision(self, products):
+        """Ревизия растет в БД: сохранение устаревшей копии не теряет изменения."""
+        stale = Product.objects.get(pk=products[0].pk)
+        products[0].save()
+        stale.name = 'Другое название'
+        stale.save(update_fields=['name'])
+        assert stale.revision == 2
+        assert Product.objects.get(pk=stale.pk).revision == 2
+
+    def test_queryset_update_bumps_revision(self, products):
+        """Массовое изменение цены (как в действиях админки) сбрасывает карточки."""
+        cards()
+        Product.objects.filter(pk=products[0].pk).update(price=F('price') * 2)
+        result = cards()
+        assert '200' in result[0]
+        assert counters.get('fragments.miss') == 4
+
+    def test_category_rename_bumps_revision(self, products):
+        """Переименование категории обновляет карточки с названием категории."""
+        cards(show_category=True)
+        category = Category.objects.get()
+        category.name = 'Литература'
+        category.save()
+        assert all('Литература' in card for card in cards(show_category=True))
+        assert counters.get('fragments.hit') == 0
+
+    def test_category_save_without_rename_keeps_cache(self, products):
+        """Сохранение категории без смены названия не сбрасывает фрагменты."""
+        cards()
+        category = Category.objects.get()
+        category.description = 'Описание'
+        category.save()
+        cards()
+        assert counters.get('fragments.hit') == 3
+
+    def test_variants_cached_separately(self, products):
+        """Карточки с категорией и без хранятся под разными ключами."""
+        assert 'Книги' not in cards()[0]
+        assert 'Книги' in cards(show_category=True)[0]
+
+    def test_invalidate_fragments(self, products):
+        """Смена версии пространства имен сбрасывает все фрагменты."""
+        cards()
+        invalidate_fragments()
+        cards()
+        assert counters.get('fragments.miss') == 6
+
+    def test_detail_page_uses_cache(self, client, products):
+        """Страница товара рендерит основной блок из кеша."""
+        url = reverse('store:product_detail', kwargs={'product_id': products[0].pk})
+        client.get(url)
+        response = client.get(url)
+        assert 'Книга 0' in response.content.decode()
+        assert counters.get('fragments.hit') == 1
+        product = Product.objects.select_related('category').get(pk=products[0].pk)
+        assert render_detail(product) in response.content.decode()
+
+    def test_list_pages_use_cache(self, client, products):
+        """Главная и страница категории собирают карточки из кеша."""
+        category = Category.objects.get()
+        urls = [
+            reverse('store:index'),
+            reverse('store:category_detail', kwargs={'category_id': category.pk}),
+            reverse('store:category_detail', kwargs={'category_id': category.pk}) + '?stream=1',
+        ]
+        for url in urls:
+            client.get(url)
+        counters.reset('fragments.')
+        for url in urls:
+            response = client.get(url)
+            content = (
+                b''.join(response.streaming_content) if response.streaming else response.content
+            ).decode()
+            assert 'Книга 2' in content
+        assert get_metrics() == {'fragments.hit': 9, 'fragments.miss': 0}
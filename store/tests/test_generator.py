@@ -0,0 +1,69 @@
+"""
+Тесты для генератора синтетического каталога.
+"""
+import json
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from store.generator import CatalogGenerator
+from store.models import Category, Product
+from store.search import search_products
+
+
+@pytest.mark.django_db
+class TestCatalogGenerator:
+    """Тесты для CatalogGenerator и команды generate_catalog."""
+
+    def test_generate(self):
+        """Товары, счетчики категорий и поисковый индекс."""
+        stats = CatalogGenerator(categories=10, batch_size=100).generate(1000)
+        assert stats.products == Product.objects.count() == 1000
+        assert stats.categories == Category.objects.count() == 10
+        for category in Category.objects.all():
+            assert category.product_count == category.products.count()
+        noun = Product.objects.first().name.split()[1]
+        assert search_products(Product.objects.all(), noun).exists()
+        assert set(stats.as_dict()) >= {'products', 'rows_per_sec', 'products_sec', 'search_index_sec'}
+
+    def test_distributions(self):
+        """Размеры категорий убывают по Ципфу, цены и даты в допустимых пределах."""
+        now = timezone.now()
+        CatalogGenerator(categories=10, batch_size=500, days=30, now=now).generate(2000)
+        sizes = list(Category.objects.order_by('pk').values_list('product_count', flat=True))
+        assert sizes[0] > sizes[-1] * 4
+        assert sizes[0] > 2000 / 10 * 2
+        assert not Product.objects.filter(price__lte=0).exists()
+        assert not Product.objects.filter(created_at__lt=now - timedelta(days=30)).exists()
+        recent = Product.objects.filter(created_at__gte=now - timedelta(days=15)).count()
+        assert recent > 1000
+
+    def test_deterministic(self):
+        """Одинаковый сид — одинаковые товары, другой сид — другие."""
+        now = timezone.now()
+        first = list(CatalogGenerator(seed=1, now=now).rows(50))
+        assert first == list(CatalogGenerator(seed=1, now=now).rows(50))
+        assert first != list(CatalogGenerator(seed=2, now=now).rows(50))
+
+    def test_offset_continues_sequence(self):
+        """Генерация с offset продолжает ту же последовательность товаров."""
+        now = timezone.now()
+        generator = CatalogGenerator(categories=5, batch_size=100, now=now)
+        generator.generate(100)
+        generator.generate(100, offset=100)
+        expected = {row['name'] for row in generator.rows(200)}
+        assert set(Product.objects.values_list('name', flat=True)) == expected
+
+    def test_reuses_categories(self):
+        """Повторный запуск не создает категории заново."""
+        CatalogGenerator(categories=3).generate(10)
+        CatalogGenerator(categories=3).generate(10, offset=10)
+        assert Category.objects.count() == 3
+
+    def test_command(self):
+        out = StringIO()
+        call_command('generate_catalog', '--categories', '4', '--products', '300',
+                     '--batch-size', '64', '--json', stdout=out)
+        assert json.loads(out.getvalue())['products'] == 300
+        assert Product.objects.count() == 300
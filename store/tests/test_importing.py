@@ -0,0 +1,145 @@
+"""
+Тесты для пакетного импорта товаров.
+"""
+import gzip
+import json
+import pytest
+from contextlib import contextmanager
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from django.core.management import call_command
+from django.db import OperationalError, transaction
+from store.importing import ProductImporter, import_file
+from store.models import Category, Product
+from store.search import search_products
+
+CSV_DATA = """name,description,price,category
+Смартфон,Хорошая камера,29999.00,Электроника
+Ноутбук,,89999.00,Электроника
+Футболка,Хлопок,999.00,Одежда
+ab,Слишком короткое,10.00,Одежда
+Бесплатно,,0,Одежда
+Джинсы,,не число,Одежда
+"""
+
+
+@pytest.mark.django_db
+class TestImportProducts:
+    """Тесты для импорта товаров."""
+
+    def test_import_csv(self, tmp_path):
+        """Валидные строки импортируются, невалидные пропускаются."""
+        Category.objects.create(name='Электроника')
+        path = tmp_path / 'products.csv'
+        path.write_text(CSV_DATA, encoding='utf-8')
+        out = StringIO()
+
+        call_command('import_products', str(path), '--batch-size', '2', stdout=out)
+
+        assert Product.objects.count() == 3
+        assert Category.objects.count() == 2
+        electronics = Category.objects.get(name='Электроника')
+        assert electronics.product_count == 2
+        assert Product.objects.get(name='Футболка').price == Decimal('999.00')
+        output = out.getvalue()
+        assert 'Строка 4: Название должно содержать минимум 3 символа.' in output
+        assert 'Строка 5: Цена должна быть больше нуля.' in output
+        assert 'пропущено: 3' in output
+        # Импортированные товары сразу доступны в поиске
+        assert search_products(Product.objects.all(), 'камера').count() == 1
+
+    def test_import_jsonl_gz_with_resume(self, tmp_path):
+        """Импорт продолжается с контрольной точки."""
+        path = tmp_path / 'products.jsonl.gz'
+        with gzip.open(path, 'wt', encoding='utf-8') as fh:
+            for i in range(10):
+                fh.write(json.dumps({'name': f'Товар {i}', 'price': '10.50',
+                                     'category': 'Книги'}) + '\n')
+        checkpoint = tmp_path / 'checkpoint'
+        checkpoint.write_text('6')
+
+        call_command('import_products', str(path), '--checkpoint', str(checkpoint),
+                     stdout=StringIO())
+
+        assert sorted(Product.objects.values_list('name', flat=True)) == [
+            f'Товар {i}' for i in range(6, 10)
+        ]
+        assert checkpoint.read_text() == '10'
+
+    def test_checkpoint_written_per_batch(self, tmp_path):
+        """Смещение сохраняется после каждой порции."""
+        checkpoint = tmp_path / 'checkpoint'
+        offsets = []
+        importer = ProductImporter(batch_size=3, checkpoint_path=checkpoint)
+        original = importer.write_checkpoint
+        importer.write_checkpoint = lambda offset: (offsets.append(offset), original(offset))
+        rows = ({'name': f'Товар {i}', 'price': '1', 'category': 'Книги'} for i in range(7))
+
+        stats = importer.run(rows)
+
+        assert stats.created == 7
+        assert offsets == [3, 6, 7]
+
+    def test_malformed_jsonl_lines_skipped(self, tmp_path):
+        """Испорченные строки JSONL и цены вне диапазона поля пропускаются."""
+        path = tmp_path / 'products.jsonl'
+        path.write_text('\n'.join([
+            json.dumps({'name': 'Словарь', 'price': '800.00', 'category': 'Книги'}),
+            '{"name": "Обрыв',
+            '["не", "объект"]',
+            json.dumps({'name': 'Дорогой', 'price': '123456789.00', 'category': 'Книги'}),
+            json.dumps({'name': 'Дробный', 'price': '1.005', 'category': 'Книги'}),
+            json.dumps({'name': 'Роман', 'price': '500.00', 'category': 'Книги'}),
+        ]) + '\n', encoding='utf-8')
+
+        stats = import_file(path, batch_size=2)
+
+        assert sorted(Product.objects.values_list('name', flat=True)) == ['Роман', 'Словарь']
+        assert stats.skipped == 4
+        errors = dict(stats.errors)
+        assert errors[2].startswith('Некорректный JSON')
+        assert errors[3] == 'Строка не является объектом JSON.'
+        assert 4 in errors and 5 in errors
+
+    def test_non_string_fields_skipped(self, tmp_path):
+        """Число или список вместо строки в JSONL — ошибка строки, а не всего импорта."""
+        path = tmp_path / 'products.jsonl'
+        path.write_text('\n'.join([
+            json.dumps({'name': 123, 'price': '10.00', 'category': 'Книги'}),
+            json.dumps({'name': 'Словарь', 'price': '10.00', 'category': 7}),
+            json.dumps({'name': 'Атлас', 'price': '10.00', 'category': 'Книги', 'description': ['карты']}),
+            json.dumps({'name': 'Роман', 'price': 500, 'category': 'Книги'}),
+        ]) + '\n', encoding='utf-8')
+
+        stats = import_file(path)
+
+        assert list(Product.objects.values_list('name', flat=True)) == ['Роман']
+        assert dict(stats.errors) == {
+            1: 'Поле name должно быть строкой.',
+            2: 'Поле category должно быть строкой.',
+            3: 'Поле description должно быть строкой.',
+        }
+
+    def test_checkpoint_written_after_commit(self, tmp_path, monkeypatch):
+        """Неудачная фиксация порции не сдвигает контрольную точку."""
+        checkpoint = tmp_path / 'checkpoint'
+        importer = ProductImporter(batch_size=2, checkpoint_path=checkpoint)
+        rows = [{'name': f'Товар {i}', 'price': '1', 'category': 'Книги'} for i in range(4)]
+
+        commits = []
+
+        @contextmanager
+        def failing_commit(using=None):
+            """Вторая порция записана, но COMMIT не удался."""
+            with transaction.atomic(using=using):
+                yield
+                commits.append(using)
+                if len(commits) == 2:
+                    raise OperationalError('database is locked')
+        monkeypatch.setattr('store.importing.transaction', SimpleNamespace(atomic=failing_commit))
+
+        with pytest.raises(OperationalError):
+            importer.run(rows)
+        assert checkpoint.read_text() == '2'
+        assert importer.stats.created == 2
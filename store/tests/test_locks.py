@@ -0,0 +1,30 @@
+"""
+Тесты для блокировок фоновых задач в БД.
+"""
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from store.locks import hold
+from store.models import TaskLock
+
+
+@pytest.mark.django_db
+class TestTaskLock:
+    """Аренда TaskLock."""
+
+    def test_exclusive_until_released(self):
+        with hold('task', 60) as first:
+            with hold('task', 60) as second:
+                assert first and not second
+            with hold('other', 60) as other:
+                assert other
+        with hold('task', 60) as again:
+            assert again
+        assert TaskLock.objects.get(name='task').expires_at is None
+
+    def test_expired_lock_taken_over(self):
+        TaskLock.objects.create(name='task', owner='упавший процесс',
+                                expires_at=timezone.now() - timedelta(seconds=1))
+        with hold('task', 60) as acquired:
+            assert acquired
+            assert TaskLock.objects.get(name='task').owner != 'упавший процесс'
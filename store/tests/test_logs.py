@@ -0,0 +1,108 @@
+"""
+Тесты для структурированного логирования через очередь.
+"""
+import json
+import logging
+import pytest
+import sys
+from decimal import Decimal
+from store.logs import BufferedRotatingFileHandler, JsonFormatter, QueueFileHandler
+from store.models import Category, Product
+from store.tasks import log_new_product
+
+
+def make_record(msg='Событие', level=logging.INFO, **extra):
+    record = logging.LogRecord('store.tasks', level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as fh:
+        return [json.loads(line) for line in fh]
+
+
+class TestJsonLogging:
+    """Тесты для JsonFormatter и буферизованных обработчиков."""
+
+    def test_json_formatter(self):
+        data = json.loads(JsonFormatter().format(
+            make_record(event='product_created', product_id=1, price=Decimal('9.99'))
+        ))
+        assert data['level'] == 'INFO'
+        assert data['logger'] == 'store.tasks'
+        assert data['message'] == 'Событие'
+        assert data['event'] == 'product_created'
+        assert data['price'] == '9.99'
+        assert 'args' not in data and 'lineno' not in data
+
+    def test_json_formatter_exception(self):
+        try:
+            raise ValueError('ошибка')
+        except ValueError:
+            logger = logging.getLogger('store.tests.json')
+            record = logger.makeRecord(logger.name, logging.ERROR, __file__, 1, 'Сбой', None,
+                                       sys.exc_info())
+        data = json.loads(JsonFormatter().format(record))
+        assert 'ValueError: ошибка' in data['exception']
+
+    def test_buffered_handler(self, tmp_path):
+        """Запись пачками: по заполнению буфера и сразу для ошибок."""
+        path = tmp_path / 'app.log'
+        handler = BufferedRotatingFileHandler(path, capacity=3, flush_interval=60)
+        handler.setFormatter(JsonFormatter())
+        handler.handle(make_record('1'))
+        handler.handle(make_record('2'))
+        assert not path.exists()
+        handler.handle(make_record('3'))
+        assert [line['message'] for line in read_lines(path)] == ['1', '2', '3']
+        handler.handle(make_record('4'))
+        handler.handle(make_record('5', level=logging.ERROR))
+        assert len(read_lines(path)) == 5
+        handler.close()
+
+    def test_buffered_handler_rotation(self, tmp_path):
+        path = tmp_path / 'app.log'
+        handler = BufferedRotatingFileHandler(path, maxBytes=500, backupCount=2, capacity=1)
+        handler.setFormatter(JsonFormatter())
+        for i in range(20):
+            handler.handle(make_record(f'Событие {i}'))
+        handler.close()
+        assert (tmp_path / 'app.log.1').exists()
+        assert (tmp_path / 'app.log.2').exists()
+        assert not (tmp_path / 'app.log.3').exists()
+
+    def test_queue_handler(self, tmp_path):
+        """Записи пишутся потоком слушателя; flush дожидается очереди."""
+        path = tmp_path / 'app.log'
+        handler = QueueFileHandler(path, capacity=1000, flush_interval=60)
+        handler.setFormatter(JsonFormatter())
+        logger = logging.getLogger('store.tests.queue')
+        logger.addHandler(handler)
+        logger.propagate = False
+        try:
+            items = ['a']
+            logger.info('Товары %s', items, extra={'event': 'test'})
+            items.append('b')
+            handler.flush()
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+        assert read_lines(path) == [{
+            'time': read_lines(path)[0]['time'], 'level': 'INFO', 'logger': 'store.tests.queue',
+            'message': "Товары ['a']", 'event': 'test',
+        }]
+
+
+@pytest.mark.django_db
+def test_log_new_product_single_record(caplog):
+    """Задача пишет одну структурированную запись на товар."""
+    category = Category.objects.create(name='Категория')
+    product = Product.objects.create(name='Товар', price=Decimal('10.00'), category=category)
+    with caplog.at_level('INFO', logger='store.tasks'):
+        log_new_product(product.id)
+    records = [r for r in caplog.records if r.name == 'store.tasks']
+    assert len(records) == 1
+    assert records[0].event == 'product_created'
+    assert records[0].product_id == product.id
+    assert records[0].category == 'Категория'
@@ -0,0 +1,80 @@
+"""
+Тесты для кешированной навигации по категориям.
+"""
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from store.models import Category, Product
+from store.navigation import clear_local_cache, get_category_navigation
+
+
+@pytest.fixture
+def categories():
+    books = Category.objects.create(name='Книги')
+    phones = Category.objects.create(name='Телефоны')
+    Product.objects.create(name='Роман', price=Decimal('500.00'), category=books)
+    return books, phones
+
+
+def counts():
+    return {item['name']: item['product_count'] for item in get_category_navigation()}
+
+
+@pytest.mark.django_db
+class TestCategoryNavigation:
+    """Тесты для навигации по категориям."""
+
+    def test_single_aggregate_query(self, categories, django_assert_num_queries):
+        """Первое обращение — один запрос, следующие — ни одного."""
+        with django_assert_num_queries(1):
+            assert counts() == {'Книги': 1, 'Телефоны': 0}
+        with django_assert_num_queries(0):
+            get_category_navigation()
+
+    def test_shared_cache_survives_local_eviction(self, categories, django_assert_num_queries):
+        """После очистки LRU процесса данные берутся из общего кеша."""
+        get_category_navigation()
+        clear_local_cache()
+        with django_assert_num_queries(0):
+            get_category_navigation()
+
+    def test_invalidated_by_category_changes(self, categories):
+        """Создание, переименование и удаление категорий сбрасывают кеш."""
+        books, phones = categories
+        counts()
+        Category.objects.create(name='Одежда')
+        assert 'Одежда' in counts()
+        phones.name = 'Смартфоны'
+        phones.save()
+        assert 'Смартфоны' in counts()
+        phones.delete()
+        assert 'Смартфоны' not in counts()
+
+    def test_invalidated_by_product_changes(self, categories):
+        """Счетчики меняются при создании, переносе и удалении товара."""
+        books, phones = categories
+        counts()
+        product = Product.objects.create(name='Телефон', price=Decimal('100.00'), category=phones)
+        assert counts() == {'Книги': 1, 'Телефоны': 1}
+
+        product = Product.objects.get(pk=product.pk)
+        product.category = books
+        product.save()
+        assert counts() == {'Книги': 2, 'Телефоны': 0}
+
+        Product.objects.filter(pk=product.pk).update(category=phones)
+        assert counts() == {'Книги': 1, 'Телефоны': 1}
+
+        Product.objects.get(pk=product.pk).delete()
+        assert counts() == {'Книги': 1, 'Телефоны': 0}
+
+    def test_sidebar_without_category_queries(self, client, categories, django_assert_num_queries):
+        """Повторный рендер страницы не запрашивает категории."""
+        books, _ = categories
+        product = books.products.get()
+        url = reverse('store:product_detail', args=[product.pk])
+        client.get(url)
+        # Водяной знак каталога и сам товар
+        with django_assert_num_queries(2):
+            response = client.get(url)
+        assert 'Телефоны' in response.content.decode()
@@ -0,0 +1,175 @@
+"""
+Тесты для потока изменений каталога (transactional outbox).
+"""
+import pytest
+from decimal import Decimal
+from django.db import transaction
+from store import locks, outbox
+from store.importing import ProductImporter
+from store.models import Category, ChangeEvent, ConsumerOffset, Product
+from store.repricing import Repricer, RepricingRule
+from store.tasks import compact_outbox, relay_outbox
+
+
+def events(model='product'):
+    return list(
+        ChangeEvent.objects.filter(model=model).values_list('operation', 'object_id', 'fields')
+    )
+
+
+@pytest.fixture
+def category():
+    category = Category.objects.create(name='Категория')
+    ChangeEvent.objects.all().delete()
+    return category
+
+
+@pytest.fixture
+def product(category):
+    product = Product.objects.create(name='Товар', price=Decimal('100.00'), category=category)
+    ChangeEvent.objects.all().delete()
+    return product
+
+
+@pytest.fixture
+def consumers(monkeypatch):
+    """Потребители, записывающие полученные порции: {имя: [[id событий], ...]}."""
+    received = {'first': [], 'second': []}
+
+    def make(name):
+        return lambda batch: received[name].append([event.pk for event in batch])
+
+    monkeypatch.setattr(outbox, 'CONSUMERS', {name: make(name) for name in received})
+    return received
+
+
+@pytest.mark.django_db
+class TestRecording:
+    """Запись событий в одной транзакции с изменением."""
+
+    def test_save_and_delete(self, category):
+        product = Product.objects.create(name='Товар', price=Decimal('100.00'), category=category)
+        product.price = Decimal('120.00')
+        product.save(update_fields=['price'])
+        product_id = product.pk
+        product.delete()
+        assert events() == [
+            ('insert', product_id, []),
+            ('update', product_id, ['price', 'revision', 'updated_at']),
+            ('delete', product_id, []),
+        ]
+        insert, update, delete = ChangeEvent.objects.filter(model='product')
+        assert insert.data['name'] == 'Товар'
+        assert update.data['price'] == '120.00'
+        assert delete.data == {'category_id': category.pk}
+
+    def test_category_events(self, category):
+        category.name = 'Новое название'
+        category.save()
+        assert events('category') == [('update', category.pk, [])]
+        assert ChangeEvent.objects.get(model='category').data['name'] == 'Новое название'
+
+    def test_queryset_update(self, product):
+        """Массовый update() пишет событие на каждый товар с новым снимком."""
+        Product.objects.filter(pk=product.pk).update(price=Decimal('1.00'))
+        (event,) = ChangeEvent.objects.all()
+        assert (event.operation, event.object_id) == ('update', product.pk)
+        assert set(event.fields) >= {'price', 'revision'}
+        assert event.data['price'] == '1.00'
+
+    def test_repricing(self, product):
+        """bulk_update переоценки тоже попадает в outbox."""
+        Repricer([RepricingRule(percent=10)]).run()
+        assert events() == [('update', product.pk, ['price', 'revision', 'updated_at'])]
+
+    def test_rollback_discards_events(self, category):
+        with pytest.raises(ValueError), transaction.atomic():
+            Product.objects.create(name='Товар', price=Decimal('1.00'), category=category)
+            raise ValueError
+        assert not ChangeEvent.objects.exists()
+
+    def test_import(self, category):
+        rows = [{'name': f'Товар {i}', 'price': '10.00', 'category': 'Категория'} for i in range(3)]
+        ProductImporter(batch_size=2).run(rows)
+        assert [event[0] for event in events()] == ['insert'] * 3
+
+
+@pytest.mark.django_db
+class TestRelay:
+    """Доставка событий потребителям по позициям."""
+
+    def test_delivers_in_batches_in_order(self, product, consumers):
+        for price in range(1, 6):
+            Product.objects.filter(pk=product.pk).update(price=price)
+        ids = list(ChangeEvent.objects.values_list('pk', flat=True))
+
+        result = relay_outbox(batch_size=2)
+
+        assert result == {'status': 'success', 'delivered': {'first': 5, 'second': 5}, 'failed': []}
+        assert consumers['first'] == [ids[:2], ids[2:4], ids[4:]]
+        assert ConsumerOffset.objects.get(consumer='second').position == ids[-1]
+        assert relay_outbox()['delivered'] == {'first': 0, 'second': 0}
+
+    def test_failed_consumer_retries(self, product, consumers, monkeypatch):
+        """Ошибка потребителя не сдвигает его позицию: порция будет доставлена снова."""
+        def broken(batch):
+            raise RuntimeError('недоступен')
+
+        monkeypatch.setitem(outbox.CONSUMERS, 'second', broken)
+        Product.objects.filter(pk=product.pk).update(price=1)
+
+        result = relay_outbox()
+        assert result['failed'] == ['second']
+        assert result['delivered']['first'] == 1
+        assert not ConsumerOffset.objects.filter(consumer='second', position__gt=0).exists()
+
+        retried = []
+        monkeypatch.setitem(outbox.CONSUMERS, 'second', retried.extend)
+        assert relay_outbox()['delivered'] == {'first': 0, 'second': 1}
+        assert retried[0].object_id == product.pk
+
+    def test_concurrent_relay_skipped(self, product, consumers):
+        with locks.hold('store:outbox:relay:default', 60) as acquired:
+            assert acquired
+            assert outbox.relay() == {}
+        assert outbox.relay() == {'first': 0, 'second': 0}
+
+    def test_log_consumer(self, product, caplog):
+        Product.objects.filter(pk=product.pk).update(price=1)
+        with caplog.at_level('INFO', logger='store.outbox'):
+            outbox.relay()
+        record = next(r for r in caplog.records if r.name == 'store.outbox')
+        assert record.event == 'product_update'
+        assert record.object_id == product.pk
+
+
+@pytest.mark.django_db
+class TestCompaction:
+    """Компакция outbox."""
+
+    @pytest.mark.parametrize('batch_size', [1, 500])
+    def test_deletes_delivered_and_compacts_tail(self, category, consumers, batch_size, monkeypatch):
+        monkeypatch.setattr(outbox, 'BATCH_SIZE', batch_size)
+        delivered = Product.objects.create(name='Старый товар', price=1, category=category)
+        outbox.relay()
+        consumers['second'].clear()
+
+        product = Product.objects.create(name='Товар', price=1, category=category)
+        Product.objects.filter(pk=product.pk).update(price=2)
+        other = Product.objects.create(name='Другой товар', price=1, category=category)
+        Product.objects.filter(pk=delivered.pk).update(price=3)
+        Product.objects.filter(pk=delivered.pk).update(name='Старый товар 2')
+        outbox.deliver('first', outbox.CONSUMERS['first'], batch_size=1, max_batches=1)
+
+        assert compact_outbox() == {'status': 'success', 'deleted': 1, 'compacted': 2}
+        # У каждого объекта осталось последнее событие; update после insert стал insert.
+        assert events() == [
+            ('insert', product.pk, []),
+            ('insert', other.pk, []),
+            ('update', delivered.pk, ['name', 'price', 'revision', 'updated_at']),
+        ]
+        assert ChangeEvent.objects.get(object_id=product.pk).data['price'] == '2.00'
+
+        outbox.relay()
+        assert compact_outbox()['deleted'] == 3
+        assert not ChangeEvent.objects.exists()
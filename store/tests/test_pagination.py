@@ -0,0 +1,87 @@
+"""
+Тесты для курсорной пагинации каталога.
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from store.models import Category, Product
+from store.pagination import CursorPaginator
+
+
+@pytest.fixture
+def products():
+    """30 товаров; у части одинаковое время создания, чтобы проверить ключ id."""
+    category = Category.objects.create(name='Категория')
+    now = timezone.now()
+    return [
+        Product.objects.create(
+            name=f'Товар {i:02d}', price=Decimal('100.00'), category=category,
+            created_at=now - timedelta(minutes=i // 3),
+        )
+        for i in range(30)
+    ]
+
+
+def expected_order():
+    return list(Product.objects.order_by('-created_at', '-id'))
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    """Тесты для CursorPaginator."""
+
+    def test_walk_forward_and_back(self, products):
+        """Проход вперед и назад дает тот же порядок, что и OFFSET."""
+        paginator = CursorPaginator(Product.objects.all(), 12)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+
+        assert [len(page) for page in pages] == [12, 12, 6]
+        assert [p for page in pages for p in page] == expected_order()
+        assert not pages[0].has_previous()
+
+        back = paginator.page(pages[2].previous_cursor)
+        assert list(back) == list(pages[1])
+        first = paginator.page(back.previous_cursor)
+        assert list(first) == list(pages[0])
+        assert not first.has_previous()
+
+    def test_no_count_query(self, products):
+        """Курсорная страница — один запрос без COUNT и OFFSET."""
+        paginator = CursorPaginator(Product.objects.all(), 12)
+        cursor = paginator.page().next_cursor
+        with CaptureQueriesContext(connection) as ctx:
+            list(paginator.page(cursor))
+        assert len(ctx.captured_queries) == 1
+        sql = ctx.captured_queries[0]['sql'].upper()
+        assert 'COUNT(' not in sql and 'OFFSET' not in sql
+
+    def test_list_view_cursor_mode_with_filters(self, client, products):
+        """Курсорный режим работает вместе с поиском и фильтром категории."""
+        url = reverse('store:index')
+        params = {'pagination': 'cursor', 'search': 'товар',
+                  'category': products[0].category_id}
+        response = client.get(url, params)
+        assert len(response.context['products']) == 12
+        assert 'cursor=' in response.context['page_links']['next']
+        assert 'search=' in response.context['page_links']['next']
+
+        response = client.get(f"{url}?{response.context['page_links']['next']}")
+        assert list(response.context['products']) == expected_order()[12:24]
+
+    def test_invalid_cursor_returns_404(self, client, products):
+        """Испорченный курсор — 404, как для несуществующей страницы."""
+        response = client.get(reverse('store:index'), {'cursor': 'мусор'})
+        assert response.status_code == 404
+
+    def test_category_detail_cursor_mode(self, client, products):
+        """Курсорный режим доступен на странице категории."""
+        url = reverse('store:category_detail', args=[products[0].category_id])
+        response = client.get(url, {'pagination': 'cursor'})
+        assert list(response.context['products']) == expected_order()[:12]
+        assert response.context['page_obj'].has_next()
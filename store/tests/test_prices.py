@@ -0,0 +1,139 @@
+"""
+Тесты для истории цен и запросов на момент времени.
+"""
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.utils import timezone
+from store.models import Category, PriceHistory, Product
+from store.prices import category_prices_at, compact_history, price_at
+from store.repricing import Repricer, RepricingRule
+from store.tasks import compact_price_history
+
+START = timezone.make_aware(datetime(2026, 1, 10, 12, 0))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемое текущее время: clock.now сдвигается вручную."""
+    class Clock:
+        now = START
+
+        def tick(self, **delta):
+            self.now += timedelta(**delta)
+            return self.now
+
+    clock = Clock()
+    monkeypatch.setattr(timezone, 'now', lambda: clock.now)
+    return clock
+
+
+@pytest.fixture
+def categories():
+    return Category.objects.create(name='Первая'), Category.objects.create(name='Вторая')
+
+
+def history(product):
+    return list(PriceHistory.objects.filter(product_id=product.pk).values_list('price', flat=True))
+
+
+@pytest.mark.django_db
+class TestPriceHistory:
+    """Запись истории и запросы на момент времени."""
+
+    def test_all_change_paths_recorded(self, clock, categories):
+        first, second = categories
+        product = Product.objects.create(name='Товар', price=Decimal('100.00'), category=first)
+        clock.tick(hours=1)
+        product.price = Decimal('110.00')
+        product.save()
+        clock.tick(hours=1)
+        product.name = 'Новое название'
+        product.save()  # цена не изменилась — строки нет
+        clock.tick(hours=1)
+        Product.objects.filter(pk=product.pk).update(price=Decimal('120.00'))
+        clock.tick(hours=1)
+        Repricer([RepricingRule(amount='5')]).run()
+        clock.tick(hours=1)
+        Product.objects.filter(pk=product.pk).update(category=second)
+        assert history(product) == [
+            Decimal('100.00'), Decimal('110.00'), Decimal('120.00'), Decimal('125.00'), Decimal('125.00'),
+        ]
+        clock.tick(hours=1)
+        product.refresh_from_db()
+        product_id = product.pk
+        product.delete()
+        assert PriceHistory.objects.filter(product_id=product_id).last().price is None
+
+    def test_save_with_deferred_price(self, clock, categories):
+        """Сохранение товара, загруженного без цены и категории, не пишет историю."""
+        product = Product.objects.create(name='Товар', price=Decimal('100.00'), category=categories[0])
+        clock.tick(hours=1)
+        Product.objects.only('name').get(pk=product.pk).save()
+        deferred = Product.objects.defer('price').get(pk=product.pk)
+        deferred.price = Decimal('90.00')
+        deferred.save()
+        assert history(product) == [Decimal('100.00'), Decimal('90.00')]
+
+    def test_price_at(self, clock, categories):
+        product = Product.objects.create(name='Товар', price=Decimal('100.00'), category=categories[0])
+        clock.tick(days=1)
+        Product.objects.filter(pk=product.pk).update(price=Decimal('90.00'))
+
+        assert price_at(product.pk, START - timedelta(seconds=1)) is None
+        assert price_at(product.pk, START) == Decimal('100.00')
+        assert price_at(product.pk, START + timedelta(hours=23)) == Decimal('100.00')
+        assert price_at(product.pk) == Decimal('90.00')
+
+    def test_category_prices_at(self, clock, categories):
+        first, second = categories
+        moved = Product.objects.create(name='Переехавший', price=Decimal('10.00'), category=first)
+        stayed = Product.objects.create(name='Оставшийся', price=Decimal('20.00'), category=first)
+        deleted = Product.objects.create(name='Удаленный', price=Decimal('30.00'), category=first)
+        before = clock.tick(hours=1)
+        clock.tick(hours=1)
+        moved.category = second
+        moved.save()
+        Product.objects.filter(pk=stayed.pk).update(price=Decimal('25.00'))
+        deleted_id = deleted.pk
+        deleted.delete()
+
+        assert category_prices_at(first.pk, before) == {
+            moved.pk: Decimal('10.00'), stayed.pk: Decimal('20.00'), deleted_id: Decimal('30.00'),
+        }
+        assert category_prices_at(first.pk) == {stayed.pk: Decimal('25.00')}
+        assert category_prices_at(second.pk) == {moved.pk: Decimal('10.00')}
+
+
+@pytest.mark.django_db
+class TestCompaction:
+    """Прореживание и срок хранения истории."""
+
+    def test_compact_history(self, clock, categories, settings):
+        product = Product.objects.create(name='Товар', price=Decimal('100.00'), category=categories[0])
+        # Два изменения в один день, затем повтор цены на следующий день.
+        for delta, price in ((1, '101.00'), (2, '102.00'), (25, '102.00'), (49, '103.00')):
+            clock.now = START + timedelta(hours=delta)
+            Product.objects.filter(pk=product.pk).update(price=Decimal(price))
+        clock.now = START + timedelta(days=100)
+
+        result = compact_history(retention_days=365, full_resolution_days=30)
+
+        assert result == {'downsampled': 3, 'expired': 0}
+        assert history(product) == [Decimal('102.00'), Decimal('103.00')]
+        assert price_at(product.pk, START + timedelta(hours=30)) == Decimal('102.00')
+
+        clock.now = START + timedelta(days=400)
+        settings.STORE_PRICE_HISTORY_RETENTION_DAYS = 365
+        assert compact_price_history()['expired'] == 1
+        assert history(product) == [Decimal('103.00')]
+        assert price_at(product.pk) == Decimal('103.00')
+
+    def test_deleted_products_expire(self, clock, categories):
+        product = Product.objects.create(name='Товар', price=Decimal('100.00'), category=categories[0])
+        clock.tick(hours=1)
+        product_id = product.pk
+        product.delete()
+        clock.tick(days=1000)
+        assert compact_history()['expired'] == 2
+        assert not PriceHistory.objects.filter(product_id=product_id).exists()
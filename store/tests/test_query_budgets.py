@@ -0,0 +1,91 @@
+"""
+Бюджеты запросов к БД для каждого URL приложения store.
+
+Новый URL в store/urls.py без бюджета в BUDGETS роняет
+test_every_url_has_budget.
+"""
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from store.instrumentation import fingerprint
+from store.models import Category, Product
+from store.urls import urlpatterns
+
+# Имя URL -> (максимум запросов на холодном кеше, параметры запроса).
+# На холодном кеше в бюджет входит один запрос навигации по категориям,
+# у страниц каталога — еще запрос водяного знака (store.conditional).
+BUDGETS = {
+    'index': (5, {}),
+    'category_detail': (5, {}),
+    'product_detail': (3, {}),
+    'product_create': (2, {}),
+    'product_edit': (3, {}),
+    'product_delete': (2, {}),
+    'export': (1, {'format': 'jsonl'}),
+}
+
+
+@pytest.fixture
+def catalog():
+    categories = [Category.objects.create(name=f'Категория {i}') for i in range(3)]
+    for i in range(30):
+        Product.objects.create(name=f'Товар {i}', price=Decimal('100.00') * (i + 1),
+                               category=categories[i % 3])
+    return categories
+
+
+def url_for(name, catalog):
+    product = Product.objects.filter(category=catalog[0]).first()
+    kwargs = {
+        'category_detail': {'category_id': catalog[0].id},
+        'product_detail': {'product_id': product.id},
+        'product_edit': {'product_id': product.id},
+        'product_delete': {'product_id': product.id},
+    }.get(name, {})
+    return reverse(f'store:{name}', kwargs=kwargs)
+
+
+def test_every_url_has_budget():
+    assert {pattern.name for pattern in urlpatterns} <= set(BUDGETS)
+
+
+def test_fingerprint_ignores_literals():
+    assert fingerprint("SELECT 1 FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21") == \
+        fingerprint("SELECT 2 FROM t WHERE id IN (%s) AND name = 'y' LIMIT 21")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', sorted(BUDGETS))
+def test_url_query_budget(name, client, catalog, query_budget):
+    """Каждый URL укладывается в бюджет и не выполняет N+1 запросов."""
+    budget, params = BUDGETS[name]
+    url = url_for(name, catalog)
+    with query_budget(budget):
+        response = client.get(url, params)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_response_headers(client, catalog, settings):
+    """Middleware добавляет заголовки X-DB-*."""
+    settings.STORE_QUERY_HEADERS = True
+    response = client.get(url_for('product_detail', catalog))
+    assert response['X-DB-Query-Count'] == '3'
+    assert response['X-DB-Duplicate-Queries'] == '0'
+    assert float(response['X-DB-Time-Ms']) >= 0
+
+
+@pytest.mark.django_db
+def test_task_query_log(catalog, caplog):
+    """Задачи Celery пишут количество запросов в лог store.queries."""
+    from store.tasks import log_new_product
+    product = Product.objects.first()
+    with caplog.at_level('INFO', logger='store.queries'):
+        log_new_product.apply(args=[product.id])
+    record = next(r for r in caplog.records if r.name == 'store.queries')
+    assert record.kind == 'task'
+    assert record.target == 'store.tasks.log_new_product'
+    assert record.db_query_count == 1
+    assert record.db_duplicate_queries == 0
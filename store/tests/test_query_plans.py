@@ -0,0 +1,127 @@
+"""
+Регрессионные тесты планов запросов для горячих путей каталога.
+
+Для каждого запроса представлений и админки выполняется EXPLAIN QUERY PLAN
+(SQLite); тест падает, если таблица товаров читается полным сканированием
+или сортировка каталога идет через временное B-дерево вместо индекса.
+"""
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+from store.facets import price_bucket_q
+from store.filters import filter_products
+from store.models import Category, PriceHistory, Product
+from store.pagination import CURSOR_ORDERING
+from store.prices import category_prices_queryset
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Проверки планов написаны для EXPLAIN QUERY PLAN SQLite'
+)
+
+
+def explain(queryset):
+    """Строки плана запроса."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_no_full_scan(queryset, allow_sort=False):
+    plan = explain(queryset)
+    full_scans = [line for line in plan
+                  if line.startswith('SCAN store_product') and 'INDEX' not in line]
+    assert not full_scans, f'Полное сканирование: {plan}'
+    if not allow_sort:
+        assert not any('TEMP B-TREE' in line for line in plan), f'Сортировка без индекса: {plan}'
+
+
+@pytest.fixture
+def category():
+    category = Category.objects.create(name='Категория')
+    Product.objects.create(name='Товар', price=Decimal('10.00'), category=category)
+    return category
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+    """Горячие запросы должны использовать индексы."""
+
+    def test_catalog_first_page(self, category):
+        """Главная страница: ORDER BY created_at DESC LIMIT 12."""
+        assert_no_full_scan(Product.objects.select_related('category')[:12])
+
+    def test_catalog_deep_offset_page(self, category):
+        assert_no_full_scan(Product.objects.select_related('category')[60000:60012])
+
+    def test_category_filter(self, category):
+        """?category= и страница категории."""
+        queryset = filter_products(Product.objects.select_related('category'),
+                                   {'category': category.id})
+        assert_no_full_scan(queryset[:12])
+
+    def test_cursor_page(self, category):
+        """Курсорная страница: условие по (created_at, id) по индексу."""
+        anchor = Product.objects.get()
+        queryset = Product.objects.filter(
+            Q(created_at__lt=anchor.created_at) | Q(created_at=anchor.created_at, id__lt=anchor.id)
+        ).order_by(*CURSOR_ORDERING)
+        assert_no_full_scan(queryset[:13])
+
+    def test_category_cursor_page(self, category):
+        queryset = Product.objects.filter(
+            category=category, created_at__lt=timezone.now()
+        ).order_by(*CURSOR_ORDERING)
+        assert_no_full_scan(queryset[:13])
+
+    def test_price_range(self, category):
+        """PriceRangeFilter и ?price=: поиск по индексу цены (сортировка допустима)."""
+        for key in ('0-1000', '5000-20000', '20000+'):
+            queryset = Product.objects.filter(price_bucket_q(key))
+            assert_no_full_scan(queryset[:25], allow_sort=True)
+
+    def test_admin_date_hierarchy(self, category):
+        """date_hierarchy: диапазон по created_at."""
+        start = timezone.make_aware(datetime(2025, 11, 1))
+        end = timezone.make_aware(datetime(2025, 12, 1))
+        queryset = Product.objects.filter(created_at__gte=start, created_at__lt=end)
+        assert_no_full_scan(queryset[:25])
+
+    def test_search(self, category):
+        """Полнотекстовый поиск: FTS5 + поиск товаров по первичному ключу."""
+        queryset = filter_products(Product.objects.select_related('category'),
+                                   {'search': 'товар'})
+        assert_no_full_scan(queryset[:12], allow_sort=True)
+
+    def test_category_counts(self, category):
+        """Пересчет счетчиков категорий читает только индекс."""
+        queryset = (Product.objects.order_by().values('category_id')
+                    .annotate(total=Count('id')))
+        plan = explain(queryset)
+        assert any('COVERING INDEX' in line for line in plan), plan
+
+    @pytest.mark.parametrize('scope', ['catalog', 'category'])
+    def test_watermark(self, category, scope):
+        """Последнее изменение товаров для условного GET читается по индексу."""
+        products = Product.objects.all()
+        if scope == 'category':
+            products = products.filter(category=category)
+        assert_no_full_scan(products.order_by('-updated_at').values('updated_at')[:1])
+
+    def test_price_at(self, category):
+        """Цена товара на момент времени читается только из индекса истории."""
+        product = Product.objects.get()
+        queryset = (PriceHistory.objects.filter(product_id=product.pk, valid_from__lte=timezone.now())
+                    .order_by('-valid_from', '-pk').values_list('price')[:1])
+        plan = explain(queryset)
+        assert all('COVERING INDEX' in line for line in plan if 'store_pricehistory' in line), plan
+        assert not any('TEMP B-TREE' in line for line in plan), plan
+
+    def test_category_prices_at(self, category):
+        """Цены категории на момент: внешний запрос и подзапрос — по покрывающим индексам."""
+        plan = explain(category_prices_queryset(category.pk, timezone.now()))
+        assert len([line for line in plan if 'COVERING INDEX store_price' in line]) == 2, plan
+        assert not any(line.startswith('SCAN') or 'TEMP B-TREE' in line for line in plan), plan
@@ -0,0 +1,198 @@
+"""
+Тесты для массовой переоценки товаров.
+"""
+import json
+import pytest
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from store.models import Category, Product
+from store.repricing import Repricer, RepricingRule, parse_rules
+from store.tasks import reprice_products
+
+
+@pytest.fixture
+def catalog():
+    books = Category.objects.create(name='Книги')
+    phones = Category.objects.create(name='Телефоны')
+    prices = ['100.05', '199.99', '250.00', '999.99', '1500.00']
+    for i, price in enumerate(prices):
+        Product.objects.create(name=f'Книга {i}', price=Decimal(price), category=books)
+        Product.objects.create(name=f'Телефон {i}', price=Decimal(price), category=phones)
+    return books, phones
+
+
+def prices(category):
+    return list(category.products.order_by('pk').values_list('price', flat=True))
+
+
+@pytest.mark.django_db
+class TestRepricing:
+    """Тесты для правил и движка переоценки."""
+
+    def test_rule_rounding(self):
+        """Новая цена округляется до копеек по ROUND_HALF_UP."""
+        assert RepricingRule(percent=10).apply(Decimal('100.05')) == Decimal('110.06')
+        assert RepricingRule(percent='-10').apply(Decimal('0.05')) == Decimal('0.05')
+        assert RepricingRule(percent=-100).apply(Decimal('10.00')) == Decimal('0.01')
+        assert RepricingRule(amount='-0.015').apply(Decimal('1.00')) == Decimal('0.99')
+        assert RepricingRule(price='1000').apply(Decimal('5.00')) == Decimal('1000.00')
+        assert RepricingRule(percent=10 ** 8).apply(Decimal('1000.00')) == Decimal('99999999.99')
+
+    def test_rule_validation(self):
+        """Правило задает ровно одно изменение цены и только известные поля."""
+        with pytest.raises(ValueError):
+            RepricingRule()
+        with pytest.raises(ValueError):
+            RepricingRule(percent=10, amount=5)
+        with pytest.raises(ValueError):
+            RepricingRule(price=0)
+        with pytest.raises(ValueError):
+            RepricingRule(price='100000000')
+        with pytest.raises(ValueError):
+            RepricingRule(percent='десять')
+        with pytest.raises(ValueError):
+            parse_rules([{'percent': 10, 'color': 'red'}])
+        with pytest.raises(ValueError):
+            parse_rules([])
+
+    def test_rule_roundtrip(self):
+        """as_dict() и from_dict() взаимно обратны."""
+        rule = RepricingRule(category_id=3, min_price='10', max_price='20.5', amount='-1.5')
+        restored = RepricingRule.from_dict(json.loads(json.dumps(rule.as_dict())))
+        assert restored.as_dict() == rule.as_dict()
+        assert str(restored) == str(rule)
+
+    def test_first_matching_rule(self, catalog):
+        """К товару применяется первое подходящее правило набора."""
+        books, phones = catalog
+        rules = [
+            RepricingRule(category_id=books.pk, max_price='200', percent=10),
+            RepricingRule(min_price='1000', price='1000'),
+        ]
+        stats = Repricer(rules).run()
+        assert prices(books) == [
+            Decimal('110.06'), Decimal('219.99'), Decimal('250.00'), Decimal('999.99'), Decimal('1000.00'),
+        ]
+        assert prices(phones) == [
+            Decimal('100.05'), Decimal('199.99'), Decimal('250.00'), Decimal('999.99'), Decimal('1000.00'),
+        ]
+        assert stats.matched == 4
+        assert stats.updated == 4
+
+    def test_preview(self, catalog):
+        """Предпросмотр считает товары каждого правила без изменения цен."""
+        books, phones = catalog
+        before = prices(books) + prices(phones)
+        preview = Repricer([
+            RepricingRule(category_id=books.pk, percent=5),
+            RepricingRule(max_price='250', percent=-5),
+        ]).preview()
+        assert [row['count'] for row in preview['rules']] == [5, 2]
+        assert preview['total'] == 7
+        assert prices(books) + prices(phones) == before
+
+    def test_small_chunks_and_sparse_ids(self, catalog):
+        """Порции по диапазонам id с пропусками обрабатывают все товары."""
+        books, _ = catalog
+        Product.objects.filter(name__in=['Книга 1', 'Телефон 3']).delete()
+        calls = []
+        stats = Repricer([RepricingRule(amount=1)], chunk_size=3).run(
+            progress=lambda stats, done, total: calls.append((done, total)),
+        )
+        assert stats.matched == stats.updated == 8
+        assert stats.next_id is None
+        assert calls[-1][0] == calls[-1][1]
+        assert stats.chunks == len(calls)
+        assert prices(books)[0] == Decimal('101.05')
+
+    def test_resume_from_id(self, catalog):
+        """Запуск с start_id не трогает товары до этого id."""
+        ids = list(Product.objects.order_by('pk').values_list('pk', flat=True))
+        Repricer([RepricingRule(price='5')]).run(start_id=ids[6])
+        changed = Product.objects.filter(price=Decimal('5')).values_list('pk', flat=True)
+        assert sorted(changed) == ids[6:]
+
+    def test_interrupted_after_commit(self, catalog):
+        """Прерывание в progress() после фиксации порции: продолжение ее не повторяет."""
+        ids = list(Product.objects.order_by('pk').values_list('pk', flat=True))
+
+        def interrupt(stats, done, total):
+            raise KeyboardInterrupt
+
+        repricer = Repricer([RepricingRule(amount=1)], chunk_size=4)
+        with pytest.raises(KeyboardInterrupt):
+            repricer.run(progress=interrupt)
+        stats = repricer.last_stats
+        assert stats.next_id == ids[0] + 4
+        Repricer([RepricingRule(amount=1)], chunk_size=4).run(start_id=stats.next_id, end_id=stats.last_id)
+        assert Product.objects.filter(price=Decimal('101.05')).count() == 2
+
+    def test_clamps_to_max_price(self, catalog):
+        """Цена выше максимума поля не ломает bulk_update порции."""
+        Repricer([RepricingRule(percent=10 ** 8)]).run()
+        assert set(Product.objects.values_list('price', flat=True)) == {Decimal('99999999.99')}
+
+    def test_bumps_revision(self, catalog):
+        """Переоценка меняет ревизию и дату изменения товаров."""
+        product = Product.objects.order_by('pk').first()
+        Repricer([RepricingRule(percent=1)], queryset=Product.objects.filter(pk=product.pk)).run()
+        updated = Product.objects.get(pk=product.pk)
+        assert updated.revision > product.revision
+        assert updated.updated_at > product.updated_at
+
+
+@pytest.mark.django_db
+class TestRepricingTask:
+    """Тесты для задачи Celery и команды переоценки."""
+
+    def test_task(self, catalog):
+        """Задача применяет правила и возвращает счетчики."""
+        books, _ = catalog
+        rules = [RepricingRule(category_id=books.pk, percent=10).as_dict()]
+        result = reprice_products.apply(args=[rules], kwargs={'chunk_size': 2}).get()
+        assert result['status'] == 'success'
+        assert result['updated'] == 5
+        assert prices(books)[0] == Decimal('110.06')
+
+    def test_task_dry_run(self, catalog):
+        """dry_run только считает затронутые товары."""
+        books, _ = catalog
+        result = reprice_products.apply(args=[[{'percent': '10'}]], kwargs={'dry_run': True}).get()
+        assert result['status'] == 'dry_run'
+        assert result['total'] == 10
+        assert prices(books)[0] == Decimal('100.05')
+
+    def test_task_invalid_rules(self):
+        """Ошибка в правилах возвращается результатом задачи."""
+        result = reprice_products.apply(args=[[{'discount': 10}]]).get()
+        assert result['status'] == 'error'
+
+    def test_command(self, catalog, tmp_path):
+        """Команда читает правила из файла или строки."""
+        books, phones = catalog
+        out = StringIO()
+        call_command('reprice', json.dumps([{'category_id': phones.pk, 'amount': '-0.05'}]),
+                     '--dry-run', stdout=out)
+        assert 'Будет затронуто товаров: 5' in out.getvalue()
+        assert prices(phones)[0] == Decimal('100.05')
+
+        path = tmp_path / 'rules.json'
+        path.write_text(json.dumps([{'category_id': phones.pk, 'amount': '-0.05'}]))
+        call_command('reprice', str(path), '--chunk-size', '2', stdout=out)
+        assert prices(phones)[0] == Decimal('100.00')
+        assert prices(books)[0] == Decimal('100.05')
+
+    def test_admin_action(self, admin_client, catalog):
+        """Действие админки меняет только выбранные товары, без ошибок float."""
+        product, other = Product.objects.order_by('pk')[:2]
+        response = admin_client.post(reverse('admin:store_product_changelist'), {
+            'action': 'make_expensive',
+            '_selected_action': [product.pk],
+        })
+        assert response.status_code == 302
+        product.refresh_from_db()
+        other.refresh_from_db()
+        assert product.price == Decimal('110.06')
+        assert other.price == Decimal('100.05')
@@ -0,0 +1,144 @@
+"""
+Тесты для сводной статистики каталога по категориям и дням.
+"""
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from store import locks, rollups
+from store.generator import CatalogGenerator
+from store.models import Category, CategoryDailyStats, Product, RollupWatermark
+from store.tasks import refresh_catalog_stats
+
+FIRST_DAY = date(2025, 12, 30)
+SECOND_DAY = date(2026, 1, 5)
+
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+
+def stats():
+    return {
+        (row.category_id, row.day): (row.product_count, row.price_min, row.price_max, row.price_sum)
+        for row in CategoryDailyStats.objects.all()
+    }
+
+
+@pytest.fixture
+def catalog():
+    books = Category.objects.create(name='Книги')
+    phones = Category.objects.create(name='Телефоны')
+    for name, price, category, day in (
+        ('Роман', '500.00', books, FIRST_DAY),
+        ('Учебник', '1500.00', books, FIRST_DAY),
+        ('Словарь', '800.00', books, SECOND_DAY),
+        ('Смартфон', '29999.00', phones, SECOND_DAY),
+    ):
+        Product.objects.create(name=name, price=Decimal(price), category=category, created_at=at(day))
+    return books, phones
+
+
+@pytest.mark.django_db
+class TestRefresh:
+    """Инкрементальное обновление сводки."""
+
+    def test_first_run_builds(self, catalog):
+        books, phones = catalog
+        assert not rollups.is_built()
+        assert refresh_catalog_stats()['status'] == 'success'
+        assert stats() == {
+            (books.pk, FIRST_DAY): (2, Decimal('500.00'), Decimal('1500.00'), Decimal('2000.00')),
+            (books.pk, SECOND_DAY): (1, Decimal('800.00'), Decimal('800.00'), Decimal('800.00')),
+            (phones.pk, SECOND_DAY): (1, Decimal('29999.00'), Decimal('29999.00'), Decimal('29999.00')),
+        }
+        assert rollups.refresh() == {'processed': 0, 'buckets': 0}
+
+    def test_changes_match_rebuild(self, catalog):
+        """Изменения цены, категории, создание и удаление — как полный пересчет."""
+        books, phones = catalog
+        rollups.refresh()
+        Product.objects.filter(name='Роман').update(price=Decimal('100.00'))
+        textbook = Product.objects.get(name='Учебник')
+        textbook.category = phones
+        textbook.save()
+        Product.objects.get(name='Словарь').delete()
+        Product.objects.create(name='Чехол', price=Decimal('300.00'), category=phones,
+                               created_at=at(SECOND_DAY, hour=20))
+
+        result = rollups.refresh(batch_size=2)
+        assert result['processed'] == 4
+        incremental = stats()
+        rollups.rebuild()
+        assert incremental == stats()
+        assert incremental[(phones.pk, SECOND_DAY)][0] == 2
+        assert (books.pk, SECOND_DAY) not in incremental
+
+    def test_recomputes_only_touched_buckets(self, catalog):
+        books, _ = catalog
+        rollups.refresh()
+        CategoryDailyStats.objects.filter(category=books, day=FIRST_DAY).update(product_count=99)
+        Product.objects.filter(name='Словарь').update(price=Decimal('900.00'))
+
+        assert rollups.refresh()['processed'] == 1
+        assert CategoryDailyStats.objects.get(category=books, day=FIRST_DAY).product_count == 99
+        assert CategoryDailyStats.objects.get(category=books, day=SECOND_DAY).price_max == Decimal('900.00')
+        assert RollupWatermark.objects.get().position > 0
+
+    def test_concurrent_refresh_skipped(self, catalog):
+        with locks.hold('store:rollups:refresh:default', 60):
+            assert rollups.refresh() == {}
+        assert rollups.refresh()['buckets'] == 3
+
+    def test_generator_rebuilds_categories(self):
+        """generate_catalog не пишет историю цен и пересчитывает сводку сам."""
+        CatalogGenerator(categories=3, batch_size=50).generate(200)
+        assert sum(CategoryDailyStats.objects.values_list('product_count', flat=True)) == 200
+
+    def test_category_summary(self, catalog):
+        books, phones = catalog
+        rollups.refresh()
+        summary = {row['category__name']: row for row in rollups.category_summary()}
+        assert summary['Книги']['product_count'] == 3
+        assert summary['Книги']['price_avg'] == Decimal('933.33')
+        assert summary['Телефоны']['price_max'] == Decimal('29999.00')
+
+
+@pytest.mark.django_db
+class TestAdmin:
+    """Дашборд статистики и date_hierarchy товаров по сводке."""
+
+    def test_dashboard(self, admin_client, catalog):
+        rollups.refresh()
+        response = admin_client.get(reverse('admin:store_categorydailystats_changelist'),
+                                    {'day__year': 2026})
+        assert response.status_code == 200
+        summary = {row['category__name']: row['product_count'] for row in response.context['category_summary']}
+        assert summary == {'Книги': 1, 'Телефоны': 1}
+        assert 'Итоги по категориям' in response.content.decode()
+
+    def test_date_hierarchy_from_rollups(self, admin_client, catalog):
+        books, _ = catalog
+        rollups.refresh()
+        url = reverse('admin:store_product_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get(url)
+        assert 'created_at__year=2025' in response.content.decode()
+        assert 'created_at__year=2026' in response.content.decode()
+        assert not any('django_datetime_trunc' in query['sql'] for query in queries)
+
+        response = admin_client.get(url, {'created_at__year': 2025, 'category__id__exact': books.pk})
+        assert 'created_at__month=12' in response.content.decode()
+
+    def test_date_hierarchy_fallback(self, admin_client, catalog):
+        """С поиском или фильтром по цене даты берутся из таблицы товаров."""
+        url = reverse('admin:store_product_changelist')
+        rollups.refresh()
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get(url, {'q': 'Смартфон'})
+        assert any('django_datetime_trunc' in query['sql'] for query in queries)
+        # Один товар — сразу уровень дней его месяца.
+        assert 'created_at__day=5' in response.content.decode()
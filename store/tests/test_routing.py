@@ -0,0 +1,184 @@
+"""
+Тесты для чтения каталога с реплик БД (store.routing).
+
+Реплики — два отдельных файла SQLite с той же схемой, данные в них
+заполняются отдельно от основной БД, как при отставании репликации.
+"""
+import pytest
+from asgiref.sync import async_to_sync
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connections
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from store.caching import get_cache
+from store.metrics import counters
+from store.models import Category, Product
+from store.routing import (
+    PIN_COOKIE, ReplicaRouter, choose_replica, latency, read_state, use_replicas,
+)
+
+REPLICAS = ['replica_a', 'replica_b']
+
+
+@pytest.fixture(scope='module')
+def replica_databases(django_db_setup, django_db_blocker, tmp_path_factory):
+    """Файлы SQLite реплик с примененными миграциями."""
+    directory = tmp_path_factory.mktemp('replicas')
+    # Замер времени подключается к соединениям реплик при их создании.
+    with django_db_blocker.unblock(), override_settings(STORE_READ_REPLICAS=REPLICAS):
+        for alias in REPLICAS:
+            connections.settings[alias] = {
+                **connections.settings['default'],
+                'NAME': str(directory / f'{alias}.sqlite3'),
+            }
+            call_command('migrate', database=alias, verbosity=0)
+    yield REPLICAS
+    for alias in REPLICAS:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+
+
+@pytest.fixture
+def replicas(replica_databases, settings):
+    settings.STORE_READ_REPLICAS = REPLICAS
+    settings.STORE_REPLICA_SELECTION = 'round_robin'
+    counters.reset('replicas.')
+    latency.reset()
+    return REPLICAS
+
+
+def fill(alias, name):
+    """Категория и товар в одной БД; id совпадают во всех БД."""
+    category = Category(name=f'Категория {name}')
+    category.save(using=alias)
+    product = Product(name=f'Товар {name}', price=Decimal('100.00'), category=category)
+    product.save(using=alias)
+    return product
+
+
+def reads():
+    return {alias: counters.get(f'replicas.reads.{alias}') for alias in REPLICAS}
+
+
+class TestReplicaSelection:
+    """Тесты для выбора реплики и решений роутера без обращения к БД."""
+
+    def test_round_robin(self, settings):
+        """Реплики выбираются по кругу."""
+        settings.STORE_REPLICA_SELECTION = 'round_robin'
+        chosen = [choose_replica(REPLICAS) for _ in range(4)]
+        assert chosen[0] != chosen[1]
+        assert chosen[:2] == chosen[2:]
+
+    def test_least_latency(self, settings):
+        """Выбирается реплика с наименьшим средним временем, без замеров — первой."""
+        settings.STORE_REPLICA_SELECTION = 'least_latency'
+        latency.reset()
+        latency.record('replica_a', 0.010)
+        assert choose_replica(REPLICAS) == 'replica_b'
+        latency.record('replica_b', 0.050)
+        assert choose_replica(REPLICAS) == 'replica_a'
+        for _ in range(20):
+            latency.record('replica_a', 0.100)
+        assert choose_replica(REPLICAS) == 'replica_b'
+
+    def test_unknown_policy(self, settings):
+        settings.STORE_REPLICA_SELECTION = 'random'
+        with pytest.raises(ValueError):
+            choose_replica(REPLICAS)
+
+    def test_router(self, settings):
+        """Чтения с реплики только в use_replicas() и до первой записи."""
+        settings.STORE_READ_REPLICAS = REPLICAS
+        router = ReplicaRouter()
+        assert router.db_for_read(Product) is None
+        with use_replicas():
+            replica = router.db_for_read(Product)
+            assert replica in REPLICAS
+            assert router.db_for_read(Category) == replica
+            assert router.db_for_write(Product) == 'default'
+            assert router.db_for_read(Product) is None
+        with read_state(pinned=True), use_replicas():
+            assert router.db_for_read(Product) is None
+
+    def test_related_objects_from_same_database(self, settings):
+        settings.STORE_READ_REPLICAS = REPLICAS
+        product = Product(name='Товар')
+        product._state.db = 'replica_b'
+        with use_replicas():
+            assert ReplicaRouter().db_for_read(Category, instance=product) == 'replica_b'
+
+
+@pytest.mark.usefixtures('replica_databases')
+@pytest.mark.django_db(databases=['default', *REPLICAS])
+class TestReplicaReads:
+    """Тесты для страниц каталога с двумя репликами."""
+
+    def test_catalog_pages_round_robin(self, client, replicas):
+        """Страницы каталога по очереди читаются с каждой реплики."""
+        product = fill('replica_a', 'A')
+        fill('replica_b', 'B')
+        path = reverse('store:product_detail', kwargs={'product_id': product.pk})
+        names = set()
+        for _ in range(2):
+            get_cache().clear()
+            response = client.get(path)
+            assert response.status_code == 200
+            names.add(response.context['product'].name)
+        assert names == {'Товар A', 'Товар B'}
+        assert reads() == {'replica_a': 1, 'replica_b': 1}
+
+    def test_pinned_to_primary_after_create(self, client, replicas):
+        """После создания товара редирект читает его из основной БД."""
+        category = Category.objects.create(name='Основная')
+        response = client.post(reverse('store:product_create'), {
+            'name': 'Новый товар',
+            'description': 'Описание',
+            'price': '150.00',
+            'category': category.pk,
+        })
+        assert response.status_code == 302
+        assert PIN_COOKIE in response.cookies
+        assert client.get(response.url).status_code == 200
+        assert reads() == {'replica_a': 0, 'replica_b': 0}
+
+        # Без закрепления чтение идет с реплики, где товара еще нет.
+        client.cookies.pop(PIN_COOKIE)
+        assert client.get(response.url).status_code == 404
+        assert sum(reads().values()) == 1
+
+    def test_admin_reads_primary(self, admin_client, replicas):
+        """Админка работает только с основной БД."""
+        fill('default', 'основной')
+        response = admin_client.get(reverse('admin:store_product_changelist'))
+        assert 'Товар основной' in response.content.decode()
+        assert reads() == {'replica_a': 0, 'replica_b': 0}
+
+    def test_least_latency_measured(self, client, replicas, settings):
+        """Соединения реплик замеряют время запросов."""
+        settings.STORE_REPLICA_SELECTION = 'least_latency'
+        fill('replica_a', 'A')
+        fill('replica_b', 'B')
+        client.get(reverse('store:index'))
+        client.get(reverse('store:index'))
+        assert all(latency.get(alias) is not None for alias in REPLICAS)
+
+    def test_queryset_update_reads_primary(self, replicas):
+        """Массовое обновление внутри use_replicas() выбирает ID из основной БД."""
+        product = fill('default', 'основной')
+        with use_replicas():
+            assert Product.objects.filter(pk=product.pk).update(price=Decimal('200.00')) == 1
+        assert Product.objects.get(pk=product.pk).revision == 1
+        assert reads() == {'replica_a': 0, 'replica_b': 0}
+
+    @pytest.mark.urls('config.asgi_urls')
+    def test_async_views(self, replicas):
+        """Async-представления тоже читают с реплики."""
+        product = fill('replica_a', 'A')
+        fill('replica_b', 'B')
+        path = reverse('store:product_detail', kwargs={'product_id': product.pk})
+        response = async_to_sync(AsyncClient().get)(path)
+        assert response.status_code == 200
+        assert sum(reads().values()) == 1
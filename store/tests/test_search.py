@@ -0,0 +1,92 @@
+"""
+Тесты для полнотекстового поиска товаров.
+"""
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from store.models import Category, Product
+from store.search import search_products
+
+
+@pytest.fixture
+def catalog():
+    """Небольшой каталог для поиска."""
+    electronics = Category.objects.create(name='Электроника')
+    books = Category.objects.create(name='Книги')
+    phone = Product.objects.create(
+        name='Смартфон', description='Современный смартфон с камерой',
+        price=Decimal('29999.00'), category=electronics,
+    )
+    laptop = Product.objects.create(
+        name='Ноутбук', description='Мощный ноутбук',
+        price=Decimal('89999.00'), category=electronics,
+    )
+    book = Product.objects.create(
+        name='Django в примерах', description='Книга про камеры не рассказывает',
+        price=Decimal('1599.00'), category=books,
+    )
+    return {'electronics': electronics, 'books': books,
+            'phone': phone, 'laptop': laptop, 'book': book}
+
+
+def search_ids(query):
+    return list(search_products(Product.objects.all(), query).values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+class TestProductSearch:
+    """Тесты для поискового индекса."""
+
+    def test_prefix_match(self, catalog):
+        """Поиск по префиксу слова без учета регистра."""
+        assert search_ids('СМАРТ') == [catalog['phone'].id]
+
+    def test_all_tokens_required(self, catalog):
+        """Все слова запроса должны встречаться в документе."""
+        assert search_ids('django пример') == [catalog['book'].id]
+        assert search_ids('django ноутбук') == []
+
+    def test_category_name_indexed(self, catalog):
+        """Товары находятся по названию категории."""
+        assert set(search_ids('электроника')) == {catalog['phone'].id, catalog['laptop'].id}
+
+    def test_ranking_prefers_name(self, catalog):
+        """Совпадение в названии важнее совпадения в описании."""
+        catalog['book'].description = 'Смартфон не нужен'
+        catalog['book'].save()
+        assert search_ids('смартфон') == [catalog['phone'].id, catalog['book'].id]
+
+    def test_index_follows_update_and_delete(self, catalog):
+        """Индекс обновляется при сохранении и удалении товара."""
+        catalog['laptop'].name = 'Планшет'
+        catalog['laptop'].save()
+        assert search_ids('ноутбук') == [catalog['laptop'].id]  # осталось в описании
+        assert search_ids('планшет') == [catalog['laptop'].id]
+
+        catalog['laptop'].delete()
+        assert search_ids('планшет') == []
+
+    def test_index_follows_bulk_update(self, catalog):
+        """Массовый QuerySet.update() переиндексирует затронутые товары."""
+        Product.objects.filter(category=catalog['electronics']).update(description='Гаджет')
+        assert set(search_ids('гаджет')) == {catalog['phone'].id, catalog['laptop'].id}
+        assert search_ids('камерой') == []
+
+    def test_bulk_update_in_batches(self, catalog, monkeypatch):
+        """Обновление, меняющее условие отбора, порциями затрагивает все товары."""
+        monkeypatch.setattr('store.models.UPDATE_BATCH_SIZE', 1)
+        updated = Product.objects.exclude(description='Гаджет').update(description='Гаджет')
+        assert updated == 3
+        assert len(search_ids('гаджет')) == 3
+
+    def test_index_follows_category_rename(self, catalog):
+        """Переименование категории отражается в индексе."""
+        catalog['books'].name = 'Литература'
+        catalog['books'].save()
+        assert search_ids('литература') == [catalog['book'].id]
+        assert search_ids('книги') == []
+
+    def test_list_view_uses_index(self, client, catalog):
+        """ProductListView ищет через индекс."""
+        response = client.get(reverse('store:index'), {'search': 'ноут'})
+        assert list(response.context['products']) == [catalog['laptop']]
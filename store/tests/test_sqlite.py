@@ -0,0 +1,65 @@
+"""
+Тесты для настройки соединений SQLite (store.sqlite).
+"""
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from store.sqlite import is_locked_error, pragma_values
+
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20_000,
+    'cache_size': -64_000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+@pytest.fixture
+def file_connection(tmp_path):
+    """Отдельное соединение с файлом SQLite (WAL не работает в памяти)."""
+    wrapper = DatabaseWrapper(
+        {**connection.settings_dict, 'NAME': str(tmp_path / 'profile.sqlite3')},
+        alias=connection.alias,
+    )
+    yield wrapper
+    wrapper.close()
+
+
+def read_pragmas(wrapper):
+    with wrapper.cursor() as cursor:
+        values = {}
+        for name in PRODUCTION_PRAGMAS:
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+        return values
+
+
+@pytest.mark.django_db
+class TestSQLiteProfile:
+    """Тесты для PRAGMA профиля БД, выполняемых при открытии соединения."""
+
+    def test_pragmas_applied_on_connect(self, file_connection, settings):
+        """Новое соединение получает PRAGMA из STORE_SQLITE_PRAGMAS."""
+        settings.STORE_SQLITE_PRAGMAS = PRODUCTION_PRAGMAS
+        assert read_pragmas(file_connection) == {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'busy_timeout': 20_000,
+            'cache_size': -64_000,
+            'mmap_size': 256 * 1024 * 1024,
+        }
+
+    def test_default_profile_keeps_sqlite_defaults(self, file_connection, settings):
+        """Профиль development ничего не меняет."""
+        settings.STORE_SQLITE_PRAGMAS = {}
+        assert read_pragmas(file_connection)['journal_mode'] == 'delete'
+
+    def test_pragma_values(self):
+        assert set(pragma_values()) == {
+            'journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size',
+        }
+
+    def test_is_locked_error(self):
+        assert is_locked_error(Exception('database is locked'))
+        assert not is_locked_error(Exception('no such table: store_product'))
@@ -2,9 +2,14 @@
 Тесты для фоновых задач Celery.
 """
 import pytest
+import threading
 from decimal import Decimal
+from django.urls import reverse
+from store import batching
+from store.batching import batch_new_products, flush_window, get_metrics, queue_new_product
+from store.metrics import counters
 from store.models import Category, Product
-from store.tasks import log_new_product
+from store.tasks import log_new_product, log_new_products
 
 
 @pytest.mark.django_db
@@ -68,3 +73,88 @@ class TestCeleryTasks:
         # Проверяем, что задача выполнена успешно
         assert result.successful() or result.state == 'SUCCESS'
 
+
+@pytest.mark.django_db
+class TestBatchedProductEvents:
+    """Тесты для пакетной обработки событий о новых товарах."""
+
+    @pytest.fixture
+    def products(self):
+        category = Category.objects.create(name='Категория')
+        return [
+            Product.objects.create(name=f'Товар {i}', price=Decimal('10.00'), category=category)
+            for i in range(5)
+        ]
+
+    @pytest.fixture
+    def sent(self, monkeypatch):
+        """Перехват отправки задачи в брокер."""
+        calls = []
+        monkeypatch.setattr(log_new_products, 'apply_async',
+                            lambda args, kwargs: calls.append(*args))
+        counters.reset('product_events.')
+        yield calls
+        flush_window()
+
+    def test_log_new_products_single_query(self, products, django_assert_num_queries):
+        """Пакетная задача загружает все товары одним запросом."""
+        ids = [p.id for p in products] + [99999]
+        with django_assert_num_queries(1):
+            result = log_new_products(ids)
+        assert result['status'] == 'partial'
+        assert [p['product_id'] for p in result['products']] == ids[:-1]
+        assert result['products'][0]['category'] == 'Категория'
+        assert result['missing'] == [99999]
+
+    def test_batch_context_manager(self, products, sent, django_capture_on_commit_callbacks):
+        """Внутри блока события копятся и отправляются одной задачей после коммита."""
+        with django_capture_on_commit_callbacks(execute=True):
+            with batch_new_products():
+                for product in products:
+                    queue_new_product(product.id)
+                assert sent == []
+            assert sent == []
+        assert sent == [[p.id for p in products]]
+        assert get_metrics() == {
+            'product_events.queued': 5,
+            'product_events.batches': 1,
+            'product_events.dispatched': 5,
+        }
+
+    def test_create_view_batches_across_requests(self, client, sent,
+                                                 django_capture_on_commit_callbacks):
+        """Товары, созданные разными запросами, отправляются одной задачей окна."""
+        category = Category.objects.create(name='Категория')
+        for name in ('Первый товар', 'Второй товар'):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = client.post(reverse('store:product_create'), {
+                    'name': name, 'description': '', 'price': '100.00',
+                    'category': category.id,
+                })
+            assert response.status_code == 302
+        assert sent == []
+        with django_capture_on_commit_callbacks(execute=True):
+            assert flush_window() == 2
+        assert sent == [[Product.objects.get(name='Первый товар').id,
+                         Product.objects.get(name='Второй товар').id]]
+
+    def test_window_flushed_by_timer(self, sent, monkeypatch):
+        """Окно отправляется по таймеру без следующего запроса."""
+        monkeypatch.setattr(batching, 'FLUSH_INTERVAL', 0.05)
+        dispatched = threading.Event()
+        monkeypatch.setattr('store.batching._dispatch',
+                            lambda ids: (sent.append(ids), dispatched.set()))
+        batching.window.add([1, 2])
+        batching.window.add([3])
+        assert dispatched.wait(timeout=5)
+        assert sent == [[1, 2, 3]]
+        assert len(batching.window) == 0
+
+    def test_window_flushed_when_full(self, sent, monkeypatch, django_capture_on_commit_callbacks):
+        """Заполненное окно отправляется сразу."""
+        monkeypatch.setattr(batching, 'MAX_BATCH_SIZE', 3)
+        with django_capture_on_commit_callbacks(execute=True):
+            batching.window.add([1, 2])
+            assert sent == []
+            batching.window.add([3])
+        assert sent == [[1, 2, 3]]
@@ -0,0 +1,50 @@
+"""
+Тесты для представлений каталога.
+"""
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from store.models import Category, Product
+
+
+@pytest.fixture
+def category_with_products():
+    """Категория с 30 товарами."""
+    category = Category.objects.create(name='Большая категория')
+    Product.objects.bulk_create(
+        Product(name=f'Товар {i}', price=Decimal('10.00'), category=category)
+        for i in range(30)
+    )
+    return category
+
+
+@pytest.mark.django_db
+class TestCategoryDetailView:
+    """Тесты для страницы категории."""
+
+    def test_paginated(self, client, category_with_products):
+        """Страница категории показывает не больше 12 товаров."""
+        url = reverse('store:category_detail', args=[category_with_products.id])
+        response = client.get(url)
+        assert len(response.context['products']) == 12
+        assert response.context['is_paginated']
+
+        response = client.get(url, {'page': 3})
+        assert len(response.context['products']) == 6
+        assert 'page=2' in response.context['page_links']['previous']
+
+    def test_stream(self, client, category_with_products):
+        """Потоковый режим отдает все товары внутри полной страницы."""
+        url = reverse('store:category_detail', args=[category_with_products.id])
+        response = client.get(url, {'stream': 1})
+        assert response.streaming
+        content = b''.join(response.streaming_content).decode()
+        assert content.count('class="product-card"') == 30
+        assert '<h1>Большая категория</h1>' in content
+        assert content.rstrip().endswith('</html>')
+
+    def test_empty_category(self, client):
+        """Пустая категория показывает заглушку."""
+        category = Category.objects.create(name='Пустая')
+        response = client.get(reverse('store:category_detail', args=[category.id]))
+        assert 'В этой категории пока нет товаров' in response.content.decode()
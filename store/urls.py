@@ -10,5 +10,6 @@ urlpatterns = [
     path('product/create/', views.ProductCreateView.as_view(), name='product_create'),
     path('product/<int:product_id>/edit/', views.ProductUpdateView.as_view(), name='product_edit'),
     path('product/<int:product_id>/delete/', views.ProductDeleteView.as_view(), name='product_delete'),
+    path('export/', views.export_products, name='export'),
 ]
 
@@ -0,0 +1,20 @@
+"""
+Правила валидации товаров, общие для форм и импорта.
+"""
+from django.core.exceptions import ValidationError
+
+
+def validate_price(price):
+    """Цена должна быть положительной."""
+    if price is not None and price < 0:
+        raise ValidationError('Цена не может быть отрицательной.')
+    if price is not None and price == 0:
+        raise ValidationError('Цена должна быть больше нуля.')
+    return price
+
+
+def clean_product_name(name):
+    """Название без пробелов по краям, не короче 3 символов."""
+    if name and len(name.strip()) < 3:
+        raise ValidationError('Название должно содержать минимум 3 символа.')
+    return name.strip()
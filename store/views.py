@@ -1,13 +1,70 @@
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.db.models import Q
 from django.contrib import messages
 from django.urls import reverse_lazy
+from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
+from django.utils.decorators import method_decorator
+from django.template.loader import render_to_string
 from .models import Category, Product
 from .forms import ProductForm
-from .tasks import log_new_product
+from .pagination import pagination_links, paginate_by_cursor, use_cursor_pagination
+from .batching import queue_new_product
+from .conditional import conditional_page
+from .export import CONTENT_TYPES, FORMATS, export_filename, export_queryset, iter_export
+from .facets import PRICE_BUCKETS, get_facets
+from .filters import active_filters, filter_products
+from .fragments import render_cards, render_detail
 
+# Размер страницы категории и порции потоковой отдачи
+CATEGORY_PAGE_SIZE = 12
+STREAM_CHUNK_SIZE = 500
+STREAM_PLACEHOLDER = '<!-- store:products-stream -->'
+# Поля товара, нужные карточке без категории
+STREAM_FIELDS = ('id', 'name', 'price', 'description', 'revision')
 
+
+def price_facets(request):
+    """
+    Ценовые диапазоны с количеством товаров для текущего поиска и категории.
+    
+    Фасет считается без собственного фильтра ?price=, чтобы показывать
+    количество и для соседних диапазонов.
+    """
+    filters = active_filters(request.GET, exclude=('price',))
+    queryset = filter_products(Product.objects.all(), filters)
+    counts = get_facets(queryset, filters)['price']
+    selected = request.GET.get('price')
+    params = request.GET.copy()
+    for key in ('page', 'cursor'):
+        params.pop(key, None)
+    facets = []
+    for key, label, _, _ in PRICE_BUCKETS:
+        params['price'] = key
+        facets.append({
+            'key': key,
+            'label': label,
+            'count': counts[key],
+            'query': params.urlencode(),
+            'active': key == selected,
+        })
+    return facets
+
+
+# Товары, от которых зависят страницы каталога (водяной знак store.conditional)
+def catalog_scope(request):
+    return Product.objects.all()
+
+
+def category_scope(request, category_id):
+    return Product.objects.filter(category_id=category_id)
+
+
+def product_scope(request, product_id):
+    return Product.objects.filter(pk=product_id)
+
+
+@method_decorator(conditional_page(catalog_scope), name='dispatch')
 class ProductListView(ListView):
     """ListView для отображения списка товаров."""
     model = Product
@@ -18,33 +75,30 @@ class ProductListView(ListView):
     def get_queryset(self):
         """Фильтрация и поиск товаров."""
         queryset = Product.objects.select_related('category').all()
-        
-        # Поиск
-        search_query = self.request.GET.get('search', '')
-        if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(category__name__icontains=search_query)
-            )
-        
-        # Фильтр по категории
-        category_id = self.request.GET.get('category')
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        
-        return queryset
+        # Поиск по полнотекстовому индексу и фильтр по категории
+        return filter_products(queryset, self.request.GET)
+    
+    def paginate_queryset(self, queryset, page_size):
+        """Курсорная пагинация по запросу ?pagination=cursor (без COUNT и OFFSET)."""
+        if not use_cursor_pagination(self.request):
+            return super().paginate_queryset(queryset, page_size)
+        page = paginate_by_cursor(self.request, queryset, page_size)
+        return None, page, page.object_list, page.has_other_pages()
     
     def get_context_data(self, **kwargs):
         """Добавление дополнительных данных в контекст."""
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
+        if context['page_obj'] is not None:
+            context['page_links'] = pagination_links(self.request, context['page_obj'])
+        context['product_cards'] = render_cards(context['object_list'], show_category=True)
+        context['price_facets'] = price_facets(self.request)
         context['search_query'] = self.request.GET.get('search', '')
         category_id = self.request.GET.get('category')
         context['selected_category'] = int(category_id) if category_id else None
         return context
 
 
+@method_decorator(conditional_page(product_scope), name='dispatch')
 class ProductDetailView(DetailView):
     """DetailView для отображения деталей товара."""
     model = Product
@@ -57,9 +111,9 @@ class ProductDetailView(DetailView):
         return Product.objects.select_related('category')
     
     def get_context_data(self, **kwargs):
-        """Добавление категорий в контекст."""
+        """Основной блок страницы берется из кеша фрагментов."""
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
+        context['product_body'] = render_detail(self.object)
         return context
 
 
@@ -73,15 +127,14 @@ class ProductCreateView(CreateView):
         """Добавление дополнительных данных в контекст."""
         context = super().get_context_data(**kwargs)
         context['title'] = 'Добавить товар'
-        context['categories'] = Category.objects.all()
         return context
     
     def form_valid(self, form):
         """Обработка успешной валидации формы."""
         response = super().form_valid(form)
         messages.success(self.request, f'Товар "{form.instance.name}" успешно добавлен!')
-        # Запуск фоновой задачи Celery для логирования
-        log_new_product.delay(self.object.id)
+        # Логирование в Celery: событие отправится пакетом в конце запроса
+        queue_new_product(self.object.id)
         return response
     
     def get_success_url(self):
@@ -100,7 +153,6 @@ class ProductUpdateView(UpdateView):
         """Добавление дополнительных данных в контекст."""
         context = super().get_context_data(**kwargs)
         context['title'] = 'Редактировать товар'
-        context['categories'] = Category.objects.all()
         return context
     
     def form_valid(self, form):
@@ -127,16 +179,88 @@ class ProductDeleteView(DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
+@conditional_page(category_scope)
 def category_detail(request, category_id):
-    """Страница категории с товарами."""
+    """Страница категории с товарами (постранично или потоком при ?stream=1)."""
     category = get_object_or_404(Category, id=category_id)
     products = Product.objects.filter(category=category).select_related('category')
-    categories = Category.objects.all()
-    
     context = {
         'category': category,
-        'products': products,
-        'categories': categories,
     }
+    if request.GET.get('stream'):
+        return stream_category_products(request, context, products)
+    
+    if use_cursor_pagination(request):
+        page = paginate_by_cursor(request, products, CATEGORY_PAGE_SIZE)
+    else:
+        page = Paginator(products, CATEGORY_PAGE_SIZE).get_page(request.GET.get('page'))
+    context.update({
+        'products': page.object_list,
+        'product_cards': render_cards(page.object_list),
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'page_links': pagination_links(request, page),
+    })
     return render(request, 'store/category_detail.html', context)
 
+
+def stream_frame(request, context):
+    """Страница категории без товаров, разрезанная по месту сетки: (начало, конец)."""
+    page = render_to_string(
+        'store/category_detail.html',
+        {**context, 'stream_placeholder': STREAM_PLACEHOLDER},
+        request=request,
+    )
+    head, tail = page.split(STREAM_PLACEHOLDER, 1)
+    return head, tail
+
+
+def stream_category_products(request, context, products):
+    """
+    Потоковая отдача всех товаров категории.
+    
+    Страница рендерится один раз с маркером на месте сетки товаров, затем
+    карточки рендерятся и отправляются порциями по мере чтения из БД через
+    .iterator(), так что в памяти одновременно находится только одна порция.
+    Карточки порции берутся из кеша фрагментов одним get_many().
+    """
+    head, tail = stream_frame(request, context)
+    rows = products.select_related(None).only(*STREAM_FIELDS)
+    
+    def chunks():
+        yield head
+        buffer = []
+        for product in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+            buffer.append(product)
+            if len(buffer) >= STREAM_CHUNK_SIZE:
+                yield ''.join(render_cards(buffer))
+                buffer = []
+        if buffer:
+            yield ''.join(render_cards(buffer))
+        yield tail
+    
+    return StreamingHttpResponse(chunks(), content_type='text/html; charset=utf-8')
+
+
+def export_products(request):
+    """
+    Потоковый экспорт каталога: ?format=csv|jsonl, ?gzip=1.
+    
+    Поддерживает те же фильтры ?search= и ?category=, что и список товаров.
+    """
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest(f'Неизвестный формат: {fmt}')
+    category = request.GET.get('category')
+    if category and not category.isdigit():
+        return HttpResponseBadRequest(f'Некорректная категория: {category}')
+    compress = bool(request.GET.get('gzip'))
+    
+    response = StreamingHttpResponse(
+        iter_export(export_queryset(request.GET), fmt, compress),
+        content_type='application/gzip' if compress else CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{export_filename(fmt, compress)}"'
+    )
+    return response